@@ -0,0 +1,86 @@
+# actions.py — modèle d'actions typé partagé par l'IA et les environnements
+#
+# Indices 0..4  : déplacements (dx, dy), 4 = rester sur place
+# Indices 5..13 : attaques, codées relativement à l'attaquant (dx, dy)
+
+from enum import IntEnum
+
+import numpy as np
+
+
+
+class Action(IntEnum):
+    DOWN = 0
+    UP = 1
+    RIGHT = 2
+    LEFT = 3
+    STAY = 4
+    ATTACK_UP_LEFT = 5
+    ATTACK_UP = 6
+    ATTACK_UP_RIGHT = 7
+    ATTACK_LEFT = 8
+    ATTACK_HERE = 9
+    ATTACK_RIGHT = 10
+    ATTACK_DOWN_LEFT = 11
+    ATTACK_DOWN = 12
+    ATTACK_DOWN_RIGHT = 13
+
+
+MOVE_DELTAS = [(0, 1), (0, -1), (1, 0), (-1, 0), (0, 0)]
+ATTACK_DELTAS = [
+    (-1, -1), (0, -1), (1, -1),
+    (-1, 0), (0, 0), (1, 0),
+    (-1, 1), (0, 1), (1, 1),
+]
+ACTION_DELTAS = MOVE_DELTAS + ATTACK_DELTAS
+DX = tuple(d[0] for d in ACTION_DELTAS)
+DY = tuple(d[1] for d in ACTION_DELTAS)
+
+N_MOVES = len(MOVE_DELTAS)
+N_ACTIONS = len(ACTION_DELTAS)
+STAY = Action.STAY
+
+def is_attack(action):
+    return action >= N_MOVES
+
+# -------------------------------------------------
+# Légalité
+# -------------------------------------------------
+def legal_mask(unit, board, attacks=True):
+    """
+    Masque booléen (N_ACTIONS,) des actions légales pour `unit` sur `board`
+    (engine.Board) :
+      - déplacement vers une case de la carte libre, rester toujours permis
+      - attaque d'une case (voisine ou la sienne) où se trouve un ennemi
+    """
+    mask = np.zeros(N_ACTIONS, dtype=bool)
+    mask[STAY] = True
+    for a in range(N_MOVES):
+        if a != STAY and board.is_free(unit.x + DX[a], unit.y + DY[a]):
+            mask[a] = True
+    if attacks:
+        for a in range(N_MOVES, N_ACTIONS):
+            if board.has_enemy(unit.x + DX[a], unit.y + DY[a], unit.color):
+                mask[a] = True
+    return mask
+
+# -------------------------------------------------
+# Compatibilité avec les chaînes de l'ancienne Q-table JSON
+#   déplacements : "(dx, dy)"
+#   attaques     : "ATTACK_x_y" (case absolue de la cible)
+# -------------------------------------------------
+_MOVE_BY_STR = {str(d): i for i, d in enumerate(MOVE_DELTAS)}
+
+def action_from_str(action_str, x, y):
+    """Chaîne d'action de l'ancien format -> indice, pour une unité en (x, y)."""
+    if action_str.startswith("ATTACK"):
+        _, tx, ty = action_str.split("_")
+        return N_MOVES + ATTACK_DELTAS.index((int(tx) - x, int(ty) - y))
+    return _MOVE_BY_STR[action_str]
+
+def action_to_str(action, x, y):
+    """Indice -> chaîne d'action de l'ancien format, pour une unité en (x, y)."""
+    dx, dy = ACTION_DELTAS[action]
+    if is_attack(action):
+        return f"ATTACK_{x + dx}_{y + dy}"
+    return str((dx, dy))
@@ -1,7 +1,21 @@
 # ai.py — IA (Q-learning) orientée objectifs
 
 from config import *  # size, couleurs, etc. + (éventuellement) constantes de rewards
+import os
 import random
+from collections import deque
+from itertools import repeat
+from time import perf_counter
+
+import numpy as np
+
+from actions import Action, DX, DY, N_ACTIONS, N_MOVES, STAY, is_attack, legal_mask
+from encoders import make_encoder
+from engine import Objectives, apply_action, attack_target, control_reach
+from exploration import Explorer
+from linear_q import LinearQ
+import profiling
+from qtable import QTable, convert
 
 # -------------------------------------------------
 # Valeurs par défaut si non définies dans config.py
@@ -35,245 +49,665 @@ _def("TIME_PENALTY_PER_ACTION", 0.5)
 _def("TIME_PENALTY_GROWTH", 0.02)
 _def("MAX_TIME_PENALTY", 2.0)
 
-# -------------------------------------------------
-# Helpers objectifs
-# -------------------------------------------------
-def _on_objective_xy(x, y, objectives):
-    """True si (x,y) est une case objectif."""
-    return any(obj['x'] == x and obj['y'] == y for obj in objectives)
+# Avance rapide des fins de partie stationnaires (voir fast_forward)
+_def("FAST_FORWARD", True)
+
+# Encodage de l'état (voir encoders.py)
+_def("STATE_ENCODER", "absolute")
+encoder = make_encoder(STATE_ENCODER)
+
+# Valeurs apprises : "table" (QTable) ou "linear" (linear_q.LinearQ)
+_def("VALUE_BACKEND", "table")
+
+# Budget mémoire de la Q-table pendant l'entraînement (voir QTable.set_budget)
+_def("QTABLE_MEMORY_MB", None)
+_def("QTABLE_EVICTION", "lru")
+
+# Mises à jour multi-pas pendant l'entraînement (voir UnitTraces)
+_def("Q_UPDATE", "one_step")
+_def("N_STEP", 4)
+_def("TRACE_LAMBDA", 0.8)
+_def("TRACE_MIN", 0.01)
+_def("TRACE_MAX_LEN", 32)
 
-def _nearest_objective_dist(unit, objectives):
-    """Distance de Manhattan au plus proche objectif (0 si aucun)."""
-    if not objectives:
-        return 0
-    return min(abs(obj['x'] - unit.x) + abs(obj['y'] - unit.y) for obj in objectives)
+# Exploration pendant l'entraînement (voir exploration.py)
+_def("EXPLORATION", "fixed")
+_def("EPS_MIN", 0.01)
+_def("EPS_DECAY_VISITS", 20)
+_def("UCB_C", 1.0)
+
+# Types de reward comptés par ai_turn_reward_based (reward_stats)
+REWARD_TYPES = (
+    "ENTER_OBJ", "HOLD_OBJ", "ON_OBJ_END", "LEAVE_OBJ", "STAY_OFF_OBJ",
+    "CLOSER_OBJ", "FARTHER_OBJ", "DAMAGE", "KILL", "TIME_PENALTY",
+)
 
 # -------------------------------------------------
-# Q-learning primitives
+# Chargement / sauvegarde de la Q-table
 # -------------------------------------------------
-def choose_action(state, unit, units, Q, eps: float = 0.1, objectives=None, grid=None, turn_count=None):
-    """
-    Construit l'espace d'actions légal du moment puis sélection ε-greedy
-    sur (Q + PRIOR_BETA * prior_heuristique).
+def qtable_basename():
+    """Nom du fichier de valeurs pour le backend et l'encodeur configurés."""
+    if VALUE_BACKEND == "linear":
+        return f"q_linear{encoder.suffix}.npz"
+    return f"q_table{encoder.suffix}.qtb"
 
-    Actions proposées :
-      - déplacements: (0,1),(0,-1),(1,0),(-1,0),(0,0)      (0,0) = rester
-      - attaques:     "ATTACK_x_y" pour chaque ennemi à portée (can_move)
+def load_qtable(filename):
     """
-    # 1) Mouvements légaux
-    directions = [(0, 1), (0, -1), (1, 0), (-1, 0), (0, 0)]
-    move_actions = []
-    for dx, dy in directions:
-        nx, ny = unit.x + dx, unit.y + dy
-        if dx == 0 and dy == 0:
-            move_actions.append(str((dx, dy)))
-            continue
-        if 0 <= nx < size and 0 <= ny < size:
- 
-            if not any(u.x == nx and u.y == ny for u in units):
-                move_actions.append(str((dx, dy)))
-
-    # 2) Attaques
-    attack_actions = []
-    for enemy in (u for u in units if u.color != unit.color):
-        if unit.can_move(enemy.x, enemy.y):
-            attack_actions.append(f"ATTACK_{enemy.x}_{enemy.y}")
+    Charge la Q-table (.qtb mappé en mémoire, ou .json ; table vide si absente),
+    ou les poids d'une LinearQ (.npz ; poids nuls si absent).
+    Si le .qtb n'existe pas encore mais qu'un .json du même nom existe,
+    il est converti une fois au format binaire.
+    La Q-table reçoit le budget mémoire QTABLE_MEMORY_MB (appliqué par
+    Q.enforce_budget(), voir auto_game.py et trainer.py).
+    """
+    if filename.endswith(".npz"):
+        return LinearQ.load(filename, encoder.name)
+    if filename.endswith(".qtb") and not os.path.exists(filename):
+        legacy = filename[:-len(".qtb")] + ".json"
+        if os.path.exists(legacy):
+            convert(legacy, filename)
+    Q = QTable.load(filename)
+    Q.set_budget(QTABLE_MEMORY_MB, QTABLE_EVICTION)
+    return Q
+
+def save_qtable(Q, filename):
+    Q.save(filename)
 
-    # Gate des attaques sur les premiers tours si on n'est pas déjà sur obj
-    on_obj_now = _on_objective_xy(unit.x, unit.y, objectives or [])
-    if turn_count is not None and turn_count < ATTACK_GATING_TURNS and not on_obj_now:
-        attack_actions = []
-
-    actions_str = move_actions + attack_actions
-    if not actions_str:
-        actions_str = [str((0, 0))]
-
-    # 3) Init Q[state] + cases d'action manquantes
-    if state not in Q:
-        Q[state] = {}
-    for a in actions_str:
-        if a not in Q[state]:
-            Q[state][a] = 0.0
-
-    # 4) Prior heuristique pro-objectifs (faible échelle, additionné à Q)
-    prior = {a: 0.0 for a in actions_str}
-    prev_dist = _nearest_objective_dist(unit, objectives or [])
-
-    for a in actions_str:
-        if a.startswith("ATTACK"):
-            # attaques un peu défavorisées sauf si on tient déjà un obj
-            prior[a] += (0.2 if on_obj_now else -0.2)
-            continue
+# -------------------------------------------------
+# Helpers objectifs (tables précalculées par partie, voir engine.Objectives)
+# -------------------------------------------------
+def _as_objectives(objectives):
+    if isinstance(objectives, Objectives):
+        return objectives
+    return Objectives(objectives or [])
 
-        dx, dy = eval(a)  # "(dx, dy)"
-        nx, ny = unit.x + dx, unit.y + dy
+def objective_prior(objectives):
+    """
+    Tenseur prior[y, x, action] du prior heuristique pro-objectifs (faible
+    échelle, additionné à Q dans choose_action). Calculé une seule fois par
+    partie à partir des tables d'objectifs, puis mis en cache.
+    """
+    prior = objectives.tables.get("prior")
+    if prior is not None:
+        return prior
+    if profiling.enabled:
+        t0 = perf_counter()
+
+    n = objectives.size
+    on = np.array(objectives.points) > 0
+    dist = np.array(objectives.dist)
+    ys, xs = np.mgrid[0:n, 0:n]
+    prior = np.zeros((n, n, N_ACTIONS))
+
+    # attaques un peu défavorisées sauf si on tient déjà un obj
+    prior[:, :, N_MOVES:] = np.where(on, 0.2, -0.2)[:, :, None]
+
+    for a in range(N_MOVES):
+        nx, ny = np.clip(xs + DX[a], 0, n - 1), np.clip(ys + DY[a], 0, n - 1)
+        entering = on[ny, nx]
+        new_dist = dist[ny, nx]
+        p = prior[:, :, a]
 
         # rester est très bon si on tient un objectif
-        if dx == 0 and dy == 0:
-            prior[a] += (OBJ_HOLD / 10.0 if on_obj_now else -0.1)
-
-        entering = _on_objective_xy(nx, ny, objectives or [])
-        if entering:
-            prior[a] += OBJ_ENTER / 10.0
-        if on_obj_now and not entering:
-            prior[a] += OBJ_LEAVE / 10.0  # négatif → punit quitter
+        if a == STAY:
+            p += np.where(on, OBJ_HOLD / 10.0, -0.1)
+        p += entering * (OBJ_ENTER / 10.0)
+        p += (on & ~entering) * (OBJ_LEAVE / 10.0)  # négatif → punit quitter
+        p += (new_dist < dist) * (CLOSER_OBJ / 10.0)
+        p += (new_dist > dist) * (FARTHER_OBJ / 10.0)
+
+    objectives.tables["prior"] = prior
+    if profiling.enabled:
+        profiling.lap("prior_build", t0)
+    return prior
 
-        new_dist = _nearest_objective_dist(type("P", (), {"x": nx, "y": ny})(), objectives or [])
-        if new_dist < prev_dist:
-            prior[a] += CLOSER_OBJ / 10.0
-        elif new_dist > prev_dist:
-            prior[a] += FARTHER_OBJ / 10.0
-
-    # 5) ε-greedy
-    if random.random() < eps:
-        return random.choice(actions_str)
+# -------------------------------------------------
+# Q-learning primitives
+# -------------------------------------------------
+def choose_action(state, unit, units, Q, eps: float = 0.1, objectives=None, grid=None, turn_count=None,
+                  rng=random, explored=None, bonus=None, greedy=None):
+    """
+    Construit le masque des actions légales du moment puis sélection ε-greedy
+    sur (Q + PRIOR_BETA * prior_heuristique). Renvoie une Action.
+    `rng` : générateur de la partie (module random par défaut).
+    `explored` : liste optionnelle, reçoit True si l'action a été tirée au
+    hasard (ε), False sinon (taux d'exploration, exploration.Explorer).
+    `bonus` : tableau optionnel (N_ACTIONS, actions de Q) ajouté aux scores
+    gloutons, ex. bonus UCB de exploration.Explorer.
+    `greedy` : liste optionnelle, reçoit True si l'action est un argmax de Q
+    seul parmi les actions légales, False si ε, prior ou bonus en ont choisi
+    une autre (coupure des traces, UnitTraces).
+
+    Actions proposées (voir actions.py) :
+      - déplacements: DOWN, UP, RIGHT, LEFT, STAY      STAY = rester
+      - attaques:     ATTACK_* vers chaque case voisine (ou la sienne) occupée par un ennemi
+    Masque, Q et prior sont lus dans le repère de l'encodeur (encoder.action_map) ;
+    l'action renvoyée est celle du plateau.
+    """
+    objectives = _as_objectives(objectives)
+    perm = encoder.action_map(unit)
 
-    def score(a):  # combinaison Q + prior heuristique
-        return Q[state][a] + PRIOR_BETA * prior[a]
+    # Gate des attaques sur les premiers tours si on n'est pas déjà sur obj
+    on_obj_now = objectives.on(unit.x, unit.y)
+    gated = turn_count is not None and turn_count < ATTACK_GATING_TURNS and not on_obj_now
+
+    # 1) Masque légal, calculé une fois à partir de l'index du plateau (engine.Board)
+    mask = legal_mask(unit, units, attacks=not gated)
+    if perm is not None:
+        mask = mask[perm]
+    legal = np.flatnonzero(mask)
+
+    # 2) Init Q[state] : actions légales connues (0.0 si nouvelles)
+    q = Q.q_values(state, mask)
+
+    # 3) ε-greedy
+    explore = rng.random() < eps
+    if explore:
+        action = rng.choice(legal)
+    else:
+        # combinaison Q + prior heuristique (précalculé pour la case de l'unité)
+        prior = objective_prior(objectives)[unit.y, unit.x]
+        if perm is not None:
+            prior = prior[perm]
+        scores = q[legal] + PRIOR_BETA * prior[legal]
+        if bonus is not None:
+            scores = scores + bonus[legal]
+        best = legal[scores == scores.max()]
+        action = rng.choice(best)
+    if explored is not None:
+        explored.append(explore)
+    if greedy is not None:
+        greedy.append(bool(q[action] == q[legal].max()))
+    return Action(action if perm is None else perm[action])
+
+def update_q(state, action, reward, new_state, Q, alpha: float = 0.25, gamma: float = 0.95, visits=None):
+    """
+    Mise à jour Q-learning à un pas. Crée les lignes manquantes pour
+    state/new_state ; une action encore inconnue part de 0.
+    Si `visits` (dict) est fourni, y compte les mises à jour par (state, action).
+    Backend non tabulaire (LinearQ) : mise à jour TD de ses poids.
+    """
+    if visits is not None:
+        visits[(state, action)] = visits.get((state, action), 0) + 1
+    if not Q.tabular:
+        Q.td_update(state, action, reward, new_state, alpha, gamma)
+        return
+    old = Q.get(state, action)
+    Q.row(new_state)
+    future = Q.best_value(new_state)
+    Q.set(state, action, old + alpha * (reward + gamma * future - old))
+
+def time_penalty(turn_count):
+    """Pénalité de temps par action au demi-tour turn_count (0 avant TURN_PENALTY_START)."""
+    if turn_count is None or turn_count < TURN_PENALTY_START:
+        return 0.0
+    over = turn_count - TURN_PENALTY_START
+    return min(MAX_TIME_PENALTY, TIME_PENALTY_PER_ACTION * (1 + TIME_PENALTY_GROWTH * over))
 
-    best_val = max(score(a) for a in actions_str)
-    best = [a for a in actions_str if score(a) == best_val]
-    return random.choice(best)
+# -------------------------------------------------
+# Mises à jour multi-pas (n-step, Q(λ) de Watkins)
+# -------------------------------------------------
+class UnitTraces:
+    """
+    Historique d'apprentissage de chaque unité d'une partie, pour propager
+    les gros rewards d'objectif vers les déplacements d'approche en un seul
+    passage (update_q ne remonte que d'un pas par partie).
+      "n_step"  : les n dernières transitions de l'unité ; Q(s_0, a_0) vise
+                  r_0 + γ r_1 + ... + γ^(n-1) r_(n-1) + γ^n max Q(s_n, ·)
+      "watkins" : traces d'éligibilité remplaçantes {(état, action): e} ;
+                  chaque erreur TD δ met à jour Q(x, b) += α δ e(x, b), puis
+                  e *= γλ. Une action non gloutonne pour Q seul (ε, prior,
+                  bonus UCB) coupe la trace.
+    Traces creuses et bornées : entrées sous `min_trace` supprimées, au plus
+    `max_len` par unité (les plus anciennes partent d'abord).
+    traces.step(...) remplace update_q ; traces.finish(Q) en fin de partie
+    (ou avant une avance rapide) applique les retours n-step en attente.
+    """
 
-def update_q(state, action, reward, new_state, Q, alpha: float = 0.25, gamma: float = 0.95):
+    def __init__(self, mode="watkins", n=4, lam=0.8, min_trace=0.01, max_len=32, alpha=0.25, gamma=0.95):
+        if mode not in ("n_step", "watkins"):
+            raise ValueError(f"mise à jour multi-pas inconnue : {mode!r} (choix : n_step, watkins)")
+        self.mode = mode
+        self.n = n
+        self.decay = gamma * lam
+        self.min_trace = min_trace
+        self.max_len = max_len
+        self.alpha = alpha
+        self.gamma = gamma
+        self.units = {}  # id(unité) -> fenêtre (n-step) ou dict de traces (watkins)
+        self.last = {}   # id(unité) -> dernier nouvel état (n-step)
+
+    def _future(self, Q, state):
+        if Q.tabular:
+            Q.row(state)
+        return Q.best_value(state)
+
+    def _add(self, Q, state, action, step, visits):
+        Q.set(state, action, Q.get(state, action) + step)
+        if visits is not None:
+            visits[(state, action)] = visits.get((state, action), 0) + 1
+
+    def step(self, unit, state, action, reward, new_state, Q, greedy=True, visits=None):
+        """
+        Remplace update_q pour la transition de `unit` ; `greedy` : action
+        argmax de Q (choose_action), sinon la trace Watkins est coupée.
+        """
+        if self.mode == "n_step":
+            window = self.units.get(id(unit))
+            if window is None:
+                window = self.units[id(unit)] = deque()
+            window.append((state, action, reward))
+            self.last[id(unit)] = new_state
+            if len(window) == self.n:
+                self._flush_first(window, new_state, Q, visits)
+            return
+
+        trace = self.units.get(id(unit))
+        if trace is None or not greedy:
+            trace = self.units[id(unit)] = {}
+        trace.pop((state, action), None)  # remplaçante : remise à 1, en dernière position
+        trace[(state, action)] = 1.0
+        if len(trace) > self.max_len:
+            del trace[next(iter(trace))]
+        delta = reward + self.gamma * self._future(Q, new_state) - Q.get(state, action)
+        for key, e in list(trace.items()):
+            self._add(Q, key[0], key[1], self.alpha * delta * e, visits)
+            e *= self.decay
+            if e < self.min_trace:
+                del trace[key]
+            else:
+                trace[key] = e
+
+    def _flush_first(self, window, new_state, Q, visits):
+        """Retour n-step (tronqué à la fenêtre) pour la plus ancienne transition, retirée."""
+        target = self._future(Q, new_state)
+        for _, _, r in reversed(window):
+            target = r + self.gamma * target
+        state, action, _ = window.popleft()
+        self._add(Q, state, action, self.alpha * (target - Q.get(state, action)), visits)
+
+    def finish(self, Q, visits=None):
+        """Fin de trajectoire : applique les retours tronqués en attente et vide les traces."""
+        if self.mode == "n_step":
+            for key, window in self.units.items():
+                while window:
+                    self._flush_first(window, self.last[key], Q, visits)
+        self.units.clear()
+        self.last.clear()
+
+def make_explorer(Q=None):
     """
-    Mise à jour robuste : crée les clés manquantes pour state/action/new_state.
-    Évite les KeyError quand de nouvelles actions apparaissent.
+    Explorer selon EXPLORATION ("fixed" : None, ε historique). Avec une
+    Q-table Q, il est lié à son budget mémoire et à ses évictions (QTable.link).
     """
-    action = str(action)
-    if state not in Q:
-        Q[state] = {}
-    if action not in Q[state]:
-        Q[state][action] = 0.0
-    if new_state not in Q:
-        Q[new_state] = {}
-    old = Q[state][action]
-    future = max(Q[new_state].values()) if Q[new_state] else 0.0
-    Q[state][action] = old + alpha * (reward + gamma * future - old)
+    if EXPLORATION == "fixed":
+        return None
+    explorer = Explorer(EXPLORATION, EPS_MIN, EPS_DECAY_VISITS, UCB_C)
+    if Q is not None and Q.tabular:
+        Q.link(explorer)
+    return explorer
+
+def make_traces():
+    """UnitTraces selon Q_UPDATE ("one_step" : None, update_q classique)."""
+    if Q_UPDATE == "one_step":
+        return None
+    return UnitTraces(Q_UPDATE, N_STEP, TRACE_LAMBDA, TRACE_MIN, TRACE_MAX_LEN)
 
 # -------------------------------------------------
 # Tour IA avec rewards orientés objectifs
 # -------------------------------------------------
-def ai_turn_reward_based(units, objectives, grid, team_color, Q, turn_count=None):
+# Entrées de reward_log, au format historique des logs de parties
+# (STAY_OFF_OBJ n'est compté que dans reward_stats)
+_LOG_FORMATS = {
+    "KILL": "KILL:+{}", "DAMAGE": "DAMAGE:+{}", "LEAVE_OBJ": "LEAVE_OBJ:{}", "HOLD_OBJ": "HOLD_OBJ:+{}",
+    "ENTER_OBJ": "ENTER_OBJ:+{}", "ON_OBJ_END": "ON_OBJ_END:+{}", "CLOSER_OBJ": "CLOSER_OBJ:+{}",
+    "FARTHER_OBJ": "FARTHER_OBJ:{}", "TIME_PENALTY": "TIME_PENALTY:{:.2f}",
+}
+
+def ai_turn_reward_based(units, objectives, grid, team_color, Q, turn_count=None, visits=None,
+                         reward_stats=None, log=True, rng=random, record=None, updates=None, traces=None,
+                         explorer=None):
     """
     Joue 1 tour complet pour team_color.
     - propose déplacements + rester + attaques
     - rewards : OBJ_ENTER/OBJ_HOLD/OBJ_STAY/OBJ_LEAVE, DMG/KILL abaissés,
       shaping de distance, pénalité de temps optionnelle.
+    - visits : dict optionnel de compteurs de mises à jour (voir update_q).
+    - reward_stats : dict optionnel {type de reward: [nombre, somme]} (voir REWARD_TYPES)
+    - log : False pour ne pas construire les chaînes de reward_log
+    - rng : générateur de la partie (ε-greedy), module random par défaut
+    - record : bytearray optionnel, reçoit le code de chaque action jouée (replay.py)
+    - updates : liste (ou experience.ReplayBuffer) optionnelle ; si donnée, les
+      mises à jour (état, action, reward, nouvel état) y sont ajoutées au lieu
+      d'être appliquées à Q (apprentissage différé, voir ai_worker.py et experience.py)
+    - traces : UnitTraces optionnel (make_traces) ; remplace update_q par des
+      mises à jour n-step / Q(λ)
+    - explorer : exploration.Explorer optionnel (make_explorer) ; ε par état
+      et bonus UCB à partir des visites, au lieu de ε fixe
     Retourne: (reward_total, reward_log)
     """
     reward_total = 0.0
     reward_log = []
+    objectives = _as_objectives(objectives)
+
+    def note(kind, value):
+        if log and kind in _LOG_FORMATS:
+            reward_log.append(_LOG_FORMATS[kind].format(value))
+        if reward_stats is not None:
+            entry = reward_stats.get(kind)
+            if entry is None:
+                reward_stats[kind] = [1, value]
+            else:
+                entry[0] += 1
+                entry[1] += value
 
+    timed = profiling.enabled
+    explored = [] if explorer is not None else None
+    greedy = [] if traces is not None else None
     for unit in [u for u in units if u.color == team_color and not u.moved]:
+        if timed:
+            t = perf_counter()
         state = get_state(unit, objectives, units)
-        prev_on_obj = _on_objective_xy(unit.x, unit.y, objectives)
-        prev_dist = _nearest_objective_dist(unit, objectives)
+        if timed:
+            t = profiling.lap("get_state", t)
+        prev_on_obj = objectives.on(unit.x, unit.y)
+        prev_dist = objectives.nearest_dist(unit.x, unit.y)
 
         eps = 0.1 if not prev_on_obj else 0.02  # on explore très peu sur objectif
-        action_str = choose_action(
+        bonus = None
+        if explorer is not None:
+            eps, bonus = explorer.policy(state, eps)
+        action = choose_action(
             state, unit, units, Q,
-            eps=eps, objectives=objectives, grid=grid, turn_count=turn_count
+            eps=eps, objectives=objectives, grid=grid, turn_count=turn_count, rng=rng, explored=explored,
+            bonus=bonus, greedy=greedy
         )
-        if action_str is None:
-            unit.moved = True
-            continue
+        random_pick = explored.pop() if explored is not None else False
+        on_policy = greedy.pop() if greedy is not None else True
+        if record is not None:
+            record.append(action)
+        if timed:
+            t = profiling.lap("choose_action", t)
+        nx, ny = unit.x + DX[action], unit.y + DY[action]
 
         reward = 0.0
 
         # ---- ATTAQUE ----
-        if action_str.startswith("ATTACK"):
-            _, x, y = action_str.split("_")
-            x, y = int(x), int(y)
-            target = next((u for u in units if u.x == x and u.y == y and u.color != unit.color), None)
+        if is_attack(action):
+            target = attack_target(unit, action, units)
             if target:
                 prev_pv = getattr(target, "pv", getattr(target, "hp", 2))
-                unit.attack(target, units, objectives)
+                apply_action(unit, action, units, objectives)
+                if timed:
+                    t = profiling.lap("attack", t)
 
                 # combat peu récompensé (juste pour signaler la direction)
-                if target not in units:
+                if target not in units.team(target.color):
                     reward += KILL_REWARD
-                    reward_log.append(f"KILL:+{KILL_REWARD}")
+                    note("KILL", KILL_REWARD)
                 elif getattr(target, "pv", getattr(target, "hp", 2)) < prev_pv:
                     reward += DMG_REWARD
-                    reward_log.append(f"DAMAGE:+{DMG_REWARD}")
+                    note("DAMAGE", DMG_REWARD)
 
                 # quitter un objectif pour attaquer est très puni
-                now_on_obj = _on_objective_xy(unit.x, unit.y, objectives)
+                now_on_obj = objectives.on(unit.x, unit.y)
                 if prev_on_obj and not now_on_obj:
                     reward += OBJ_LEAVE
-                    reward_log.append(f"LEAVE_OBJ:{OBJ_LEAVE}")
+                    note("LEAVE_OBJ", OBJ_LEAVE)
 
         # ---- DEPLACEMENT / RESTER ----
         else:
-            dx, dy = eval(action_str)
-            nx, ny = unit.x + dx, unit.y + dy
-
-            if dx == 0 and dy == 0:  # rester
+            if action == STAY:  # rester
                 if prev_on_obj:
                     reward += OBJ_HOLD
-                    reward_log.append(f"HOLD_OBJ:+{OBJ_HOLD}")
+                    note("HOLD_OBJ", OBJ_HOLD)
                 else:
                     reward -= 0.2  # éviter de camper hors obj
+                    note("STAY_OFF_OBJ", -0.2)
             else:
-                if 0 <= nx < size and 0 <= ny < size and not any(u.x == nx and u.y == ny for u in units):
-                    entering = _on_objective_xy(nx, ny, objectives)
+                if units.is_free(nx, ny):
+                    entering = objectives.on(nx, ny)
                     if entering:
                         reward += OBJ_ENTER
-                        reward_log.append(f"ENTER_OBJ:+{OBJ_ENTER}")
+                        note("ENTER_OBJ", OBJ_ENTER)
                     if prev_on_obj and not entering:
                         reward += OBJ_LEAVE
-                        reward_log.append(f"LEAVE_OBJ:{OBJ_LEAVE}")
-                    unit.move(nx, ny)
+                        note("LEAVE_OBJ", OBJ_LEAVE)
+                    apply_action(unit, action, units, objectives)
+                    if timed:
+                        t = profiling.lap("move", t)
 
         # bonus d'être sur objectif en fin d'action
-        if _on_objective_xy(unit.x, unit.y, objectives):
+        if objectives.on(unit.x, unit.y):
             reward += OBJ_STAY
-            reward_log.append(f"ON_OBJ_END:+{OBJ_STAY}")
+            note("ON_OBJ_END", OBJ_STAY)
 
         # shaping distance vers objectif
-        new_dist = _nearest_objective_dist(unit, objectives)
+        new_dist = objectives.nearest_dist(unit.x, unit.y)
         if new_dist < prev_dist:
             reward += CLOSER_OBJ
-            reward_log.append(f"CLOSER_OBJ:+{CLOSER_OBJ}")
+            note("CLOSER_OBJ", CLOSER_OBJ)
         elif new_dist > prev_dist:
             reward += FARTHER_OBJ
-            reward_log.append(f"FARTHER_OBJ:{FARTHER_OBJ}")
+            note("FARTHER_OBJ", FARTHER_OBJ)
 
         # pénalité de temps si trop de tours (pour finir plus vite)
-        if turn_count is not None and turn_count >= TURN_PENALTY_START:
-            over = turn_count - TURN_PENALTY_START
-            extra = min(MAX_TIME_PENALTY, TIME_PENALTY_PER_ACTION * (1 + TIME_PENALTY_GROWTH * over))
+        extra = time_penalty(turn_count)
+        if extra:
             reward -= extra
-            reward_log.append(f"TIME_PENALTY:-{extra:.2f}")
+            note("TIME_PENALTY", -extra)
 
+        if timed:
+            t = profiling.lap("rewards", t)
         new_state = get_state(unit, objectives, units)
-        update_q(state, action_str, reward, new_state, Q)
+        if timed:
+            t = profiling.lap("get_state", t)
+        perm = encoder.action_map(unit)
+        q_action = action if perm is None else Action(perm[action])
+        if explorer is not None:
+            explorer.visit(state, q_action, random_pick)
+        if updates is not None:
+            updates.append((state, q_action, reward, new_state))
+        elif traces is not None:
+            traces.step(unit, state, q_action, reward, new_state, Q, on_policy, visits)
+        else:
+            update_q(state, q_action, reward, new_state, Q, visits=visits)
+        if timed:
+            profiling.lap("update_q", t)
         reward_total += reward
 
     return reward_total, reward_log
 
 # -------------------------------------------------
-# Etat pour la Q-table (à adapter si besoin)
+# Avance rapide des fins de partie stationnaires
+# -------------------------------------------------
+def _hold_steps(q, bonus, best_other, m, base, t, n, alpha=0.25, gamma=0.95):
+    """
+    Rejoue pour une unité au plus n fois (choix glouton de STAY puis update_q
+    sur le même état), au demi-tour t, t+2, ... Renvoie (pas joués, Q final,
+    rewards). S'arrête dès que STAY n'est plus strictement le meilleur choix.
+    bonus, best_other : scalaires, ou listes d'une valeur par pas (UCB).
+    """
+    if not isinstance(bonus, list):
+        bonus, best_other = repeat(bonus, n), repeat(best_other, n)
+    rewards = []
+    for b, other in zip(bonus, best_other):
+        if len(rewards) == n or not q + b > other:
+            break
+        extra = time_penalty(t)
+        reward = base - extra if extra else base
+        future = q if q > m else m
+        q = q + alpha * (reward + gamma * future - q)
+        rewards.append(reward)
+        t += 2
+    return len(rewards), q, rewards
+
+def plan_fast_forward(units, objectives, Q, turn_count, n_turns, explorer=None):
+    """
+    Fin de partie stationnaire : tant que STAY est strictement le choix
+    glouton d'une unité (attaques des ennemis à portée comprises), elle ne
+    bouge ni n'attaque : on peut jouer jusqu'à n_turns tours complets en une
+    fois. Chaque unité garde son état ; seul Q[état, STAY] évolue, par la même
+    récurrence que update_q (reward OBJ_HOLD + OBJ_STAY sur objectif, -0.2
+    sinon, moins la pénalité de temps), itérée sur un scalaire au lieu de
+    rejouer les tours. Avec `explorer` en mode "ucb", le test glouton de
+    chaque pas inclut les bonus UCB, qui évoluent à chaque choix de STAY.
+    Seules les unités qui peuvent changer le contrôle d'un objectif pendant
+    ces n tours (engine.control_reach < n) doivent tenir leur case ; une
+    unité proche qui ne la tient pas borne n à sa portée. Les autres restent
+    sur place pendant l'avance, avec la même mise à jour si elles tiennent
+    leur case, sinon figées (leurs coups et leurs mises à jour ne sont pas
+    joués : la partie reste une partie légale, où elles ont attendu).
+    Renvoie (tours complets à jouer, plans) pour apply_fast_forward, un plan
+    None par unité figée ; 0 tour si la configuration n'est pas stable.
+    Q n'est pas modifiée (hors touch).
+    """
+    if turn_count < ATTACK_GATING_TURNS:  # masque d'attaques encore variable
+        return 0, []
+    if not Q.tabular:  # poids partagés : les unités ne sont pas indépendantes
+        return 0, []
+    objectives = _as_objectives(objectives)
+    prior = objective_prior(objectives)
+    reaches = control_reach(units, objectives)
+    held = []
+    n = n_turns
+    # unités les plus proches d'un objectif d'abord : une configuration instable est rejetée au plus tôt
+    for i in sorted(range(len(units)), key=reaches.__getitem__):
+        unit, reach = units[i], reaches[i]
+        if reach >= n:  # elle et les suivantes restent sur place
+            break
+        state = get_state(unit, objectives, units)
+        mask = legal_mask(unit, units)
+        p = prior[unit.y, unit.x]
+        perm = encoder.action_map(unit)  # STAY est fixe par les symétries
+        if perm is not None:
+            mask, p = mask[perm], p[perm]
+        r = Q.touch(state, mask)
+        legal = np.flatnonzero(mask)
+        others = legal[legal != STAY]
+        scores = Q.values[r, others] + PRIOR_BETA * p[others]
+        best_other = scores.max() if len(others) else -np.inf
+        bonus = PRIOR_BETA * p[STAY]
+        ucb = explorer.hold_bonus(state, STAY, n) if explorer is not None else None
+        if ucb is not None:
+            best_other = ((scores + ucb[:, others]).max(axis=1) if len(others) else np.full(n, -np.inf)).tolist()
+            bonus = (bonus + ucb[:, STAY]).tolist()
+        known = Q.known[r].copy()
+        known[STAY] = False
+        m = Q.values[r, known].max() if known.any() else -np.inf
+
+        on = objectives.on(unit.x, unit.y)
+        base = 0.0 + OBJ_HOLD + OBJ_STAY if on else 0.0 - 0.2
+        t = turn_count + (0 if unit.color == PLAYER_COLOR else 1)
+        args = (float(Q.values[r, STAY]), bonus, best_other, m, base, t)
+        if not _hold_steps(*args, 1)[0]:  # bouge dès ce tour : reste sur place, n borné à sa portée
+            if reach <= 0:
+                return 0, []
+            n = reach
+            break
+        held.append((i, reach, state, on, args))
+
+    # horizon de chaque unité qui tient sa case, une fois n borné par les premières qui bougent
+    plans = [None] * len(units)
+    seen = set()
+    for i, reach, state, on, args in held:
+        steps = _hold_steps(*args, n)[0]
+        if steps < n:  # cesse de tenir sa case avant la fin : n borné par ses pas ou par sa portée
+            n = max(steps, min(reach, n))
+            if steps < n:  # reste sur place
+                continue
+        if state in seen:  # deux unités sur le même état : mises à jour entremêlées
+            return 0, []
+        seen.add(state)
+        plans[i] = (state, on, args)
+    return n, plans
+
+def apply_fast_forward(n, plans, Q, visits=None, reward_stats=None, log=True, record=None, explorer=None):
+    """
+    Joue les n tours complets prévus par plan_fast_forward (plans obtenus sur
+    le Q courant). Pour les unités qui tiennent leur case, le résultat est
+    identique à des tours joués sans exploration ; les tirages ε-greedy de
+    ces tours ne sont pas simulés. Les unités figées (plan None) jouent STAY
+    sans mise à jour.
+    `explorer` (le même que pour le plan) reçoit les n choix de STAY par état.
+    Renvoie (n, reward_total, reward_log).
+    """
+    reward_total = 0.0
+    reward_log = []
+    for plan in plans:
+        if plan is None:
+            continue
+        state, on, args = plan
+        _, q, rewards = _hold_steps(*args, n)
+        Q.set(state, STAY, q)
+        if visits is not None:
+            visits[(state, STAY)] = visits.get((state, STAY), 0) + n
+        if explorer is not None:
+            explorer.visit_many(state, STAY, n)
+        reward_total += sum(rewards)
+
+        kinds = [("HOLD_OBJ", OBJ_HOLD), ("ON_OBJ_END", OBJ_STAY)] if on else [("STAY_OFF_OBJ", -0.2)]
+        penalties = [-time_penalty(args[-1] + 2 * j) for j in range(n) if args[-1] + 2 * j >= TURN_PENALTY_START]
+        if reward_stats is not None:
+            for kind, value in kinds:
+                entry = reward_stats.setdefault(kind, [0, 0.0])
+                entry[0] += n
+                entry[1] += value * n
+            if penalties:
+                entry = reward_stats.setdefault("TIME_PENALTY", [0, 0.0])
+                entry[0] += len(penalties)
+                entry[1] += sum(penalties)
+        if log:
+            for kind, value in kinds:
+                if kind in _LOG_FORMATS:
+                    reward_log += [_LOG_FORMATS[kind].format(value)] * n
+            reward_log += [_LOG_FORMATS["TIME_PENALTY"].format(value) for value in penalties]
+    if record is not None:
+        record.extend(bytes([STAY]) * (n * len(plans)))
+    return n, reward_total, reward_log
+
+def fast_forward(units, objectives, Q, turn_count, n_turns, visits=None, reward_stats=None, log=True,
+                 record=None, explorer=None):
+    """
+    plan_fast_forward puis apply_fast_forward.
+    Renvoie (tours complets joués, reward_total, reward_log) ; 0 tour si la
+    configuration n'est pas stable.
+    """
+    n, plans = plan_fast_forward(units, objectives, Q, turn_count, n_turns, explorer)
+    if n == 0:
+        return 0, 0.0, []
+    return apply_fast_forward(n, plans, Q, visits=visits, reward_stats=reward_stats, log=log, record=record,
+                              explorer=explorer)
+
+def make_fast_forward(Q, traces=None, explorer=None, visits=None, reward_stats=None, log=False, record=None):
+    """
+    Callback fast_forward de engine.play_game (None si FAST_FORWARD est
+    désactivé). Avec `traces` (make_traces), les trajectoires en cours ne
+    sont terminées que si des tours sont réellement sautés ; le plan est alors
+    recalculé, finish ayant pu modifier Q[état, STAY]. `explorer` : celui
+    passé à ai_turn_reward_based (bonus UCB et visites des tours sautés).
+    """
+    if not FAST_FORWARD:
+        return None
+
+    def ff_fn(units, objectives, turn_count, n_turns):
+        n, plans = plan_fast_forward(units, objectives, Q, turn_count, n_turns, explorer)
+        if n and traces is not None:
+            traces.finish(Q, visits)  # l'avance rapide interrompt les trajectoires
+            n, plans = plan_fast_forward(units, objectives, Q, turn_count, n_turns, explorer)
+        if n == 0:
+            return 0, 0.0, []
+        return apply_fast_forward(n, plans, Q, visits=visits, reward_stats=reward_stats, log=log, record=record,
+                                  explorer=explorer)
+    return ff_fn
+
+# -------------------------------------------------
+# Etat pour la Q-table (encodeur choisi dans config.py, voir encoders.py)
 # -------------------------------------------------
 def get_state(unit, objectives, units):
     """
-    Encode l'état d'une unité :
-      (x, y, on_obj, close_enemies, local_objectives, nearest_enemy_dist)
-    Renvoie une string clé pour la Q-table.
+    Clé de la Q-table pour l'état de l'unité, selon STATE_ENCODER :
+      "absolute" : (x, y, on_obj, close_enemies, local_objectives, nearest_enemy_dist)
+      "relative" : repère canonique (voir encoders.RelativeEncoder)
     """
-    on_objective = _on_objective_xy(unit.x, unit.y, objectives)
-    close_enemies = sum(
-        1 for u in units
-        if u.color != unit.color and abs(u.x - unit.x) <= 1 and abs(u.y - unit.y) <= 1
-    )
-    local_objectives = sum(
-        1 for obj in objectives
-        if abs(obj['x'] - unit.x) <= 1 and abs(obj['y'] - unit.y) <= 1
-    )
-    enemies = [u for u in units if u.color != unit.color]
-    nearest_enemy_dist = min(
-        [abs(u.x - unit.x) + abs(u.y - unit.y) for u in enemies],
-        default=99
-    )
-    return f"{unit.x},{unit.y},{int(on_objective)},{close_enemies},{local_objectives},{nearest_enemy_dist}"
+    return encoder.encode(unit, _as_objectives(objectives), units)
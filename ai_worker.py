@@ -0,0 +1,161 @@
+# ai_worker.py — tour de l'IA sur un fil de calcul, avec calcul spéculatif
+#
+# Le client (jeu.py) ne joue plus le tour ennemi dans sa boucle d'évènements :
+# il envoie une copie du plateau au fil de l'IA, qui renvoie les codes
+# d'action (actions.Action) par une file ; la boucle pygame les applique
+# ensuite avec engine.apply_action, comme le rejeu (replay.py). La Q-table
+# n'est lue et modifiée que par le fil de l'IA.
+#
+# Spéculation : pendant le tour du joueur, après chacune de ses actions, le
+# fil calcule la réponse de l'IA au plateau tel qu'il serait si le joueur
+# terminait son tour maintenant, sans modifier Q : les écritures (Q.q_values
+# de choose_action, update_q) sont notées dans l'ordre au lieu d'être appliquées.
+# Si, à la fin du tour, le plateau a la même signature (Board.signature),
+# la réponse est réutilisée telle quelle et les écritures sont rejouées dans
+# le même ordre : l'IA répond sans délai, avec la même Q-table qu'un tour
+# calculé normalement. Sinon, le tour est calculé normalement.
+# Seul choose_action lit Q avant la fin du tour : le différé est exact tant
+# qu'aucune unité ne part d'un état mis à jour plus tôt dans le même tour ;
+# dans le cas contraire, la spéculation est abandonnée. Pas de spéculation
+# avec un backend non tabulaire (linear_q.LinearQ) : chaque mise à jour
+# modifie les valeurs de tous les états.
+
+import queue
+import random
+import threading
+
+from config import *
+from ai import ai_turn_reward_based, update_q
+from engine import reset_units
+
+class DeferredQ:
+    """Vue de Q pour la spéculation : q_values est noté dans `writes` au lieu de marquer la ligne."""
+
+    def __init__(self, Q, writes):
+        self.Q = Q
+        self.writes = writes
+
+    def q_values(self, state, mask):
+        # valeurs des actions inconnues = 0 : lire la ligne sans la marquer donne le même choix
+        self.writes.append((state, mask))
+        r = self.Q.row(state)  # peut réallouer Q.values
+        return self.Q.values[r]
+
+    def __getattr__(self, name):
+        return getattr(self.Q, name)
+
+def deferred_writes_exact(writes):
+    """True si rejouer `writes` après coup équivaut à les appliquer au fil du tour."""
+    updated = set()
+    for w in writes:
+        if len(w) == 2:  # touch : choose_action lit Q[état]
+            if w[0] in updated:
+                return False
+        else:
+            updated.add(w[0])
+    return True
+
+def apply_writes(Q, writes):
+    for w in writes:
+        if len(w) == 2:
+            Q.touch(*w)
+        else:
+            update_q(*w, Q)
+
+class AIWorker:
+    """
+    ai = AIWorker(Q, grid, objectives, notify=...)
+    ai.speculate(units)      # pendant le tour du joueur (facultatif)
+    ai.play(units)           # fin du tour du joueur
+    ai.poll()                # -> (codes, reward, log) quand le tour est calculé, sinon None
+    ai.close()
+    `notify` est appelé depuis le fil de l'IA quand un résultat est prêt
+    (ex. pygame.event.post pour réveiller la boucle d'évènements).
+    """
+
+    def __init__(self, Q, grid, objectives, team_color=ENEMY_COLOR, notify=None, rng=None):
+        self.Q = Q
+        self.grid = grid
+        self.objectives = objectives
+        self.team_color = team_color
+        self.notify = notify
+        self.rng = rng if rng is not None else random.Random()
+        self.stats = {"turns": 0, "reused": 0, "speculated": 0, "discarded": 0}
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._spec = None  # (clé, codes, écritures, reward, log) de la dernière spéculation
+        self._thread = threading.Thread(target=self._run, name="ai-worker", daemon=True)
+        self._thread.start()
+
+    # -----------------------
+    # Fil principal
+    # -----------------------
+    def speculate(self, units, turn_count=None):
+        """Prépare la réponse au plateau `units` tel qu'il serait en fin de tour du joueur."""
+        if not self.Q.tabular:
+            return
+        board = units.copy()
+        reset_units(board)
+        self._jobs.put(("speculate", board, turn_count))
+
+    def play(self, units, turn_count=None):
+        """Lance le tour de l'IA sur une copie de `units` (flags déjà réinitialisés)."""
+        self._jobs.put(("play", units.copy(), turn_count))
+
+    def poll(self):
+        try:
+            return self._results.get_nowait()
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self._jobs.put(None)
+        self._thread.join()
+
+    # -----------------------
+    # Fil de l'IA
+    # -----------------------
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            kind, board, turn_count = job
+            if kind == "speculate":
+                if self._jobs.empty():  # sinon une demande plus récente attend déjà
+                    self._speculate(board, turn_count)
+            else:
+                self._results.put(self._play(board, turn_count))
+                if self.notify is not None:
+                    self.notify()
+
+    def _turn(self, board, turn_count, writes=None):
+        codes = bytearray()
+        Q = self.Q if writes is None else DeferredQ(self.Q, writes)
+        reward, log = ai_turn_reward_based(board, self.objectives, self.grid, self.team_color, Q,
+                                           turn_count=turn_count, rng=self.rng, record=codes,
+                                           updates=writes)
+        return codes, reward, log
+
+    def _speculate(self, board, turn_count):
+        key = (board.signature(), turn_count)
+        if self._spec is not None and self._spec[0] == key:
+            return
+        writes = []
+        codes, reward, log = self._turn(board, turn_count, writes)
+        self.stats["speculated"] += 1
+        if deferred_writes_exact(writes):
+            self._spec = (key, codes, writes, reward, log)
+        else:
+            self._spec = None
+            self.stats["discarded"] += 1
+
+    def _play(self, board, turn_count):
+        self.stats["turns"] += 1
+        spec, self._spec = self._spec, None
+        if spec is not None and spec[0] == (board.signature(), turn_count):
+            _, codes, writes, reward, log = spec
+            apply_writes(self.Q, writes)
+            self.stats["reused"] += 1
+            return codes, reward, log
+        return self._turn(board, turn_count)
@@ -1,183 +1,194 @@
-# auto_game.py — version corrigée (plus d'import circulaire)
+# auto_game.py — entraînement IA vs IA, sans affichage (front-end de engine.py)
 
 import os
-import json
-import csv
+import random
 from datetime import datetime
-import time
+from time import perf_counter
 
-import pygame
+import numpy as np
 
 from config import *  # tile_size, size, width, height, interface_height, couleurs, etc.
 
 # On importe désormais l'IA depuis ai.py (et non plus depuis ce fichier)
-from ai import ai_turn_reward_based
-
-# Les outils de génération/affichage et classes proviennent de jeu.py
-from jeu import (
-    Unit,
-    generate_map, generate_units, add_objectives,
-    calculate_scores, draw_map, draw_objectives, draw_scores, draw_victory_message
-)
+from ai import (ai_turn_reward_based, make_explorer, make_fast_forward, make_traces, qtable_basename,
+                save_qtable)
+
+# Règles et boucle de partie : moteur pur Python
+from engine import play_game
+from checkpoint import open_checkpoint
+from experience import ReplayBuffer
+from qtable import QTable
+from replay import GameRecord, RecordWriter, new_game
+from spectator import Spectator
+from telemetry import TelemetryWriter
+import profiling
 
 # -----------------------
 # Paramètres d'entraînement auto
 # -----------------------
-AUTO_MODE = True
 NB_PARTIES = 500
-PAUSE_BETWEEN_PARTIES = 0.1  # secondes entre parties (si tu veux voir)
+CHECKPOINT_EVERY = 10   # parties entre deux écritures du journal de Q
+COMPACT_EVERY = 100     # parties entre deux réécritures complètes de l'instantané
+LOG_FORMAT = "csv"      # "csv" ou "sqlite" (voir telemetry.py)
+SEED = None             # graine de la session (None : tirée au hasard) ; partie n -> SEED + n
+RECORD_GAMES = True     # enregistre graine + actions de chaque partie (voir replay.py)
+SPECTATE = False        # fenêtre spectateur dans un processus séparé (voir spectator.py)
+SPECTATE_EVERY_GAMES = 10  # une partie suivie sur N
+SPECTATE_EVERY_TURNS = 1   # dans une partie suivie, un demi-tour affiché sur N
+REPLAY = False          # rejeu d'expérience au lieu des mises à jour en ligne (voir experience.py)
+REPLAY_PRIORITIZED = False  # balayage par priorité (|erreur TD|) au lieu d'un tirage uniforme
+REPLAY_CAPACITY = 50_000    # transitions gardées
+REPLAY_BATCH = 64           # transitions par lot rejoué
+REPLAY_BATCHES = 1          # lots rejoués après chaque demi-tour
 
 # -----------------------
-# Préparation fichiers
+# Fichiers
 # -----------------------
 data_dir = "data"
-os.makedirs(data_dir, exist_ok=True)
-log_filename = os.path.join(data_dir, f"logs_parties_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
-qtable_filename = os.path.join(data_dir, "q_table.json")
-
-# -----------------------
-# Q-table
-# -----------------------
-if os.path.exists(qtable_filename):
-    with open(qtable_filename, "r") as f:
-        Q = json.load(f)
-else:
-    Q = {}
+# un fichier par backend et par encodeur d'état (clés incompatibles)
+qtable_filename = os.path.join(data_dir, qtable_basename())
+_root, _ext = os.path.splitext(qtable_filename)
+checkpoint_filename = _root + ".ckpt" + _ext  # + journal .log pour une Q-table
 
 # -----------------------
 # Utilitaires auto
 # -----------------------
-def reset_units(units):
-    """Réinitialise les flags des unités pour un nouveau tour."""
-    for u in units:
-        u.moved = False
-        u.attacked_this_turn = False
-        u.idle_turns = getattr(u, "idle_turns", 0) + 1
-
 def synthesize_qtable(qtable, min_action_value=0.1, keep_only_best=True, min_state_quality=2):
     """
     Nettoie la Q-table pour garder uniquement les actions significatives.
     """
-    new_q = {}
-    for state, actions in qtable.items():
-        filtered = {a: v for a, v in actions.items() if abs(v) >= min_action_value}
-        if not filtered:
+    new_q = QTable()
+    for state, values, known in qtable.items():
+        filtered = known & (np.abs(values) >= min_action_value)
+        if not filtered.any():
             continue
-        max_val = max(filtered.values())
+        max_val = values[filtered].max()
         if max_val < min_state_quality:
             continue
         if keep_only_best:
-            filtered = {a: v for a, v in filtered.items() if v == max_val}
-        if filtered:
-            new_q[state] = filtered
+            filtered &= values == max_val
+        for a in np.flatnonzero(filtered):
+            new_q.set(state, a, values[a])
     return new_q
 
 # -----------------------
 # Simulation auto (IA vs IA)
 # -----------------------
 def simulate_auto_game():
-    pygame.init()
-    pygame.display.set_caption("Jeu IA vs IA")
-    screen = pygame.display.set_mode((width, height + interface_height))
-
-    # Init CSV de logs
-    with open(log_filename, mode="w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            "Partie", "Tours", "Score_Joueur", "Score_Ennemi",
-            "Gagnant", "Recompenses", "Actions_Recompensees"
-        ])
-
+    os.makedirs(data_dir, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    ext = "sqlite" if LOG_FORMAT == "sqlite" else "csv"
+    log_filename = os.path.join(data_dir, f"logs_parties_{stamp}.{ext}")
+    base_seed = SEED if SEED is not None else random.randrange(2**32)
+    print(f"Graine de la session : {base_seed}")
+    # Q en cours d'entraînement (et compteurs de l'Explorer) : reprise du dernier checkpoint s'il existe
+    explorer = make_explorer()  # EXPLORATION (config.py)
+    ckpt = open_checkpoint(checkpoint_filename, initial=qtable_filename, explorer=explorer)
+    Q = ckpt.Q
+    if ckpt.games_done:
+        print(f"Reprise du checkpoint : {ckpt.games_done} parties déjà jouées")
+
+    reward_stats = {}
 
     nb_gagnees_score_max = 0
     nb_parties_score_max = 0
-
-    for partie in range(1, NB_PARTIES + 1):
-        game_map = generate_map()
-        units = generate_units()
-        objectives = add_objectives()
-
-        player_score, enemy_score = 0, 0
-        victory = False
-        turn_count = 0
-        total_reward = 0
-        actions_rewarded = []
-
-        print(f"=== Partie {partie} ===")
-        # Boucle de partie (IA rouge vs IA bleue)
-        while not victory:
-            for team in [PLAYER_COLOR, ENEMY_COLOR]:
-                # ✨ APPEL IA (maintenant importée depuis ai.py) et passage de Q
-                reward, log = ai_turn_reward_based(units, objectives, game_map, team, Q, turn_count=turn_count)
-                total_reward += reward
-                actions_rewarded.extend(log)
-
-                # fin de tour : reset des flags + scores
-                reset_units(units)
-                ps, es = calculate_scores(units, objectives)
-                player_score += ps
-                enemy_score += es
-                turn_count += 1
-
-                # screen.fill((BACKGROUND_COLOR))
-                # draw_map(screen, game_map)
-                # draw_objectives(screen, objectives)
-                # for u in units:
-                #     u.draw(screen, units,objectives)
-                # draw_scores(screen, player_score, enemy_score)
-                # pygame.display.flip()
-            # Conditions de victoire
-            if player_score >= 500:
-                victory = True
-                winner = "Joueur"
-            elif enemy_score >= 500:
-                victory = True
-                winner = "Ennemi"
-            elif not any(u.color == PLAYER_COLOR for u in units):
-                victory = True
-                winner = "Ennemi"
-            elif not any(u.color == ENEMY_COLOR for u in units):
-                victory = True
-                winner = "Joueur"
-
-        if player_score > 499 or enemy_score > 499:
-                nb_parties_score_max += 1
-                if (player_score > 499 and winner == "Joueur") or (enemy_score > 499 and winner == "Ennemi"):
-                    nb_gagnees_score_max += 1
-
-
-        if nb_parties_score_max > 0:
-            pourcentage_gagne = (nb_gagnees_score_max / NB_PARTIES) * 100
-        else:
-            pourcentage_gagne = 0
-
-
-
-
-        # Log CSV
-        with open(log_filename, mode="a", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                partie, turn_count, player_score, enemy_score,
-                winner, total_reward, "|".join(actions_rewarded)
-            ])
-        
-
-        with open(log_filename, mode='a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow([])
-            writer.writerow(['% Parties Gagnees au score', f"{pourcentage_gagne:.2f}%"])
-
-    # Nettoyage + sauvegarde Q-table
-    Q_clean = synthesize_qtable(Q, min_action_value=0.1, keep_only_best=True, min_state_quality=2)
-    with open(qtable_filename, "w") as f:
-        json.dump(Q_clean, f)
-
-        # Petite pause si tu veux visualiser (optionnel)
-        if PAUSE_BETWEEN_PARTIES:
-            time.sleep(PAUSE_BETWEEN_PARTIES)
-
-    pygame.quit()
+    pourcentage_gagne = 0
+
+    partie = ckpt.games_done + 1
+    telemetry = TelemetryWriter(log_filename)
+    recorder = RecordWriter(os.path.join(data_dir, f"parties_{stamp}.rec")) if RECORD_GAMES else None
+    spectator = Spectator(SPECTATE_EVERY_GAMES, SPECTATE_EVERY_TURNS) if SPECTATE else None
+    buffer = None
+    if REPLAY:  # non sauvegardé : à la reprise, le buffer repart vide
+        buffer = ReplayBuffer(REPLAY_CAPACITY, REPLAY_BATCH, REPLAY_BATCHES, prioritized=REPLAY_PRIORITIZED,
+                              rng=np.random.default_rng(base_seed))
+    traces = make_traces() if buffer is None else None  # Q_UPDATE (config.py), sans objet avec REPLAY
+    try:
+        for partie in range(ckpt.games_done + 1, NB_PARTIES + 1):
+            print(f"=== Partie {partie} ===")
+            # Boucle de partie (IA rouge vs IA bleue) dans le moteur
+            reward_stats.clear()
+            seed = base_seed + partie
+            rng, units, objectives = new_game(seed)
+            record = GameRecord(seed)
+
+            def turn_fn(units, objectives, game_map, team, turn_count):
+                out = ai_turn_reward_based(units, objectives, game_map, team, Q, turn_count=turn_count,
+                                           reward_stats=reward_stats, log=False,
+                                           rng=rng, record=record.actions, updates=buffer, traces=traces,
+                                           explorer=explorer)
+                if buffer is not None:
+                    buffer.learn(Q)
+                return out
+
+            t = perf_counter()
+            with profiling.sampled_cprofile(partie, data_dir):
+                result = play_game(turn_fn, units=units, objectives=objectives, rng=rng,
+                                   fast_forward=make_fast_forward(Q, traces, explorer, reward_stats=reward_stats,
+                                                                  record=record.actions),
+                                   on_half_turn=spectator.hook(partie) if spectator else None)
+            if traces is not None:
+                traces.finish(Q)
+            if profiling.enabled:
+                t = profiling.lap("game", t)
+            player_score, enemy_score = result["player_score"], result["enemy_score"]
+            winner = result["winner"]
+
+            if player_score > 499 or enemy_score > 499:
+                    nb_parties_score_max += 1
+                    if (player_score > 499 and winner == "Joueur") or (enemy_score > 499 and winner == "Ennemi"):
+                        nb_gagnees_score_max += 1
+
+            if nb_parties_score_max > 0:
+                pourcentage_gagne = (nb_gagnees_score_max / NB_PARTIES) * 100
+
+            # Log (bufferisé)
+            telemetry.write_game(partie, result, reward_stats)
+            if recorder is not None:
+                record.finish(result)
+                recorder.write(record)
+
+            ckpt.end_game()
+            if partie % COMPACT_EVERY == 0:
+                ckpt.compact(partie)
+            elif partie % CHECKPOINT_EVERY == 0:
+                ckpt.flush(partie)
+            if Q.tabular:
+                Q.enforce_budget()
+            if profiling.enabled:
+                profiling.lap("log+checkpoint", t)
+    except KeyboardInterrupt:
+        # la partie interrompue n'est pas comptée : elle sera rejouée à la reprise,
+        # ses mises à jour de Q ne sont donc pas journalisées
+        ckpt.flush(partie - 1, current=False)
+        ckpt.close()
+        raise
+    finally:
+        telemetry.write_summary('% Parties Gagnees au score', f"{pourcentage_gagne:.2f}%")
+        if Q.tabular:
+            mem = Q.memory_stats()
+            telemetry.write_summary('Etats en memoire', mem["resident"])
+            telemetry.write_summary('Etats evinces', mem["evicted"])
+            telemetry.write_summary('Taux de presence', f"{100 * mem['hit_rate']:.1f}%")
+        if explorer is not None:
+            telemetry.write_summary("Taux d'exploration", f"{100 * explorer.exploration_rate():.2f}%")
+            telemetry.write_summary('Etats visites', len(explorer))
+        telemetry.close()
+        if recorder is not None:
+            recorder.close()
+        if spectator is not None:
+            spectator.close()
+
+    # Nettoyage (Q-table seulement) + sauvegarde
+    if Q.tabular:
+        Q_clean = synthesize_qtable(Q, min_action_value=0.1, keep_only_best=True, min_state_quality=2)
+        Q.release_base()  # Q peut encore mapper qtable_filename (remplacement impossible sous Windows)
+        Q = Q_clean
+    save_qtable(Q, qtable_filename)
+    ckpt.remove()
+
+    if profiling.enabled:
+        print(profiling.summary())
 
 if __name__ == "__main__":
     simulate_auto_game()
@@ -0,0 +1,363 @@
+# batch_env.py — environnement vectorisé : N parties jouées en parallèle (NumPy)
+#
+# Mêmes règles que engine.Unit.move / engine.Unit.attack / calculate_scores et
+# mêmes rewards que ai.ai_turn_reward_based, mais chaque opération porte sur
+# les N parties à la fois. Les unités d'un camp jouent dans l'ordre de la
+# liste (slot 0..k-1 pour bleu, k..2k-1 pour rouge), comme dans le moteur.
+
+import time
+
+import numpy as np
+
+from config import *
+from actions import ACTION_DELTAS, N_ACTIONS, N_MOVES, STAY
+
+BLUE, RED = 0, 1
+
+_DX = np.array([d[0] for d in ACTION_DELTAS], dtype=np.int64)
+_DY = np.array([d[1] for d in ACTION_DELTAS], dtype=np.int64)
+
+# Fenêtre 3x3 (portée d'attaque / voisinage de get_state)
+_WIN_DX = np.array([dx for dy in (-1, 0, 1) for dx in (-1, 0, 1)])
+_WIN_DY = np.array([dy for dy in (-1, 0, 1) for dx in (-1, 0, 1)])
+
+
+class BatchedEnv:
+    """
+    N parties stockées dans des tableaux NumPy :
+      x, y, alive, pv, moved : (N, 2k)
+      occ                    : (N, 2, size, size) nombre d'unités par camp et par case
+      obj_points             : (N, size, size) 3 = majeur, 1 = mineur, 0 = rien
+      obj_dist               : (N, size, size) distance au plus proche objectif
+      scores                 : (N, 2), turn : (N,), winner : (N,) (-1 = en cours)
+    """
+
+    def __init__(self, n_games, board_size=size, units_per_side=5, seed=None):
+        self.n = n_games
+        self.size = board_size
+        self.k = units_per_side
+        self.rng = np.random.default_rng(seed)
+        self.team = np.array([BLUE] * self.k + [RED] * self.k)
+
+        n, u, s = n_games, 2 * units_per_side, board_size
+        self.games = np.arange(n)
+        self.x = np.zeros((n, u), dtype=np.int64)
+        self.y = np.zeros((n, u), dtype=np.int64)
+        self.alive = np.zeros((n, u), dtype=bool)
+        self.pv = np.zeros((n, u), dtype=np.int8)
+        self.moved = np.zeros((n, u), dtype=bool)
+        self.occ = np.zeros((n, 2, s, s), dtype=np.int16)
+        self.obj_points = np.zeros((n, s, s), dtype=np.int8)
+        self.obj_dist = np.zeros((n, s, s), dtype=np.int64)
+        self.scores = np.zeros((n, 2), dtype=np.int64)
+        self.turn = np.zeros(n, dtype=np.int64)
+        self.winner = np.full(n, -1, dtype=np.int8)
+        self.reset()
+
+    # -----------------------
+    # Initialisation
+    # -----------------------
+    def reset(self, games=None):
+        """(Ré)initialise les parties `games` (toutes par défaut)."""
+        g = self.games if games is None else np.asarray(games)
+        if g.size == 0:
+            return
+        s, k = self.size, self.k
+
+        # unités : tirage sans remise des lignes de départ, comme generate_units
+        rows = np.argsort(self.rng.random((g.size, 2, s)), axis=2)[:, :, :k]
+        self.x[g, :k], self.x[g, k:] = 0, s - 1
+        self.y[g, :k], self.y[g, k:] = rows[:, 0], rows[:, 1]
+        self.alive[g] = True
+        self.pv[g] = 2
+        self.moved[g] = False
+
+        # objectifs : 1 majeur (centre ±3) + 3 mineurs (centre ±5), cases distinctes
+        obj_x = np.zeros((g.size, 4), dtype=np.int64)
+        obj_y = np.zeros((g.size, 4), dtype=np.int64)
+        c = s // 2
+        for i in range(g.size):
+            taken = set()
+            for j, r in enumerate((3, 5, 5, 5)):
+                lo, hi = max(0, c - r), min(s - 1, c + r)
+                while True:
+                    ox, oy = self.rng.integers(lo, hi + 1, size=2)
+                    if (ox, oy) not in taken:
+                        taken.add((ox, oy))
+                        obj_x[i, j], obj_y[i, j] = ox, oy
+                        break
+        self.obj_points[g] = 0
+        self.obj_points[g[:, None], obj_y[:, 1:], obj_x[:, 1:]] = 1
+        self.obj_points[g, obj_y[:, 0], obj_x[:, 0]] = 3
+        ax = np.arange(s)
+        dist = (np.abs(ax[None, None, None, :] - obj_x[:, :, None, None])
+                + np.abs(ax[None, None, :, None] - obj_y[:, :, None, None]))
+        self.obj_dist[g] = dist.min(axis=1)
+
+        self.occ[g] = 0
+        gg = np.repeat(g, 2 * k)
+        np.add.at(self.occ, (gg, np.tile(self.team, g.size), self.y[g].ravel(), self.x[g].ravel()), 1)
+
+        self.scores[g] = 0
+        self.turn[g] = 0
+        self.winner[g] = -1
+
+    # -----------------------
+    # Requêtes vectorisées
+    # -----------------------
+    def _in_bounds(self, x, y):
+        return (x >= 0) & (x < self.size) & (y >= 0) & (y < self.size)
+
+    def _clip(self, v):
+        return np.clip(v, 0, self.size - 1)
+
+    def active(self, slot):
+        """Parties où l'unité `slot` doit jouer (vivante, partie en cours)."""
+        return self.alive[:, slot] & (self.winner < 0)
+
+    def legal_mask(self, slot):
+        """Masque (N, N_ACTIONS) des actions légales, comme ai.choose_action."""
+        g = self.games
+        team = self.team[slot]
+        ux, uy = self.x[:, slot], self.y[:, slot]
+        nx, ny = ux[:, None] + _DX, uy[:, None] + _DY
+        inb = self._in_bounds(nx, ny)
+        cx, cy = self._clip(nx), self._clip(ny)
+        occ_total = self.occ[g[:, None], 0, cy, cx] + self.occ[g[:, None], 1, cy, cx]
+        occ_enemy = self.occ[g[:, None], 1 - team, cy, cx]
+
+        mask = np.empty((self.n, N_ACTIONS), dtype=bool)
+        mask[:, :N_MOVES] = inb[:, :N_MOVES] & (occ_total[:, :N_MOVES] == 0)
+        mask[:, STAY] = True
+        mask[:, N_MOVES:] = inb[:, N_MOVES:] & (occ_enemy[:, N_MOVES:] > 0)
+
+        # gate des attaques en début de partie hors objectif
+        on_obj = self.obj_points[g, uy, ux] > 0
+        gated = (self.turn < ATTACK_GATING_TURNS) & ~on_obj
+        mask[gated, N_MOVES:] = False
+        mask[~self.active(slot)] = False
+        return mask
+
+    def prior(self, slot):
+        """Prior heuristique (N, N_ACTIONS), même formule que ai.choose_action."""
+        g = self.games
+        ux, uy = self.x[:, slot], self.y[:, slot]
+        on_now = self.obj_points[g, uy, ux] > 0
+        prev_dist = self.obj_dist[g, uy, ux]
+
+        nx, ny = self._clip(ux[:, None] + _DX[:N_MOVES]), self._clip(uy[:, None] + _DY[:N_MOVES])
+        entering = self.obj_points[g[:, None], ny, nx] > 0
+        new_dist = self.obj_dist[g[:, None], ny, nx]
+
+        prior = np.zeros((self.n, N_ACTIONS))
+        moves = prior[:, :N_MOVES]
+        moves[:, STAY] += np.where(on_now, OBJ_HOLD / 10.0, -0.1)
+        moves += entering * (OBJ_ENTER / 10.0)
+        moves += (on_now[:, None] & ~entering) * (OBJ_LEAVE / 10.0)
+        moves += (new_dist < prev_dist[:, None]) * (CLOSER_OBJ / 10.0)
+        moves += (new_dist > prev_dist[:, None]) * (FARTHER_OBJ / 10.0)
+        prior[:, N_MOVES:] = np.where(on_now, 0.2, -0.2)[:, None]
+        return prior
+
+    def observe(self, slot):
+        """
+        Caractéristiques de ai.get_state pour l'unité `slot` dans chaque partie :
+        (x, y, on_obj, close_enemies, local_objectives, nearest_enemy_dist).
+        """
+        g = self.games
+        team = self.team[slot]
+        ux, uy = self.x[:, slot], self.y[:, slot]
+        on_obj = (self.obj_points[g, uy, ux] > 0).astype(np.int64)
+
+        wx, wy = ux[:, None] + _WIN_DX, uy[:, None] + _WIN_DY
+        inb = self._in_bounds(wx, wy)
+        cx, cy = self._clip(wx), self._clip(wy)
+        close = (self.occ[g[:, None], 1 - team, cy, cx] * inb).sum(axis=1)
+        local = ((self.obj_points[g[:, None], cy, cx] > 0) & inb).sum(axis=1)
+
+        enemies = self.team != team
+        d = np.abs(self.x[:, enemies] - ux[:, None]) + np.abs(self.y[:, enemies] - uy[:, None])
+        d = np.where(self.alive[:, enemies], d, 99)
+        nearest = d.min(axis=1, initial=99)
+        return ux, uy, on_obj, close, local, nearest
+
+    # -----------------------
+    # Dynamique
+    # -----------------------
+    def _relocate(self, g, slot, nx, ny):
+        """Déplace les unités `slot` (tableau, une par partie de `g`) en tenant occ à jour."""
+        team = self.team[slot]
+        np.subtract.at(self.occ, (g, team, self.y[g, slot], self.x[g, slot]), 1)
+        np.add.at(self.occ, (g, team, ny, nx), 1)
+        self.x[g, slot] = nx
+        self.y[g, slot] = ny
+        self.moved[g, slot] = True
+
+    def step(self, slot, actions):
+        """
+        Applique l'action de l'unité `slot` dans chaque partie active.
+        Les actions illégales sont ignorées (comme dans ai_turn_reward_based).
+        Renvoie les rewards (N,), 0 pour les parties inactives.
+        """
+        rewards = np.zeros(self.n)
+        g = np.flatnonzero(self.active(slot))
+        if g.size == 0:
+            return rewards
+        team, enemy = self.team[slot], 1 - self.team[slot]
+        a = np.asarray(actions)[g]
+        ux, uy = self.x[g, slot], self.y[g, slot]
+        dx, dy = _DX[a], _DY[a]
+        tx, ty = ux + dx, uy + dy
+        inb = self._in_bounds(tx, ty)
+        cx, cy = self._clip(tx), self._clip(ty)
+
+        prev_on = self.obj_points[g, uy, ux] > 0
+        prev_dist = self.obj_dist[g, uy, ux]
+        r = np.zeros(g.size)
+
+        # ---- RESTER ----
+        stay = a == STAY
+        r[stay] += np.where(prev_on[stay], OBJ_HOLD, -0.2)
+
+        # ---- DEPLACEMENT ----
+        free = (self.occ[g, 0, cy, cx] + self.occ[g, 1, cy, cx]) == 0
+        mv = (a < N_MOVES) & ~stay & inb & free
+        entering = self.obj_points[g, cy, cx] > 0
+        r += (mv & entering) * OBJ_ENTER
+        r += (mv & prev_on & ~entering) * OBJ_LEAVE
+        self._relocate(g[mv], slot, tx[mv], ty[mv])
+
+        # ---- ATTAQUE ----
+        att = (a >= N_MOVES) & inb & (self.occ[g, enemy, cy, cx] > 0)
+        if att.any():
+            ga, ia = g[att], np.flatnonzero(att)
+            tax, tay = tx[att], ty[att]
+            # cible = première unité ennemie vivante de la liste sur la case visée
+            enemy_slots = np.flatnonzero(self.team == enemy)
+            hit = (self.alive[ga][:, enemy_slots]
+                   & (self.x[ga][:, enemy_slots] == tax[:, None])
+                   & (self.y[ga][:, enemy_slots] == tay[:, None]))
+            target = enemy_slots[hit.argmax(axis=1)]
+            # (la branche pv/attacked_this_turn de Unit.attack n'est jamais
+            #  active : attacked_this_turn n'est jamais mis à True)
+            px, py = tax + dx[att], tay + dy[att]
+            kill = ~self._in_bounds(px, py)
+            kill |= self.occ[ga, team, self._clip(py), self._clip(px)] > 0
+
+            gk, tk = ga[kill], target[kill]
+            np.subtract.at(self.occ, (gk, enemy, self.y[gk, tk], self.x[gk, tk]), 1)
+            self.alive[gk, tk] = False
+            r[ia[kill]] += KILL_REWARD
+
+            push = ~kill
+            for t in np.unique(target[push]):
+                sel = push & (target == t)
+                self._relocate(ga[sel], t, px[sel], py[sel])
+            self._relocate(ga, slot, tax, tay)
+
+            now_on = self.obj_points[ga, tay, tax] > 0
+            r[ia] += (prev_on[att] & ~now_on) * OBJ_LEAVE
+
+        # ---- communs : fin sur objectif, shaping distance, pénalité de temps ----
+        ux, uy = self.x[g, slot], self.y[g, slot]
+        r += (self.obj_points[g, uy, ux] > 0) * OBJ_STAY
+        new_dist = self.obj_dist[g, uy, ux]
+        r += (new_dist < prev_dist) * CLOSER_OBJ
+        r += (new_dist > prev_dist) * FARTHER_OBJ
+        over = self.turn[g] - TURN_PENALTY_START
+        extra = np.minimum(MAX_TIME_PENALTY, TIME_PENALTY_PER_ACTION * (1 + TIME_PENALTY_GROWTH * over))
+        r -= np.where(over >= 0, extra, 0.0)
+
+        rewards[g] = r
+        return rewards
+
+    def end_half_turn(self):
+        """Scores (calculate_scores), reset des flags, victoire après le tour rouge."""
+        running = self.winner < 0
+        blue = self.occ[:, BLUE] > 0
+        red = self.occ[:, RED] > 0
+        pts = self.obj_points
+        self.scores[running, BLUE] += (pts * blue).sum(axis=(1, 2))[running]
+        self.scores[running, RED] += (pts * (~blue & red)).sum(axis=(1, 2))[running]
+        self.moved[:] = False
+        self.turn[running] += 1
+
+        # victoire évaluée après chaque tour complet (bleu puis rouge)
+        check = running & (self.turn % 2 == 0)
+        blue_alive = self.alive[:, self.team == BLUE].any(axis=1)
+        red_alive = self.alive[:, self.team == RED].any(axis=1)
+        for cond, who in (
+            (self.scores[:, BLUE] >= VICTORY_SCORE, BLUE),
+            (self.scores[:, RED] >= VICTORY_SCORE, RED),
+            (~blue_alive, RED),
+            (~red_alive, BLUE),
+        ):
+            hit = check & cond & (self.winner < 0)
+            self.winner[hit] = who
+
+    def play_half_turn(self, team, policy):
+        """
+        Fait jouer toutes les unités de `team`, slot par slot.
+        policy(env, slot, mask) -> actions (N,)
+        Renvoie la somme des rewards par partie.
+        """
+        total = np.zeros(self.n)
+        for slot in np.flatnonzero(self.team == team):
+            mask = self.legal_mask(slot)
+            total += self.step(slot, policy(self, slot, mask))
+        self.end_half_turn()
+        return total
+
+    def run(self, policy, n_turns):
+        """Joue n_turns tours complets ; les parties finies sont relancées."""
+        finished = 0
+        for _ in range(n_turns):
+            self.play_half_turn(BLUE, policy)
+            self.play_half_turn(RED, policy)
+            done = np.flatnonzero(self.winner >= 0)
+            finished += done.size
+            self.reset(done)
+        return finished
+
+
+def masked_argmax(scores, mask, rng):
+    """Argmax par ligne restreint au masque, égalités départagées au hasard."""
+    noise = rng.random(scores.shape) * 1e-9
+    return np.where(mask, scores + noise, -np.inf).argmax(axis=1)
+
+def prior_policy(eps=0.1):
+    """Politique ε-greedy sur PRIOR_BETA * prior (sans Q-table)."""
+    def policy(env, slot, mask):
+        greedy = masked_argmax(PRIOR_BETA * env.prior(slot), mask, env.rng)
+        explore = masked_argmax(np.zeros(mask.shape), mask, env.rng)
+        return np.where(env.rng.random(env.n) < eps, explore, greedy)
+    return policy
+
+
+# -----------------------
+# Benchmark : demi-tours / seconde
+# -----------------------
+if __name__ == "__main__":
+    import random
+    import ai
+    import engine
+    from qtable import QTable
+
+    n_games, n_turns = 512, 100
+    env = BatchedEnv(n_games, seed=0)
+    t0 = time.perf_counter()
+    env.run(prior_policy(), n_turns)
+    batched = 2 * n_turns * n_games / (time.perf_counter() - t0)
+
+    random.seed(0)
+    Q = QTable()
+    half_turns = 0
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < 3.0:
+        result = engine.play_game(
+            lambda u, o, m, team, tc: ai.ai_turn_reward_based(u, o, m, team, Q, turn_count=tc))
+        half_turns += result["turns"]
+    serial = half_turns / (time.perf_counter() - t0)
+
+    print(f"engine.play_game : {serial:10.0f} demi-tours/s")
+    print(f"BatchedEnv({n_games}) : {batched:10.0f} demi-tours/s  (x{batched / serial:.1f})")
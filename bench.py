@@ -0,0 +1,357 @@
+# bench.py — benchmarks reproductibles (graines fixes) de la simulation et de l'apprentissage
+#
+#   python bench.py                          # suite complète -> bench_results.json
+#   python bench.py --quick --out new.json   # version courte
+#   python bench.py --compare baseline.json  # compare au fichier de référence
+#
+# Métriques (clés "section.nom") :
+#   loop.*     : boucle de simulate_auto_game avec data/q_table.json
+#                (parties/s, demi-tours/s)
+#   ff.*       : même boucle sans (off) puis avec (on) l'avance rapide :
+#                temps total, demi-tours/s (sautés compris), % de demi-tours sautés
+#   growth.*   : croissance de la Q-table (états, ko) pour 100 parties
+#   call.*     : µs par appel de choose_action, get_state, update_q,
+#                find_path, calculate_scores
+#   io.*       : chargement / sauvegarde de data/q_table.json (et .qtb)
+#   scale.*    : taille du plateau (sous-processus, JEU_BOARD_SIZE),
+#                unités par camp, taille de la Q-table
+#
+#   python bench.py --learning 60            # apprentissage : % de victoires / temps
+# Compare, à temps d'entraînement égal (depuis une Q-table vide), les mises à
+# jour en ligne (update_q), le rejeu d'expérience (experience.py, uniforme
+# et par priorité), les mises à jour multi-pas (ai.UnitTraces : n-step,
+# Q(λ) de Watkins) et l'exploration par visites (exploration.py : decay,
+# ucb) : % de victoires de bleu (Q entraînée, non modifiée
+# pendant l'évaluation) contre rouge (Q-table vide : prior heuristique seul).
+# Sens : *_per_sec plus grand = mieux ; *_us / *_ms plus petit = mieux ;
+# le reste est informatif.
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from config import *
+from ai import (UnitTraces, ai_turn_reward_based, choose_action, get_state, make_fast_forward, update_q)
+from exploration import Explorer
+from engine import add_objectives, calculate_scores, generate_map, generate_units, play_game
+from experience import ReplayBuffer
+from pathfinding import find_path
+from qtable import QTable, pack_state
+from replay import new_game
+
+QTABLE_JSON = os.path.join("data", "q_table.json")
+REGRESSION_THRESHOLD = 0.10  # 10 %
+
+# -----------------------
+# Boucle de partie
+# -----------------------
+def bench_loop(n_games, seed=0, units_per_side=5, Q=None, fast_forward=True):
+    """
+    Même boucle que simulate_auto_game (sans fichiers) : parties/s, demi-tours/s, croissance de Q.
+    fast_forward=False : sans avance rapide, même si FAST_FORWARD est actif.
+    """
+    random.seed(seed)
+    Q = Q if Q is not None else QTable.load_json(QTABLE_JSON)
+    states0, bytes0 = len(Q), Q.nbytes
+    reward_stats = {}
+
+    def turn_fn(units, objectives, game_map, team, turn_count):
+        return ai_turn_reward_based(units, objectives, game_map, team, Q, turn_count=turn_count,
+                                    reward_stats=reward_stats, log=False)
+
+    ff = make_fast_forward(Q, reward_stats=reward_stats) if fast_forward else None
+    skipped = 0
+
+    def ff_fn(units, objectives, turn_count, n_turns):
+        nonlocal skipped
+        done, reward, log = ff(units, objectives, turn_count, n_turns)
+        skipped += 2 * done
+        return done, reward, log
+
+    half_turns = 0
+    t0 = time.perf_counter()
+    for _ in range(n_games):
+        reward_stats.clear()
+        half_turns += play_game(turn_fn, units=generate_units(units_per_side=units_per_side),
+                                fast_forward=ff_fn if ff is not None else None)["turns"]
+    elapsed = time.perf_counter() - t0
+    return {
+        "games_per_sec": n_games / elapsed,
+        "half_turns_per_sec": half_turns / elapsed,
+        "half_turns": half_turns,
+        "skipped_half_turns": skipped,
+        "wall_ms": 1e3 * elapsed,
+        "q_states_per_100_games": 100 * (len(Q) - states0) / n_games,
+        "q_kb_per_100_games": 100 * (Q.nbytes - bytes0) / n_games / 1e3,
+    }
+
+# -----------------------
+# Micro-benchmarks
+# -----------------------
+def _per_call_us(fn, args_list, repeat, rounds=5):
+    """µs par appel, meilleur de `rounds` mesures (moins sensible au bruit)."""
+    best = float("inf")
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            for args in args_list:
+                fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return 1e6 * best / (repeat * len(args_list))
+
+def bench_calls(seed=0, repeat=200, Q=None):
+    random.seed(seed)
+    Q = Q if Q is not None else QTable.load_json(QTABLE_JSON)
+    grid = generate_map()
+    units = generate_units()
+    objectives = add_objectives()
+    states = [get_state(u, objectives, units) for u in units]
+
+    rng = random.Random(seed)
+    paths = [((rng.randrange(size), rng.randrange(size)), (rng.randrange(size), rng.randrange(size)), grid)
+             for _ in range(20)]
+    return {
+        "get_state_us": _per_call_us(get_state, [(u, objectives, units) for u in units], repeat),
+        "choose_action_us": _per_call_us(
+            lambda s, u: choose_action(s, u, units, Q, eps=0.1, objectives=objectives, grid=grid, turn_count=20),
+            list(zip(states, units)), repeat),
+        "update_q_us": _per_call_us(lambda s: update_q(s, 4, 1.0, s, Q), [(s,) for s in states], repeat),
+        "find_path_us": _per_call_us(find_path, paths, max(1, repeat // 10)),
+        "calculate_scores_us": _per_call_us(calculate_scores, [(units, objectives)], repeat * 10),
+    }
+
+# -----------------------
+# Chargement / sauvegarde
+# -----------------------
+def _timed_ms(fn, rounds=3):
+    """(résultat, meilleur temps en ms sur `rounds` exécutions)."""
+    best = float("inf")
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return result, 1e3 * best
+
+def bench_io():
+    Q, load_ms = _timed_ms(lambda: QTable.load_json(QTABLE_JSON))
+    with tempfile.TemporaryDirectory() as tmp:
+        json_file, binary_file = os.path.join(tmp, "q.json"), os.path.join(tmp, "q.qtb")
+        _, save_ms = _timed_ms(lambda: Q.save_json(json_file))
+        _, save_binary_ms = _timed_ms(lambda: Q.save_binary(binary_file))
+        _, open_binary_ms = _timed_ms(lambda: QTable.open_binary(binary_file))
+        return {
+            "q_states": len(Q),
+            "json_load_ms": load_ms,
+            "json_save_ms": save_ms,
+            "qtb_save_ms": save_binary_ms,
+            "qtb_open_ms": open_binary_ms,
+            "json_kb": os.path.getsize(json_file) / 1e3,
+            "qtb_kb": os.path.getsize(binary_file) / 1e3,
+        }
+
+# -----------------------
+# Passage à l'échelle
+# -----------------------
+def _random_qtable(n_states, seed=0):
+    rng = np.random.default_rng(seed)
+    Q = QTable(capacity=n_states)
+    for x, y, on, close, local, dist in zip(*(rng.integers(0, hi, n_states) for hi in (size, size, 2, 10, 5, 40))):
+        r = Q.row(pack_state(x, y, on, close, local, dist))
+        Q.values[r, :5] = rng.normal(size=5)
+        Q.known[r, :5] = True
+    return Q
+
+def bench_board_size(board_size, n_games, seed=0):
+    """Lance la boucle dans un sous-processus avec JEU_BOARD_SIZE (size est lu à l'import)."""
+    env = dict(os.environ, JEU_BOARD_SIZE=str(board_size))
+    out = subprocess.run([sys.executable, __file__, "--child-loop", str(n_games), "--seed", str(seed)],
+                         env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(out)
+
+def bench_scaling(n_games, seed=0, quick=False):
+    results = {}
+    for board_size in ((12, 32) if quick else (12, 32, 48)):
+        loop = bench_board_size(board_size, n_games, seed)
+        results[f"board_{board_size}_half_turns_per_sec"] = loop["half_turns_per_sec"]
+        results[f"board_{board_size}_games_per_sec"] = loop["games_per_sec"]
+    for units_per_side in ((2, 10) if quick else (2, 10, 20)):
+        loop = bench_loop(n_games, seed, units_per_side=units_per_side, Q=QTable())
+        results[f"units_{units_per_side}_half_turns_per_sec"] = loop["half_turns_per_sec"]
+    for n_states in ((1_000, 100_000) if quick else (1_000, 10_000, 100_000, 1_000_000)):
+        calls = bench_calls(seed, repeat=100, Q=_random_qtable(n_states, seed))
+        results[f"q_{n_states}_choose_action_us"] = calls["choose_action_us"]
+        results[f"q_{n_states}_update_q_us"] = calls["update_q_us"]
+    return results
+
+# -----------------------
+# Apprentissage : % de victoires en fonction du temps d'entraînement
+# -----------------------
+class FrozenQ:
+    """Vue de Q en lecture seule : q_values ne crée, ne marque ni ne date aucune ligne."""
+
+    def __init__(self, Q):
+        self.Q = Q
+
+    def q_values(self, state, mask):
+        # valeurs des actions inconnues = 0 : même choix que la ligne marquée
+        return self.Q.peek(state)
+
+    def __getattr__(self, name):
+        return getattr(self.Q, name)
+
+def win_rate(Q, n_games=40, seed=10_000):
+    """% de parties gagnées par bleu (Q, sans écriture) contre rouge (Q-table vide)."""
+    wins = 0
+    blue = FrozenQ(Q) if Q.tabular else Q  # mises à jour notées dans updates=[], jamais appliquées
+    for k in range(n_games):
+        rng, units, objectives = new_game(seed + k)
+        red = QTable()
+
+        def turn_fn(units, objectives, game_map, team, turn_count):
+            return ai_turn_reward_based(units, objectives, game_map, team, blue if team == PLAYER_COLOR else red,
+                                        turn_count=turn_count, log=False, rng=rng, updates=[])
+
+        wins += play_game(turn_fn, units=units, objectives=objectives, rng=rng)["winner"] == "Joueur"
+    return 100 * wins / n_games
+
+LEARNING_MODES = ("online", "replay", "prioritized", "n_step", "watkins", "decay", "ucb")
+
+def bench_learning(seconds, points=5, seed=0, eval_games=40, modes=LEARNING_MODES):
+    """{mode: [(temps d'entraînement s, parties, % victoires), ...]} pour chaque mode de LEARNING_MODES."""
+    results = {}
+    for mode in modes:
+        Q = QTable()
+        buffer = traces = explorer = None
+        if mode in ("replay", "prioritized"):
+            buffer = ReplayBuffer(prioritized=mode == "prioritized", rng=np.random.default_rng(seed))
+        elif mode in ("n_step", "watkins"):
+            traces = UnitTraces(mode)
+        elif mode in ("decay", "ucb"):
+            explorer = Explorer(mode)
+
+        def turn_fn(units, objectives, game_map, team, turn_count):
+            out = ai_turn_reward_based(units, objectives, game_map, team, Q, turn_count=turn_count,
+                                       log=False, rng=rng, updates=buffer, traces=traces,
+                                       explorer=explorer)
+            if buffer is not None:
+                buffer.learn(Q)
+            return out
+
+        ff_fn = make_fast_forward(Q, traces, explorer)
+
+        curve, elapsed, games = [], 0.0, 0
+        for p in range(1, points + 1):
+            while elapsed < seconds * p / points:
+                rng, units, objectives = new_game(seed + games)
+                t0 = time.perf_counter()
+                play_game(turn_fn, units=units, objectives=objectives, rng=rng,
+                          fast_forward=ff_fn)
+                if traces is not None:
+                    traces.finish(Q)
+                elapsed += time.perf_counter() - t0
+                games += 1
+            curve.append((elapsed, games, win_rate(Q, eval_games)))
+            print(f"{mode:<12} {elapsed:>7.1f} s {games:>6} parties {curve[-1][2]:>6.1f} % victoires", flush=True)
+        results[mode] = curve
+    return results
+
+# -----------------------
+# Suite, fichier de résultats, comparaison
+# -----------------------
+def bench_fast_forward(n_games, seed=0):
+    """Boucle de partie sans puis avec l'avance rapide (FAST_FORWARD), mêmes graines, table livrée."""
+    results = {}
+    for name, enabled in (("off", False), ("on", True)):
+        loop = bench_loop(n_games, seed, fast_forward=enabled)
+        results[f"{name}_wall_ms"] = loop["wall_ms"]
+        results[f"{name}_half_turns_per_sec"] = loop["half_turns_per_sec"]
+        results[f"{name}_half_turns"] = loop["half_turns"]
+    results["on_skipped_pct"] = 100 * loop["skipped_half_turns"] / max(1, loop["half_turns"])
+    return results
+
+def run_suite(quick=False, seed=0):
+    n_games = 5 if quick else 20
+    results = {}
+    sections = (
+        ("loop", lambda: {k: v for k, v in bench_loop(n_games, seed).items()
+                          if k in ("games_per_sec", "half_turns_per_sec", "half_turns")}),
+        ("ff", lambda: bench_fast_forward(n_games, seed)),
+        # croissance mesurée depuis une table vide (la table livrée couvre déjà les états courants)
+        ("growth", lambda: {k: v for k, v in bench_loop(n_games, seed, Q=QTable()).items() if k.startswith("q_")}),
+        ("call", lambda: bench_calls(seed)),
+        ("io", bench_io),
+        ("scale", lambda: bench_scaling(max(5, n_games // 2), seed, quick)),
+    )
+    for name, fn in sections:
+        for key, value in fn().items():
+            results[f"{name}.{key}"] = value
+    return results
+
+def direction(key):
+    """+1 : plus grand = mieux, -1 : plus petit = mieux, 0 : informatif."""
+    if key.endswith("_per_sec"):
+        return 1
+    if key.endswith("_us") or key.endswith("_ms"):
+        return -1
+    return 0
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """Affiche les écarts avec la référence ; renvoie la liste des régressions."""
+    regressions = []
+    print(f"{'métrique':<44} {'référence':>12} {'actuel':>12} {'écart':>8}")
+    for key, value in results.items():
+        ref = baseline.get(key)
+        if ref is None or ref == 0:
+            print(f"{key:<44} {'-':>12} {value:>12.3f}")
+            continue
+        change = (value - ref) / abs(ref)
+        flag = ""
+        if direction(key) * change < -threshold:
+            flag = "  <-- régression"
+            regressions.append(key)
+        print(f"{key:<44} {ref:>12.3f} {value:>12.3f} {100 * change:>+7.1f}%{flag}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks reproductibles")
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--compare", metavar="BASELINE")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--learning", type=float, metavar="SECONDES",
+                        help="compare les modes d'apprentissage (%% de victoires / temps)")
+    parser.add_argument("--modes", nargs="+", choices=LEARNING_MODES, default=LEARNING_MODES)
+    parser.add_argument("--child-loop", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.learning:
+        bench_learning(args.learning, seed=args.seed, modes=args.modes)
+        raise SystemExit
+
+    if args.child_loop:
+        print(json.dumps(bench_loop(args.child_loop, args.seed, Q=QTable())))
+        raise SystemExit
+
+    results = run_suite(args.quick, args.seed)
+    results["meta.board_size"] = size
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f"Résultats écrits dans {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+    else:
+        for key, value in results.items():
+            print(f"{key:<44} {value:>12.3f}")
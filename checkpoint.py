@@ -0,0 +1,244 @@
+# checkpoint.py — sauvegarde incrémentale de la Q-table (journal en ajout seul)
+#
+# Un checkpoint = un instantané .qtb (voir qtable.py) + un journal <instantané>.log.
+# Le journal contient des enregistrements de taille fixe, écrits à la fin :
+#   ligne   : clé d'état int64, masque known uint16, valeurs float64[N_ACTIONS]
+#   commit  : clé -1, valeurs[0] = nombre de parties terminées
+# Chaque flush() écrit les lignes modifiées depuis le flush précédent puis un
+# commit, et fsync. À la relecture, seules les lignes suivies d'un commit sont
+# appliquées : un arrêt brutal au milieu d'un flush perd ce flush, pas le reste.
+# Les lignes sont complètes (pas des deltas) : rejouer deux fois est sans effet,
+# ce qui rend la compaction sûre même si elle est interrompue.
+#
+# Coût d'un flush : proportionnel au nombre d'états modifiés, pas à la taille de Q.
+#
+# Frontières de partie : end_game() fige les lignes modifiées par la partie
+# qui vient de finir (copie en mémoire, écrite au flush suivant). Sur une
+# interruption, flush(current=False) n'écrit que ces lignes figées : les
+# mises à jour de la partie interrompue, rejouée à la reprise, ne sont pas
+# journalisées.
+#
+# Explorer (exploration.py) optionnel : ses compteurs sont réécrits en entier
+# dans <instantané>.explorer à chaque flush courant (pas sur une
+# interruption : ils suivent alors le dernier flush périodique) et rechargés
+# (mappés) à la reprise. Il est lié à Q (QTable.link) : ses lignes comptent
+# dans le budget et celles des états évincés sont oubliées avec eux. Un état
+# évincé n'a pas changé depuis la dernière compaction, dont le flush a écrit
+# ses compteurs : il les retrouve dans le fichier.
+#
+# Backend linéaire (linear_q.py, fichiers .npz) : WeightCheckpoint. Les poids
+# font quelques ko, chaque flush réécrit donc simplement tout le fichier
+# (remplacement atomique), sans journal.
+
+import os
+
+import numpy as np
+
+from actions import N_ACTIONS
+from ai import load_qtable
+from linear_q import LinearQ
+
+_MAGIC = b"QLG1"
+_HEADER = _MAGIC + np.uint32(N_ACTIONS).astype("<u4").tobytes()
+_RECORD = np.dtype([("state", "<i8"), ("mask", "<u2"), ("values", "<f8", (N_ACTIONS,))])
+_COMMIT = -1
+
+class Checkpoint:
+    """
+    Q-table adossée à un instantané + journal.
+      Q          : la table (suivi des lignes modifiées activé)
+      games_done : parties terminées au dernier commit (reprise)
+    """
+
+    def __init__(self, snapshot, initial=None, explorer=None):
+        """
+        Ouvre le checkpoint `snapshot` (.qtb) et rejoue son journal.
+        Si aucun checkpoint n'existe, part de la Q-table `initial` (fichier).
+        """
+        self.snapshot = snapshot
+        self.log_filename = snapshot + ".log"
+        self.games_done = 0
+        self.bytes_written = 0
+        self._committed = 0
+        self._staged = []  # (clés, valeurs, masques) figés par end_game
+        self.explorer = explorer
+        self.explorer_filename = snapshot + ".explorer"
+
+        resume = os.path.exists(self.snapshot)
+        self.Q = load_qtable(self.snapshot if resume or initial is None else initial)
+        self.Q.unsaved = set()
+        if resume:
+            self._replay()
+        self.Q.dirty = set()
+        self._log = open(self.log_filename, "r+b" if os.path.exists(self.log_filename) else "w+b")
+        self._truncate_to_last_commit()
+        if resume and explorer is not None and os.path.exists(self.explorer_filename):
+            explorer.restore(self.explorer_filename)
+        if explorer is not None:
+            self.Q.link(explorer)
+        if not resume:
+            self.compact()  # instantané initial : le journal ne contient que des écarts
+
+    # -----------------------
+    # Relecture
+    # -----------------------
+    def _read_records(self):
+        if not os.path.exists(self.log_filename):
+            return np.zeros(0, dtype=_RECORD)
+        with open(self.log_filename, "rb") as f:
+            header = f.read(len(_HEADER))
+            if not header:
+                return np.zeros(0, dtype=_RECORD)
+            if header != _HEADER:
+                raise ValueError(f"{self.log_filename} : journal de Q-table invalide")
+            data = f.read()
+        n = len(data) // _RECORD.itemsize
+        return np.frombuffer(data[:n * _RECORD.itemsize], dtype=_RECORD)
+
+    def _replay(self):
+        records = self._read_records()
+        commits = np.flatnonzero(records["state"] == _COMMIT)
+        start = 0
+        for c in commits:
+            rows = records[start:c]
+            self.Q.import_rows(rows["state"], rows["values"], rows["mask"])
+            self.Q.unsaved.update(rows["state"].tolist())
+            self.games_done = int(records[c]["values"][0])
+            start = c + 1
+        self._committed = int(commits[-1]) + 1 if len(commits) else 0
+
+    def _truncate_to_last_commit(self):
+        """Coupe une fin de journal non validée et se place en fin de fichier."""
+        committed = self._committed
+        self._log.seek(0)
+        if self._log.read(len(_HEADER)) != _HEADER:
+            self._log.seek(0)
+            self._log.write(_HEADER)
+            committed = 0
+        self._log.truncate(len(_HEADER) + committed * _RECORD.itemsize)
+        self._log.seek(0, os.SEEK_END)
+
+    # -----------------------
+    # Écriture
+    # -----------------------
+    def end_game(self):
+        """Fin de partie : fige les lignes modifiées, écrites au prochain flush."""
+        if self.Q.dirty:
+            keys, values, masks = self.Q.export_rows(sorted(self.Q.dirty))
+            self.Q.dirty.clear()
+            self.Q.unsaved.update(keys.tolist())  # pas d'éviction avant l'écriture
+            self._staged.append((keys, values, masks))
+
+    def flush(self, games_done=None, current=True):
+        """
+        Ajoute au journal les lignes figées par end_game et, si `current`, les
+        lignes modifiées depuis (dirty), puis un commit (games_done parties
+        terminées). current=False : partie interrompue, ses lignes ne sont pas
+        écrites. Renvoie le nombre d'octets écrits.
+        """
+        if games_done is not None:
+            self.games_done = games_done
+        if current:
+            self.end_game()
+        staged, self._staged = self._staged, []
+
+        records = np.zeros(sum(len(keys) for keys, _, _ in staged) + 1, dtype=_RECORD)
+        if staged:
+            records["state"][:-1] = np.concatenate([keys for keys, _, _ in staged])
+            records["values"][:-1] = np.concatenate([values for _, values, _ in staged])
+            records["mask"][:-1] = np.concatenate([masks for _, _, masks in staged])
+        records["state"][-1] = _COMMIT
+        records["values"][-1, 0] = self.games_done
+
+        data = records.tobytes()
+        self._log.write(data)
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self.bytes_written += len(data)
+        if current and self.explorer is not None:
+            self.bytes_written += self.explorer.save(self.explorer_filename)
+        return len(data)
+
+    def log_size(self):
+        return self._log.tell()
+
+    def compact(self, games_done=None):
+        """
+        Réécrit l'instantané complet, y adosse Q (base) puis vide le journal :
+        les lignes journalisées sont désormais dans base et peuvent être évincées.
+        """
+        self.flush(games_done)
+        self.Q.save_binary(self.snapshot)
+        if not self.Q.maps(self.snapshot):
+            self.Q.rebase(self.snapshot)
+        self.Q.unsaved.clear()
+        self._log.seek(0)
+        self._log.truncate(len(_HEADER))
+        self._log.seek(0, os.SEEK_END)
+        self.flush(current=False)  # commit seul : conserve games_done
+
+    def close(self):
+        self._log.close()
+
+    def remove(self):
+        """Supprime instantané et journal (entraînement terminé)."""
+        self.close()
+        if self.Q.maps(self.snapshot):  # pas de suppression d'un fichier mappé sous Windows
+            self.Q.release_base()
+        for filename in (self.snapshot, self.log_filename, self.explorer_filename):
+            if os.path.exists(filename):
+                os.remove(filename)
+
+class WeightCheckpoint:
+    """Même interface que Checkpoint pour une LinearQ (instantané .npz complet à chaque flush)."""
+
+    def __init__(self, snapshot, initial=None, explorer=None):
+        self.snapshot = snapshot
+        self.games_done = 0
+        self.bytes_written = 0
+        self._staged = None  # poids figés par end_game
+        self.explorer = explorer
+        self.explorer_filename = snapshot + ".explorer"
+        resume = os.path.exists(self.snapshot)
+        self.Q = load_qtable(self.snapshot if resume or initial is None else initial)
+        if resume:
+            with np.load(self.snapshot) as data:
+                if "games_done" in data:
+                    self.games_done = int(data["games_done"])
+            if explorer is not None and os.path.exists(self.explorer_filename):
+                explorer.restore(self.explorer_filename)
+
+    def end_game(self):
+        self._staged = self.Q.weights.copy()
+
+    def flush(self, games_done=None, current=True):
+        if games_done is not None:
+            self.games_done = games_done
+        if current:
+            self.end_game()
+        if self._staged is None:  # aucune partie terminée depuis l'ouverture
+            return 0
+        size = LinearQ(self.Q.encoder, self._staged).save(self.snapshot, games_done=self.games_done)
+        if current and self.explorer is not None:
+            size += self.explorer.save(self.explorer_filename)
+        self.bytes_written += size
+        return size
+
+    compact = flush
+
+    def log_size(self):
+        return 0
+
+    def close(self):
+        pass
+
+    def remove(self):
+        for filename in (self.snapshot, self.explorer_filename):
+            if os.path.exists(filename):
+                os.remove(filename)
+
+def open_checkpoint(snapshot, initial=None, explorer=None):
+    """Checkpoint adapté au format de `snapshot` (.qtb : Q-table, .npz : poids)."""
+    if snapshot.endswith(".npz"):
+        return WeightCheckpoint(snapshot, initial, explorer)
+    return Checkpoint(snapshot, initial, explorer)
@@ -1,10 +1,15 @@
 # config.py
 
+import os as _os
+
 tile_size = 30
-size = 20
+size = int(_os.environ.get("JEU_BOARD_SIZE", 20))  # surcharge : benchmarks de passage à l'échelle
 width, height = size * tile_size, size * tile_size
 interface_height = 100
 
+# Score à atteindre pour gagner une partie
+VICTORY_SCORE = 500
+
 # --- Rewards orientés objectifs ---
 OBJ_ENTER = 12.0     # bonus : entrer sur un objectif
 OBJ_HOLD  = 6.0      # bonus : rester (action (0,0)) sur un objectif
@@ -29,6 +34,57 @@ TIME_PENALTY_PER_ACTION = 0.5
 TIME_PENALTY_GROWTH = 0.02
 MAX_TIME_PENALTY = 2.0
 
+# Avance rapide des fins de partie où les unités qui peuvent changer le contrôle
+# des objectifs tiennent leur case (STAY glouton) : scores et mises à jour de Q
+# calculés sans rejouer les tours (bonus UCB et visites d'EXPLORATION compris) ;
+# les unités trop loin pour rien changer attendent sur place
+FAST_FORWARD = True
+
+# Encodage de l'état pour la Q-table (voir encoders.py) :
+#   "absolute" : coordonnées absolues (data/q_table.qtb, construite au premier
+#                chargement depuis data/q_table.json)
+#   "relative" : repère canonique invariant par translation et symétrie, partagé
+#                par les deux camps ; Q-table à part (data/q_table_relative.qtb)
+STATE_ENCODER = "absolute"
+
+# Valeurs apprises (voir linear_q.py) :
+#   "table"  : Q-table, une ligne par état rencontré (data/q_table*.qtb)
+#   "linear" : Q approchée linéairement sur les caractéristiques de l'encodeur,
+#              quelques ko quel que soit le nombre d'états (data/q_linear*.npz)
+VALUE_BACKEND = "table"
+
+# Budget mémoire de la Q-table pendant l'entraînement (voir qtable.py) : au-delà,
+# les états froids sont évincés entre deux parties (None : pas de limite)
+QTABLE_MEMORY_MB = None
+QTABLE_EVICTION = "lru"  # "lru" : moins récemment utilisés, "lfu" : moins visités
+
+# Mises à jour de Q pendant l'entraînement (voir ai.UnitTraces) :
+#   "one_step" : Q-learning à un pas (update_q)
+#   "watkins"  : Q(λ) de Watkins, traces coupées par une action non gloutonne pour Q
+#   "watkins"  : Q(λ) de Watkins, traces coupées par une action exploratoire
+Q_UPDATE = "one_step"
+N_STEP = 4
+TRACE_LAMBDA = 0.8
+TRACE_MIN = 0.01        # trace supprimée sous ce seuil
+TRACE_MAX_LEN = 32      # entrées de trace au plus par unité
+
+# Exploration pendant l'entraînement (voir exploration.py) :
+#   "fixed" : ε = 0.1 (0.02 sur objectif) quel que soit l'état
+#   "decay" : ε de chaque état décroît avec ses visites (demi-valeur à EPS_DECAY_VISITS)
+#   "ucb"   : ε = EPS_MIN et bonus UCB_C * sqrt(ln n(s) / n(s, a)) ajouté à Q + prior
+EXPLORATION = "fixed"
+EPS_MIN = 0.01
+EPS_DECAY_VISITS = 20
+UCB_C = 1.0
+
+# Profilage (voir profiling.py ; aussi JEU_PROFILE=1 / JEU_CPROFILE_EVERY=N)
+PROFILE = False
+PROFILE_CPROFILE_EVERY = 0  # 0 : pas de cProfile
+
+# Client pygame (jeu.py) : rendu seulement quand l'état change, au plus MAX_FPS images/s
+MAX_FPS = 60
+SHOW_FPS = False  # images/s et durée d'une image en haut à droite du plateau
+
 
 PASSABLE_COLOR = (200, 200, 200)
 PLAYER_COLOR = (0, 0, 255)
@@ -0,0 +1,163 @@
+# encoders.py — encodage de l'état d'une unité en clé de Q-table
+#
+# Un encodeur fournit :
+#   encode(unit, objectives, units) -> clé entière de la Q-table
+#   action_map(unit)                -> None si les actions de Q sont celles du
+#                                      plateau, sinon permutation involutive p :
+#                                      action de Q c <-> action du plateau p[c]
+#   suffix                          -> suffixe des fichiers de Q-table associés
+#   features(key)                   -> vecteur de N_FEATURES caractéristiques
+#                                      (0/1) décodé de la clé, pour les
+#                                      approximateurs (linear_q.py)
+#
+# "absolute" : encodage historique (x, y, on_obj, close, local, dist), voir
+#              qtable.pack_state. La table grandit avec la surface du plateau.
+# "relative" : repère canonique, invariant par translation et par symétrie :
+#              rouge est vu dans le repère de bleu (miroir gauche/droite, actions
+#              comprises), les coordonnées absolues sont remplacées par la
+#              direction et la distance (bornée) à l'objectif et à l'ennemi les
+#              plus proches, plus l'occupation du carré 3x3 (ennemis, alliés,
+#              objectifs). Le nombre d'états ne dépend plus de `size` et les
+#              deux camps partagent ce qu'ils apprennent.
+#
+# Choix dans config.py : STATE_ENCODER = "absolute" | "relative".
+
+import numpy as np
+
+from config import *
+from actions import ACTION_DELTAS, ATTACK_DELTAS, MOVE_DELTAS, N_ACTIONS, N_MOVES
+from qtable import pack_state, unpack_state
+
+def _mirror_x():
+    """Permutation des actions par symétrie gauche/droite (dx -> -dx)."""
+    perm = np.empty(N_ACTIONS, dtype=np.intp)
+    for a, (dx, dy) in enumerate(ACTION_DELTAS):
+        if a < N_MOVES:
+            perm[a] = MOVE_DELTAS.index((-dx, dy))
+        else:
+            perm[a] = N_MOVES + ATTACK_DELTAS.index((-dx, dy))
+    return perm
+
+MIRROR_X = _mirror_x()
+
+def _sign(v):
+    return (v > 0) - (v < 0)
+
+DIST_EDGES = (0, 1, 2, 4, 8)  # tranches de distance : 0, 1, 2, 3-4, 5-8, 9+
+
+def _bucket(d, edges=DIST_EDGES):
+    return sum(d > e for e in edges)
+
+def _one_hot(phi, pos, i):
+    phi[pos + i] = 1.0
+
+class AbsoluteEncoder:
+    name = "absolute"
+    suffix = ""
+    # biais, on_obj, ennemis 3x3 (0..4+), objectifs 3x3 (0..3+), dist. ennemi, x et y en 5 bandes
+    N_FEATURES = 1 + 1 + 5 + 4 + 6 + 5 + 5
+
+    def action_map(self, unit):
+        return None
+
+    def features(self, key):
+        x, y, on, close, local, dist = unpack_state(key)
+        phi = np.zeros(self.N_FEATURES)
+        phi[0], phi[1] = 1.0, on
+        _one_hot(phi, 2, min(close, 4))
+        _one_hot(phi, 7, min(local, 3))
+        _one_hot(phi, 11, _bucket(dist))
+        _one_hot(phi, 17, min(5 * x // size, 4))
+        _one_hot(phi, 22, min(5 * y // size, 4))
+        return phi
+
+    def encode(self, unit, objectives, units):
+        """(x, y, on_obj, close_enemies, local_objectives, nearest_enemy_dist) -> qtable.pack_state."""
+        on_objective = objectives.on(unit.x, unit.y)
+        close_enemies = units.count_enemies_around(unit.x, unit.y, unit.color)
+        local_objectives = objectives.local[unit.y][unit.x]
+        enemies = [u for color, team in units.teams.items() if color != unit.color for u in team]
+        nearest_enemy_dist = min(
+            [abs(u.x - unit.x) + abs(u.y - unit.y) for u in enemies],
+            default=99
+        )
+        return pack_state(unit.x, unit.y, on_objective, close_enemies, local_objectives, nearest_enemy_dist)
+
+class RelativeEncoder:
+    """
+    Clé (bits) : alliés 3x3 4 | on_obj 1 | dir. objectif 2+2 | dist. objectif 4 |
+                 dir. ennemi 2+2 | dist. ennemi 4 | ennemis 3x3 4 | objectifs 3x3 4,
+    plus le bit TAG, qui sépare ces clés de celles de AbsoluteEncoder.
+    Directions : signe de dx (dans le repère de bleu) et de dy ; distances
+    bornées à HORIZON, HORIZON + 1 = aucun ennemi.
+    """
+
+    name = "relative"
+    suffix = "_relative"
+    TAG = 1 << 40
+    HORIZON = 14
+    # biais, on_obj, dir. objectif (9), dist. objectif, dir. ennemi (9), dist. ennemi (+ aucun),
+    # ennemis 3x3 (0..4+), objectifs 3x3 (0..3+), alliés 3x3 (0..3+)
+    N_FEATURES = 1 + 1 + 9 + 6 + 9 + 7 + 5 + 4 + 4
+
+    def action_map(self, unit):
+        return MIRROR_X if unit.color == ENEMY_COLOR else None
+
+    def features(self, key):
+        phi = np.zeros(self.N_FEATURES)
+        phi[0], phi[1] = 1.0, (key >> 24) & 1
+        _one_hot(phi, 2, 3 * ((key >> 20) & 3) + ((key >> 22) & 3))
+        _one_hot(phi, 11, _bucket((key >> 16) & 0xF))
+        _one_hot(phi, 17, 3 * ((key >> 12) & 3) + ((key >> 14) & 3))
+        edist = (key >> 8) & 0xF
+        _one_hot(phi, 26, 6 if edist > self.HORIZON else _bucket(edist))
+        _one_hot(phi, 33, min((key >> 4) & 0xF, 4))
+        _one_hot(phi, 38, min(key & 0xF, 3))
+        _one_hot(phi, 42, min((key >> 25) & 0xF, 3))
+        return phi
+
+    def _nearest_objective(self, objectives):
+        """Table [y][x] -> (x, y) de l'objectif le plus proche (premier de la liste en cas d'égalité)."""
+        nearest = objectives.tables.get("nearest")
+        if nearest is None:
+            n = objectives.size
+            nearest = [[min(((abs(o['x'] - x) + abs(o['y'] - y), o['x'], o['y']) for o in objectives),
+                            key=lambda t: t[0], default=(0, x, y))[1:]
+                        for x in range(n)] for y in range(n)]
+            objectives.tables["nearest"] = nearest
+        return nearest
+
+    def encode(self, unit, objectives, units):
+        flip = -1 if unit.color == ENEMY_COLOR else 1
+        h = self.HORIZON
+        x, y = unit.x, unit.y
+
+        ox, oy = self._nearest_objective(objectives)[y][x]
+        odx, ody = _sign(ox - x) * flip, _sign(oy - y)
+        odist = min(objectives.dist[y][x], h)
+
+        # ennemi le plus proche : parcours dans l'ordre de la liste (égalités déterministes)
+        edist, ex, ey = h + 1, x, y
+        best = None
+        for u in units:
+            if u.color != unit.color:
+                d = abs(u.x - x) + abs(u.y - y)
+                if best is None or d < best:
+                    best, ex, ey = d, u.x, u.y
+        if best is not None:
+            edist = min(best, h)
+        edx, edy = _sign(ex - x) * flip, _sign(ey - y)
+
+        close = units.count_enemies_around(x, y, unit.color)
+        allies = units.count_allies_around(x, y, unit.color)
+        local = objectives.local[y][x]
+        return (self.TAG | (allies << 25) | (int(objectives.on(x, y)) << 24) | ((odx + 1) << 22) | ((ody + 1) << 20)
+                | (odist << 16) | ((edx + 1) << 14) | ((edy + 1) << 12) | (edist << 8) | (close << 4) | local)
+
+ENCODERS = {"absolute": AbsoluteEncoder, "relative": RelativeEncoder}
+
+def make_encoder(name):
+    try:
+        return ENCODERS[name]()
+    except KeyError:
+        raise ValueError(f"encodeur d'état inconnu : {name!r} (choix : {', '.join(ENCODERS)})") from None
@@ -0,0 +1,483 @@
+# engine.py — moteur de jeu pur Python (aucune dépendance à pygame)
+#
+# Contient les règles (unités, carte, objectifs, scores) et la boucle
+# tour / victoire. jeu.py (client pygame) et auto_game.py (entraînement)
+# ne sont plus que des front-ends au-dessus de ce module.
+# Aucun effet de bord à l'import : ni pygame.init(), ni lecture de Q-table.
+
+import copy
+import random
+from time import perf_counter
+
+from config import *  # size, couleurs, VICTORY_SCORE
+from actions import DX, DY, STAY, is_attack
+from pathfinding import find_path
+import profiling
+
+# -----------------------
+# PLATEAU
+# -----------------------
+class Board(list):
+    """
+    Liste ordonnée des unités + index spatial tenu à jour en place :
+      grid[y][x] : unités présentes sur la case (empilement possible après une poussée)
+      teams      : {couleur: set(unités vivantes)}
+    Unit.move et Board.remove mettent l'index à jour, ce qui rend
+    les requêtes "qui est sur cette case ?" en O(1).
+    """
+
+    def __init__(self, units=(), board_size=size):
+        super().__init__()
+        self.size = board_size
+        self.grid = [[[] for _ in range(board_size)] for _ in range(board_size)]
+        self.teams = {PLAYER_COLOR: set(), ENEMY_COLOR: set()}
+        self.extend(units)
+
+    def append(self, unit):
+        super().append(unit)
+        unit.board = self
+        self.grid[unit.y][unit.x].append(unit)
+        self.teams.setdefault(unit.color, set()).add(unit)
+
+    def extend(self, units):
+        for u in units:
+            self.append(u)
+
+    def remove(self, unit):
+        super().remove(unit)
+        self.grid[unit.y][unit.x].remove(unit)
+        self.teams[unit.color].discard(unit)
+        unit.board = None
+
+    def relocate(self, unit, x, y):
+        """Déplace `unit` dans l'index (avant mise à jour de unit.x / unit.y)."""
+        self.grid[unit.y][unit.x].remove(unit)
+        self.grid[y][x].append(unit)
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.size and 0 <= y < self.size
+
+    def at(self, x, y):
+        """Unités sur la case (x, y) (() hors carte)."""
+        if 0 <= x < self.size and 0 <= y < self.size:
+            return self.grid[y][x]
+        return ()
+
+    def is_free(self, x, y):
+        return 0 <= x < self.size and 0 <= y < self.size and not self.grid[y][x]
+
+    def has_color(self, x, y, color):
+        for u in self.at(x, y):
+            if u.color == color:
+                return True
+        return False
+
+    def has_enemy(self, x, y, color):
+        for u in self.at(x, y):
+            if u.color != color:
+                return True
+        return False
+
+    def count_enemies_around(self, x, y, color):
+        """Nombre d'unités adverses dans le carré 3x3 centré sur (x, y)."""
+        n = 0
+        for row in self.grid[max(0, y - 1):y + 2]:
+            for cell in row[max(0, x - 1):x + 2]:
+                for u in cell:
+                    if u.color != color:
+                        n += 1
+        return n
+
+    def count_allies_around(self, x, y, color):
+        """Nombre d'unités de `color` dans le carré 3x3 centré sur (x, y), case centrale exclue."""
+        n = 0
+        for row in self.grid[max(0, y - 1):y + 2]:
+            for cell in row[max(0, x - 1):x + 2]:
+                for u in cell:
+                    if u.color == color:
+                        n += 1
+        return n - sum(1 for u in self.grid[y][x] if u.color == color)
+
+    def team(self, color):
+        return self.teams.get(color, set())
+
+    def copy(self):
+        """Copie indépendante (unités comprises) ; l'ordre des unités dans chaque case est conservé."""
+        clones = {}
+        for u in self:
+            c = copy.copy(u)
+            c.board = None
+            clones[id(u)] = c
+        board = Board([clones[id(u)] for u in self], self.size)
+        board.grid = [[[clones[id(u)] for u in cell] for cell in row] for row in self.grid]
+        return board
+
+    def signature(self):
+        """
+        Clé hachable de l'état qui détermine la suite de la partie : unités
+        (dans l'ordre de la liste) et ordre des empilements. Deux plateaux de
+        même signature donnent le même résultat aux mêmes actions.
+        """
+        index = {id(u): i for i, u in enumerate(self)}
+        units = tuple((u.x, u.y, u.color, u.pv, u.moved, u.attacked_this_turn) for u in self)
+        stacks = tuple(tuple(index[id(v)] for v in self.grid[u.y][u.x])
+                       for u in self if len(self.grid[u.y][u.x]) > 1)
+        return units, stacks
+
+class Objectives(list):
+    """
+    Liste des objectifs ({'x', 'y', 'type'}) + tables précalculées une fois
+    par partie (les objectifs ne bougent jamais) :
+      points[y][x] : 3 = majeur, 1 = mineur, 0 = pas d'objectif
+      dist[y][x]   : distance de Manhattan au plus proche objectif (0 si aucun)
+      local[y][x]  : nombre d'objectifs dans le carré 3x3 centré sur la case
+      tables       : cache libre pour des tables dérivées (ex. prior de l'IA)
+    """
+
+    def __init__(self, objectives=(), board_size=size):
+        super().__init__(objectives)
+        self.size = board_size
+        self.points = [[0] * board_size for _ in range(board_size)]
+        for obj in self:
+            self.points[obj['y']][obj['x']] = 3 if obj['type'] == 'MAJOR' else 1
+        self.dist = [
+            [min((abs(obj['x'] - x) + abs(obj['y'] - y) for obj in self), default=0)
+             for x in range(board_size)]
+            for y in range(board_size)
+        ]
+        self.local = [
+            [sum(1 for obj in self if abs(obj['x'] - x) <= 1 and abs(obj['y'] - y) <= 1)
+             for x in range(board_size)]
+            for y in range(board_size)
+        ]
+        self.tables = {}
+
+    def on(self, x, y):
+        """True si (x, y) est une case objectif."""
+        return 0 <= x < self.size and 0 <= y < self.size and self.points[y][x] > 0
+
+    def nearest_dist(self, x, y):
+        return self.dist[y][x]
+
+# -----------------------
+# UNITES
+# -----------------------
+class Unit:
+    def __init__(self, x, y, color):
+        self.x = x
+        self.y = y
+        self.color = color
+        self.selected = False
+        self.moved = False  # Indicateur de mouvement pour le tour
+        self.pv = 2  # Points de vie
+        self.attacked_this_turn = False  # Indicateur d'attaque dans ce tour
+        self.board = None  # Board qui indexe l'unité (posé par Board.append)
+
+    def get_symbols_on_same_tile(self, units):
+        if self.board is not None:
+            symbols = [u.get_symbol() for u in self.board.at(self.x, self.y)]
+        else:
+            symbols = [u.get_symbol() for u in units if u.x == self.x and u.y == self.y]
+        return ' '.join(symbols)
+
+    def get_symbol(self):
+        return "U"
+
+    def can_move(self, x, y):
+        # Vérifie si la case (x, y) est dans la carte et adjacente (diagonales comprises)
+        if 0 <= x < size and 0 <= y < size:
+            if abs(self.x - x) <= 1 and abs(self.y - y) <= 1:
+                return True
+        return False
+
+    def move(self, x, y):
+        if self.board is not None:
+            self.board.relocate(self, x, y)
+        self.x = x
+        self.y = y
+        self.moved = True
+
+    def move_towards_goal(self, goal, grid, paths=None, reservations=None):
+        """
+        Avance d'un pas vers goal (A*, voir pathfinding.py).
+          paths        : PathCache optionnel (chemins mémorisés)
+          reservations : ReservationTable optionnelle partagée par les unités
+                         du tour, pour qu'elles ne se percutent pas
+        """
+        start = (self.x, self.y)
+        if reservations is not None:
+            path = reservations.find_path(start, goal, grid)
+        elif paths is not None:
+            path = paths.find_path(start, goal)
+        else:
+            path = find_path(start, goal, grid)
+        if len(path) > 1:
+            self.move(*path[1])
+
+    def attack(self, target_unit, units, objectives):
+        if self.can_move(target_unit.x, target_unit.y):
+            dx = target_unit.x - self.x
+            dy = target_unit.y - self.y
+            old_target_x, old_target_y = target_unit.x, target_unit.y
+            new_x, new_y = target_unit.x + dx, target_unit.y + dy
+
+            if target_unit.attacked_this_turn:
+                target_unit.pv -= 1
+                if target_unit.pv <= 0:
+                    units.remove(target_unit)
+                    # On peut ensuite se déplacer sur la case vacante
+                    self.move(old_target_x, old_target_y)
+                    return
+
+            # Tester si la case pour la cible est hors-limites ou occupée par un adversaire
+            if not units.in_bounds(new_x, new_y) or units.has_enemy(new_x, new_y, target_unit.color):
+                # La cible est "tuée"
+                units.remove(target_unit)
+                # L'attaquant prend sa place
+                self.move(old_target_x, old_target_y)
+            else:
+                target_unit.move(new_x, new_y)
+                self.move(old_target_x, old_target_y)
+
+# -----------------------
+# MAP, OBJECTIFS, SCORES
+# -----------------------
+def generate_map():
+    return [[1 for _ in range(size)] for _ in range(size)]
+
+def generate_units(unit_cls=Unit, units_per_side=5, rng=random):
+    """
+    Renvoie un Board avec units_per_side unités par camp, bleues sur la
+    colonne 0, rouges sur la colonne size-1.
+    `unit_cls` permet au client pygame de fournir sa sous-classe dessinable.
+    `rng` : générateur de la partie (random.Random), module random par défaut.
+    """
+    player_positions = [(0, i) for i in range(size)]
+    enemy_positions = [(size - 1, i) for i in range(size)]
+    player_positions = rng.sample(player_positions, units_per_side)
+    enemy_positions = rng.sample(enemy_positions, units_per_side)
+
+    player_units = [unit_cls(pos[0], pos[1], PLAYER_COLOR) for pos in player_positions]
+    enemy_units = [unit_cls(pos[0], pos[1], ENEMY_COLOR) for pos in enemy_positions]
+
+    return Board(player_units + enemy_units)
+
+def add_objectives(rng=random):
+    objectives = []
+    center_x, center_y = size // 2, size // 2
+
+    # 1 majeur
+    while True:
+        x, y = rng.randint(center_x - 3, center_x + 3), rng.randint(center_y - 3, center_y + 3)
+        if not any(obj['x'] == x and obj['y'] == y for obj in objectives):
+            objectives.append({'x': x, 'y': y, 'type': 'MAJOR'})
+            break
+
+    # 3 mineurs
+    for _ in range(3):
+        while True:
+            x, y = rng.randint(center_x - 5, center_x + 5), rng.randint(center_y - 5, center_y + 5)
+            if not any(obj['x'] == x and obj['y'] == y for obj in objectives):
+                objectives.append({'x': x, 'y': y, 'type': 'MINOR'})
+                break
+
+    return Objectives(objectives)
+
+def calculate_scores(units, objectives):
+    player_score = 0
+    enemy_score = 0
+    for obj in objectives:
+        if units.has_color(obj['x'], obj['y'], PLAYER_COLOR):
+            player_score += 3 if obj['type'] == 'MAJOR' else 1
+        elif units.has_color(obj['x'], obj['y'], ENEMY_COLOR):
+            enemy_score += 3 if obj['type'] == 'MAJOR' else 1
+    return player_score, enemy_score
+
+# -----------------------
+# ACTIONS
+# -----------------------
+def attack_target(unit, action, units):
+    """Unité adverse visée par l'attaque `action`, ou None."""
+    for u in units.at(unit.x + DX[action], unit.y + DY[action]):
+        if u.color != unit.color:
+            return u
+    return None
+
+def apply_action(unit, action, units, objectives):
+    """
+    Applique une action (code actions.Action) selon les règles :
+    attaque de la cible adverse, déplacement si la case est libre, STAY.
+    Partagé par l'IA et le rejeu (replay.py). Renvoie True si l'action a eu un effet.
+    """
+    if is_attack(action):
+        target = attack_target(unit, action, units)
+        if target is None:
+            return False
+        unit.attack(target, units, objectives)
+        return True
+    if action == STAY:
+        return False
+    nx, ny = unit.x + DX[action], unit.y + DY[action]
+    if not units.is_free(nx, ny):
+        return False
+    unit.move(nx, ny)
+    return True
+
+# -----------------------
+# TOURS ET VICTOIRE
+# -----------------------
+def reset_units(units):
+    """Réinitialise les flags des unités pour un nouveau tour."""
+    for u in units:
+        u.moved = False
+        u.attacked_this_turn = False
+        u.idle_turns = getattr(u, "idle_turns", 0) + 1
+
+def check_victory(units, player_score, enemy_score):
+    """Renvoie "Joueur", "Ennemi" ou None si la partie continue."""
+    if player_score >= VICTORY_SCORE:
+        return "Joueur"
+    if enemy_score >= VICTORY_SCORE:
+        return "Ennemi"
+    if not units.team(PLAYER_COLOR):
+        return "Ennemi"
+    if not units.team(ENEMY_COLOR):
+        return "Joueur"
+    return None
+
+def turns_to_victory(player_score, enemy_score, ps, es):
+    """
+    Nombre de tours complets (2 demi-tours) à scores par demi-tour constants
+    (ps, es) avant que check_victory ne déclare un gagnant, ou None si jamais.
+    """
+    turns = []
+    for score, per_half_turn in ((player_score, ps), (enemy_score, es)):
+        if per_half_turn > 0:
+            missing = max(0, VICTORY_SCORE - score)
+            turns.append(max(1, -(-missing // (2 * per_half_turn))))
+    return min(turns) if turns else None
+
+def control_reach(units, objectives):
+    """
+    Pour chaque unité, nombre de tours complets pendant lesquels elle ne peut
+    pas changer le contrôle d'un objectif, les autres restant sur place :
+    entrer sur un objectif libre à d cases (Manhattan) demande d coups,
+    attaquer un occupant adverse au moins d - 1 (diagonales). 0 pour
+    l'occupant d'un objectif, qui le libère en bougeant ; inf si aucun
+    objectif n'est libre ou tenu par l'adversaire.
+    """
+    held_by = {(u.x, u.y): u.color for u in units if objectives.on(u.x, u.y)}
+    reaches = []
+    for unit in units:
+        if (unit.x, unit.y) in held_by:
+            reaches.append(0)
+            continue
+        reach = float("inf")
+        for obj in objectives:
+            d = abs(obj['x'] - unit.x) + abs(obj['y'] - unit.y)
+            color = held_by.get((obj['x'], obj['y']))
+            if color is None:
+                reach = min(reach, d - 1)
+            elif color != unit.color:
+                reach = min(reach, d - 2)
+        reaches.append(reach)
+    return reaches
+
+def play_game(turn_fn, game_map=None, units=None, objectives=None, rng=random, max_turns=None,
+              fast_forward=None, on_half_turn=None):
+    """
+    Joue une partie complète (bleu puis rouge à chaque tour) jusqu'à la victoire.
+
+    turn_fn(units, objectives, game_map, team_color, turn_count) joue un
+    demi-tour pour team_color et renvoie (reward, reward_log).
+    rng       : générateur utilisé pour créer unités et objectifs manquants
+    max_turns : arrêt après ce nombre de demi-tours (winner None si pas fini)
+    fast_forward(units, objectives, turn_count, n_turns) : optionnel. Appelé
+      quand les unités qui peuvent changer le contrôle d'un objectif dès le
+      tour suivant (control_reach nul) n'ont pas bougé pendant le dernier
+      tour complet ; joue d'un coup jusqu'à n_turns tours complets où toutes
+      les unités restent sur place (voir ai.make_fast_forward) et renvoie
+      (tours joués, reward, reward_log).
+      Les scores de ces tours sont ajoutés sans rejouer les demi-tours.
+    on_half_turn(units, objectives, turn_count, player_score, enemy_score) :
+      optionnel, appelé après chaque demi-tour joué (ex. spectator.py).
+
+    Retourne un dict : turns, player_score, enemy_score, winner,
+    total_reward, actions_rewarded.
+    """
+    game_map = game_map if game_map is not None else generate_map()
+    units = units if units is not None else generate_units(rng=rng)
+    objectives = objectives if objectives is not None else add_objectives(rng=rng)
+    if not isinstance(units, Board):
+        units = Board(units)
+    if not isinstance(objectives, Objectives):
+        objectives = Objectives(objectives)
+
+    player_score, enemy_score = 0, 0
+    turn_count = 0
+    total_reward = 0
+    actions_rewarded = []
+    winner = None
+    stopped = False
+    positions = None  # unités à portée des objectifs au début du tour précédent (fast_forward)
+
+    timed = profiling.enabled
+    while winner is None and not stopped:
+        if fast_forward is not None and max_turns is None:
+            near = [u for u in units if objectives.dist[u.y][u.x] <= 2]  # control_reach >= dist - 2
+            now = [(u.x, u.y, u.color) for u, reach in zip(near, control_reach(near, objectives)) if reach <= 0]
+            if now and now == positions:
+                ps, es = calculate_scores(units, objectives)
+                n_turns = turns_to_victory(player_score, enemy_score, ps, es)
+                done = 0
+                if n_turns is not None and n_turns > 1:
+                    done, reward, log = fast_forward(units, objectives, turn_count, n_turns)
+                if done:
+                    total_reward += reward
+                    actions_rewarded.extend(log)
+                    player_score += 2 * done * ps
+                    enemy_score += 2 * done * es
+                    turn_count += 2 * done
+                    for u in units:
+                        u.idle_turns = getattr(u, "idle_turns", 0) + 2 * done
+                    if timed:
+                        profiling.count("ff_half_turns", 2 * done)
+                    winner = check_victory(units, player_score, enemy_score)
+                    if winner is not None:
+                        break
+            positions = now
+        for team in [PLAYER_COLOR, ENEMY_COLOR]:
+            if max_turns is not None and turn_count >= max_turns:
+                stopped = True
+                break
+            if timed:
+                t = perf_counter()
+            reward, log = turn_fn(units, objectives, game_map, team, turn_count)
+            total_reward += reward
+            actions_rewarded.extend(log)
+            if timed:
+                t = profiling.lap("half_turn", t)
+
+            # fin de demi-tour : reset des flags + scores
+            reset_units(units)
+            if timed:
+                t = profiling.lap("reset_units", t)
+            ps, es = calculate_scores(units, objectives)
+            if timed:
+                profiling.lap("calculate_scores", t)
+            player_score += ps
+            enemy_score += es
+            turn_count += 1
+            if on_half_turn is not None:
+                on_half_turn(units, objectives, turn_count, player_score, enemy_score)
+        if not stopped:
+            winner = check_victory(units, player_score, enemy_score)
+
+    return {
+        "turns": turn_count,
+        "player_score": player_score,
+        "enemy_score": enemy_score,
+        "winner": winner,
+        "total_reward": total_reward,
+        "actions_rewarded": actions_rewarded,
+    }
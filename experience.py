@@ -0,0 +1,145 @@
+# experience.py — mémoire d'expérience : rejeu des transitions par lots
+#
+# update_q applique une mise à jour par action puis oublie la transition.
+# ReplayBuffer garde les `capacity` dernières transitions (état, action,
+# reward, nouvel état) dans des tableaux préalloués, en anneau, et les
+# réutilise par lots vectorisés (QTable.td_update_batch,
+# LinearQ.td_update_batch). Les états sont stockés par leur clé (int64) :
+# valable pour les deux backends et indépendante des lignes de la Q-table.
+#
+# Branchement, sans toucher au calcul des rewards :
+#   ai_turn_reward_based(..., updates=buffer)  # transitions notées, Q inchangée
+#   buffer.learn(Q)                            # après chaque demi-tour
+# learn() met d'abord à jour, en un lot, les transitions nouvelles (même
+# règle que update_q en ligne), puis rejoue `batches` lots de `batch_size`
+# transitions :
+#   - uniforme : tirées au hasard dans le buffer ;
+#   - balayage par priorité (prioritized=True) : les plus grandes erreurs TD
+#     |δ| d'abord (file de priorité heapq, entrées périmées ignorées). Après
+#     la mise à jour d'un état, les transitions qui y mènent (prédécesseurs,
+#     au plus batch_size) sont réévaluées et remises dans la file si |δ| > theta.
+#
+# Le buffer n'est pas sauvegardé avec le checkpoint (checkpoint.py) : à la
+# reprise d'un entraînement, il repart vide et se remplit à nouveau.
+
+import heapq
+
+import numpy as np
+
+class ReplayBuffer:
+    """
+    buffer = ReplayBuffer(capacity=50_000, prioritized=False)
+    len(buffer), buffer.append((state, action, reward, new_state))
+    buffer.learn(Q) -> nombre de mises à jour appliquées
+    """
+
+    def __init__(self, capacity=50_000, batch_size=64, batches=1, prioritized=False, theta=1e-3,
+                 alpha=0.25, gamma=0.95, rng=None):
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.batches = batches
+        self.prioritized = prioritized
+        self.theta = theta
+        self.alpha = alpha
+        self.gamma = gamma
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+        self.states = np.zeros(capacity, dtype=np.int64)
+        self.actions = np.zeros(capacity, dtype=np.intp)
+        self.rewards = np.zeros(capacity)
+        self.next_states = np.zeros(capacity, dtype=np.int64)
+        self.n = 0          # transitions stockées
+        self.pos = 0        # prochaine case écrite
+        self.pending = 0    # transitions pas encore apprises
+        self.updates = 0    # mises à jour appliquées au total
+
+        # balayage par priorité : stamp[i] identifie l'entrée valide de la case i
+        self._heap = []
+        self._stamp = np.full(capacity, -1, dtype=np.int64)
+        self._next_stamp = 0
+        self._preds = {}    # clé de nouvel état -> cases des transitions qui y mènent
+
+    def __len__(self):
+        return self.n
+
+    # -----------------------
+    # Écriture
+    # -----------------------
+    def append(self, transition):
+        """Ajoute (state, action, reward, new_state) ; remplace la plus ancienne si plein."""
+        state, action, reward, new_state = transition
+        i = self.pos
+        if self.prioritized:
+            if self.n == self.capacity:
+                old = self._preds.get(int(self.next_states[i]))
+                if old is not None:
+                    old.discard(i)
+            self._stamp[i] = -1
+            self._preds.setdefault(new_state, set()).add(i)
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = new_state
+        self.pos = (i + 1) % self.capacity
+        self.n = min(self.n + 1, self.capacity)
+        self.pending = min(self.pending + 1, self.capacity)
+
+    # -----------------------
+    # Apprentissage
+    # -----------------------
+    def _update(self, Q, idx):
+        delta = Q.td_update_batch(self.states[idx], self.actions[idx], self.rewards[idx],
+                                  self.next_states[idx], self.alpha, self.gamma)
+        self.updates += len(idx)
+        if self.prioritized:
+            self._reprioritize(Q, idx)
+        return delta
+
+    def _push(self, idx, priority):
+        for i, p in zip(idx.tolist(), priority.tolist()):
+            if p > self.theta:
+                self._stamp[i] = self._next_stamp
+                heapq.heappush(self._heap, (-p, self._next_stamp, i))
+                self._next_stamp += 1
+        if len(self._heap) > 4 * self.capacity:  # trop d'entrées périmées : reconstruction
+            self._heap = [e for e in self._heap if self._stamp[e[2]] == e[1]]
+            heapq.heapify(self._heap)
+
+    def _reprioritize(self, Q, idx):
+        """Nouvelles priorités des transitions `idx` et d'au plus batch_size de leurs prédécesseurs."""
+        preds = set()
+        for state in set(self.states[idx].tolist()):
+            preds.update(self._preds.get(state, ()))
+            if len(preds) >= self.batch_size:
+                break
+        preds.difference_update(idx.tolist())
+        idx = np.concatenate([idx, np.fromiter(preds, dtype=np.intp, count=len(preds))[:self.batch_size]])
+        delta = Q.td_errors(self.states[idx], self.actions[idx], self.rewards[idx],
+                            self.next_states[idx], self.gamma)
+        self._push(idx, np.abs(delta))
+
+    def _pop(self):
+        """Jusqu'à batch_size cases, de plus grande priorité d'abord."""
+        idx = []
+        while self._heap and len(idx) < self.batch_size:
+            _, stamp, i = heapq.heappop(self._heap)
+            if self._stamp[i] == stamp:
+                self._stamp[i] = -1
+                idx.append(i)
+        return np.array(idx, dtype=np.intp)
+
+    def learn(self, Q):
+        """Apprend les transitions nouvelles puis rejoue `batches` lots. Renvoie le nombre de mises à jour."""
+        before = self.updates
+        if self.pending:
+            self._update(Q, (self.pos - self.pending + np.arange(self.pending)) % self.capacity)
+            self.pending = 0
+        for _ in range(self.batches if self.n else 0):
+            if self.prioritized:
+                idx = self._pop()
+                if not len(idx):
+                    break
+            else:
+                idx = self.rng.integers(0, self.n, self.batch_size)
+            self._update(Q, idx)
+        return self.updates - before
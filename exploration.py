@@ -0,0 +1,244 @@
+# exploration.py — exploration guidée par les visites (ε par état, bonus UCB)
+#
+# Sans Explorer, choose_action tire une action au hasard avec la probabilité
+# ε fixée par ai_turn_reward_based (0.1, 0.02 sur objectif), quel que soit
+# le nombre de fois où l'état a été vu. Explorer compte les choix par
+# (état, action) dans un tableau compact (uint32, une ligne par état, qui
+# grandit par doublement comme QTable) et propose :
+#   "decay" : ε par état = ε_base * decay_visits / (decay_visits + n(s)),
+#             au moins eps_min : un état bien connu n'explore presque plus,
+#             un état rare explore comme avant
+#   "ucb"   : ε = eps_min et bonus c * sqrt(ln(n(s) + 1) / (n(s, a) + 1))
+#             ajouté aux scores Q + PRIOR_BETA * prior de choose_action :
+#             les actions peu essayées d'un état passent devant, le bonus
+#             s'efface à mesure qu'elles sont choisies
+# n(s) : visites de l'état, n(s, a) : choix de l'action a (actions de Q,
+# voir encoders.action_map) dans cet état.
+# Avance rapide (ai.make_fast_forward) : hold_bonus donne les bonus UCB des
+# pas sautés, visit_many y compte les visites en une fois.
+#
+# Choix dans config.py : EXPLORATION = "fixed" | "decay" | "ucb"
+# ("fixed" : comportement historique, pas d'Explorer).
+#
+# Mémoire : comme QTable, save() écrit un fichier binaire puis s'y adosse
+# (mmap, base) ; restore() ne lit rien d'avance, une ligne n'est recopiée en
+# mémoire qu'à la première visite de son état. Liée à une Q-table
+# (QTable.link, voir ai.make_explorer), la table est comptée dans le budget
+# QTABLE_MEMORY_MB et oublie (forget) les états que Q évince ; un état oublié
+# repart de sa ligne du fichier, sinon de zéro. Format :
+#   en-tête (64 octets) : magic "EXP1", version u32, n_états u64, n_actions u32,
+#                         choix u64, choix explorés u64
+#   clés                : int64[n], triées
+#   compteurs n(s, a)   : uint32[n, n_actions]  (n(s) = somme de la ligne)
+
+import os
+import struct
+
+import numpy as np
+
+from actions import N_ACTIONS
+
+_MAGIC = b"EXP1"
+_VERSION = 1
+_HEADER = struct.Struct("<4sIQIQQ")
+_HEADER_SIZE = 64
+# coût estimé d'une ligne : clé, compteurs, visites + ~ 100 o dans l'index (dict)
+ROW_BYTES = 8 + 4 * N_ACTIONS + 4 + 100
+
+class Explorer:
+    """
+    explorer = Explorer("ucb")
+    eps, bonus = explorer.policy(state, base_eps)   # avant choose_action
+    explorer.visit(state, action, explored)         # après
+
+    Lignes en mémoire : index (état -> ligne), keys, counts, state_visits ;
+    base : (clés, compteurs) mappés depuis le dernier save/restore, ou None.
+    """
+
+    ROW_BYTES = ROW_BYTES
+
+    def __init__(self, mode="decay", eps_min=0.01, decay_visits=20, ucb_c=1.0, capacity=1024):
+        if mode not in ("decay", "ucb"):
+            raise ValueError(f"exploration inconnue : {mode!r} (choix : fixed, decay, ucb)")
+        self.mode = mode
+        self.eps_min = eps_min
+        self.decay_visits = decay_visits
+        self.ucb_c = ucb_c
+        self.index = {}
+        self.keys = np.zeros(capacity, dtype=np.int64)
+        self.counts = np.zeros((capacity, N_ACTIONS), dtype=np.uint32)
+        self.state_visits = np.zeros(capacity, dtype=np.uint32)
+        self.choices = 0
+        self.explored = 0
+        self.base = None
+        self._n_new = 0  # états en mémoire absents de base
+
+    def __len__(self):
+        if self.base is None:
+            return len(self.index)
+        return len(self.base[0]) + self._n_new
+
+    @property
+    def resident(self):
+        """Nombre de lignes en mémoire."""
+        return len(self.index)
+
+    @property
+    def nbytes(self):
+        n = len(self.index)
+        return self.keys[:n].nbytes + self.counts[:n].nbytes + self.state_visits[:n].nbytes
+
+    def _base_row(self, state):
+        """Indice de `state` dans le fichier mappé, ou None."""
+        if self.base is None:
+            return None
+        keys = self.base[0]
+        i = int(np.searchsorted(keys, state))
+        if i < len(keys) and keys[i] == state:
+            return i
+        return None
+
+    def _row(self, state):
+        r = self.index.get(state)
+        if r is None:
+            r = len(self.index)
+            if r == len(self.counts):
+                self.keys = np.concatenate([self.keys, np.zeros_like(self.keys)])
+                self.counts = np.concatenate([self.counts, np.zeros_like(self.counts)])
+                self.state_visits = np.concatenate([self.state_visits, np.zeros_like(self.state_visits)])
+            self.index[state] = r
+            self.keys[r] = state
+            b = self._base_row(state)
+            if b is None:
+                self._n_new += 1
+                self.counts[r] = 0  # ligne éventuellement libérée par forget
+                self.state_visits[r] = 0
+            else:
+                self.counts[r] = self.base[1][b]
+                self.state_visits[r] = self.counts[r].sum()
+        return r
+
+    def _peek(self, state):
+        """(n(s), n(s, ·)) sans créer de ligne (zéros si l'état est inconnu)."""
+        r = self.index.get(state)
+        if r is not None:
+            return int(self.state_visits[r]), self.counts[r]
+        b = self._base_row(state)
+        if b is None:
+            return 0, np.zeros(N_ACTIONS, dtype=np.uint32)
+        counts = np.array(self.base[1][b])
+        return int(counts.sum()), counts
+
+    def policy(self, state, base_eps):
+        """(ε, bonus) pour choose_action dans `state` ; bonus None hors mode "ucb"."""
+        n, counts = self._peek(state)
+        if self.mode == "decay":
+            return max(self.eps_min, base_eps * self.decay_visits / (self.decay_visits + n)), None
+        return self.eps_min, self.ucb_c * np.sqrt(np.log(n + 1) / (counts + 1.0))
+
+    def visit(self, state, action, explored=False):
+        r = self._row(state)
+        self.counts[r, action] += 1
+        self.state_visits[r] += 1
+        self.choices += 1
+        self.explored += bool(explored)
+
+    def hold_bonus(self, state, action, n):
+        """
+        Bonus (n, N_ACTIONS) des n prochains choix si `action` est prise à
+        chaque fois dans `state` (ligne j : après j choix) ; None hors "ucb".
+        """
+        if self.mode != "ucb":
+            return None
+        visits, counts = self._peek(state)
+        j = np.arange(n)
+        counts = np.broadcast_to(counts.astype(float), (n, N_ACTIONS)).copy()
+        counts[:, action] += j
+        return self.ucb_c * np.sqrt(np.log(visits + j + 1)[:, None] / (counts + 1.0))
+
+    def visit_many(self, state, action, n):
+        """n choix gloutons de `action` dans `state` (avance rapide)."""
+        r = self._row(state)
+        self.counts[r, action] += n
+        self.state_visits[r] += n
+        self.choices += n
+
+    def forget(self, states):
+        """Libère les lignes en mémoire de `states` (éviction de la Q-table liée)."""
+        forgotten = [self.index[state] for state in states if state in self.index]
+        if not forgotten:
+            return
+        m = len(self.index)
+        keep = np.ones(m, dtype=bool)
+        keep[forgotten] = False
+        rows = np.flatnonzero(keep)
+        k = len(rows)
+        if self.base is None:
+            self._n_new -= len(forgotten)
+        else:
+            self._n_new -= sum(self._base_row(int(state)) is None for state in self.keys[forgotten])
+        for array in (self.keys, self.counts, self.state_visits):
+            array[:k] = array[rows]
+            array[k:m] = 0
+        self.index = dict(zip(self.keys[:k].tolist(), range(k)))
+
+    def _arrays(self):
+        """(clés triées, compteurs) de toute la table, base comprise."""
+        n = len(self.index)
+        keys, counts = self.keys[:n], self.counts[:n]
+        if self.base is not None:
+            base_keys, base_counts = self.base
+            keep = ~np.isin(base_keys, keys)
+            keys = np.concatenate([base_keys[keep], keys])
+            counts = np.concatenate([base_counts[keep], counts])
+        order = np.argsort(keys, kind="stable")
+        return keys[order], counts[order]
+
+    def save(self, filename):
+        """
+        Écrit les compteurs, base comprise (fichier temporaire puis remplacement
+        atomique), puis s'adosse au nouveau fichier. Renvoie la taille.
+        """
+        keys, counts = self._arrays()
+        tmp = filename + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, len(keys), N_ACTIONS, self.choices, self.explored)
+                    .ljust(_HEADER_SIZE, b"\0"))
+            f.write(keys.astype("<i8").tobytes())
+            f.write(counts.astype("<u4").tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        self.base = None  # pas de remplacement d'un fichier mappé sous Windows
+        os.replace(tmp, filename)
+        self._rebase(filename)
+        return size
+
+    def restore(self, filename):
+        """Remplace les compteurs par ceux de `filename` (écrit par save), lus à la demande."""
+        self.index = {}
+        self.keys[:] = 0
+        self.counts[:] = 0
+        self.state_visits[:] = 0
+        self.base = None
+        self._rebase(filename)
+        with open(filename, "rb") as f:
+            self.choices, self.explored = _HEADER.unpack(f.read(_HEADER.size))[4:]
+
+    def _rebase(self, filename):
+        """Mappe `filename` comme base ; les lignes en mémoire restent prioritaires."""
+        with open(filename, "rb") as f:
+            magic, version, n, n_actions, _, _ = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != _MAGIC or version != _VERSION or n_actions != N_ACTIONS:
+            raise ValueError(f"{filename} : fichier de compteurs d'exploration invalide")
+        self.base = None
+        if n:
+            keys = np.memmap(filename, dtype="<i8", mode="r", offset=_HEADER_SIZE, shape=(n,))
+            counts = np.memmap(filename, dtype="<u4", mode="r", offset=_HEADER_SIZE + keys.nbytes,
+                               shape=(n, N_ACTIONS))
+            self.base = keys, counts
+        self._n_new = len(self.index) if self.base is None else sum(self._base_row(s) is None for s in self.index)
+
+    def exploration_rate(self):
+        """Part des actions tirées au hasard (ε) depuis la création."""
+        return self.explored / self.choices if self.choices else 0.0
@@ -0,0 +1,120 @@
+# linear_q.py — Q approchée par une fonction linéaire (alternative à la Q-table)
+#
+#   Q(s, a) = weights[a] · φ(s)
+# φ(s) : caractéristiques 0/1 décodées de la clé d'état par l'encodeur
+# (encoders.py : tranches de distance, on_obj, ennemis / objectifs voisins,
+# directions...). Mémoire constante : N_ACTIONS x N_FEATURES poids, quel que
+# soit le nombre d'états rencontrés, et des valeurs pour les états jamais vus.
+#
+# Mise à jour TD (Q-learning semi-gradient, pas normalisé par |φ|²) :
+#   δ = r + γ max_a' Q(s', a') - Q(s, a)
+#   weights[a] += α δ φ(s) / (φ(s) · φ(s))
+# td_update_batch applique la même règle à un lot de transitions (NumPy).
+#
+# Même interface que QTable pour ai.choose_action / ai.update_q
+# (q_values, get, set, best_value) ; tabular = False désactive ce qui
+# suppose des lignes indépendantes (avance rapide, spéculation de ai_worker).
+# Fichier : .npz (poids + nom de l'encodeur), quelques ko.
+
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from actions import N_ACTIONS
+from encoders import make_encoder
+
+class LinearQ:
+    tabular = False
+
+    def __init__(self, encoder="absolute", weights=None):
+        self.encoder = make_encoder(encoder) if isinstance(encoder, str) else encoder
+        n = self.encoder.N_FEATURES
+        self.weights = np.zeros((N_ACTIONS, n)) if weights is None else np.asarray(weights, dtype=float)
+        if self.weights.shape != (N_ACTIONS, n):
+            raise ValueError(f"poids {self.weights.shape}, attendu {(N_ACTIONS, n)} ({self.encoder.name})")
+        self.features = lru_cache(maxsize=1 << 14)(self.encoder.features)
+        self.dirty = None  # pas de journal de lignes (voir checkpoint.WeightCheckpoint)
+
+    def __len__(self):
+        return 0  # aucun état stocké
+
+    @property
+    def nbytes(self):
+        return self.weights.nbytes
+
+    # -----------------------
+    # Lecture
+    # -----------------------
+    def q_values(self, state, mask=None):
+        """Q(state, ·) pour toutes les actions (le masque ne sert qu'à la Q-table)."""
+        return self.weights @ self.features(state)
+
+    def get(self, state, action, default=0.0):
+        return float(self.weights[action] @ self.features(state))
+
+    def best_value(self, state):
+        return float((self.weights @ self.features(state)).max())
+
+    # -----------------------
+    # Écriture
+    # -----------------------
+    def set(self, state, action, value):
+        """Ramène Q(state, action) exactement à `value` (projection sur φ(state))."""
+        phi = self.features(state)
+        self.weights[action] += (value - self.weights[action] @ phi) * phi / (phi @ phi)
+
+    def td_update(self, state, action, reward, new_state, alpha=0.25, gamma=0.95):
+        phi = self.features(state)
+        future = (self.weights @ self.features(new_state)).max()
+        delta = reward + gamma * future - self.weights[action] @ phi
+        self.weights[action] += alpha * delta * phi / (phi @ phi)
+        return delta
+
+    def _td_errors(self, states, actions, rewards, new_states, gamma):
+        phi = np.array([self.features(s) for s in np.asarray(states).tolist()])
+        phi_next = np.array([self.features(s) for s in np.asarray(new_states).tolist()])
+        q = np.einsum("ij,ij->i", self.weights[actions], phi)
+        return phi, np.asarray(rewards) + gamma * (phi_next @ self.weights.T).max(axis=1) - q
+
+    def td_errors(self, states, actions, rewards, new_states, gamma=0.95):
+        """Erreurs TD δ d'un lot de transitions (poids inchangés)."""
+        return self._td_errors(states, np.asarray(actions, dtype=np.intp), rewards, new_states, gamma)[1]
+
+    def td_update_batch(self, states, actions, rewards, new_states, alpha=0.25, gamma=0.95):
+        """
+        Mise à jour TD d'un lot (cibles calculées avec les poids d'avant le lot).
+        Les poids d'une action reçoivent la moyenne des pas de ses transitions.
+        Renvoie les erreurs TD δ.
+        """
+        actions = np.asarray(actions, dtype=np.intp)
+        phi, delta = self._td_errors(states, actions, rewards, new_states, gamma)
+        counts = np.bincount(actions, minlength=N_ACTIONS)[actions]
+        step = (alpha * delta / (counts * np.einsum("ij,ij->i", phi, phi)))[:, None] * phi
+        np.add.at(self.weights, actions, step)
+        return delta
+
+    # -----------------------
+    # Fichier
+    # -----------------------
+    def save(self, filename, **meta):
+        """Écrit les poids (et `meta`, ex. games_done) ; remplacement atomique. Renvoie la taille."""
+        tmp = filename + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, weights=self.weights, encoder=self.encoder.name, **meta)
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        os.replace(tmp, filename)
+        return size
+
+    @classmethod
+    def load(cls, filename, encoder="absolute"):
+        """Poids de `filename`, ou poids nuls pour `encoder` si le fichier n'existe pas."""
+        if not os.path.exists(filename):
+            return cls(encoder)
+        with np.load(filename) as data:
+            saved = str(data["encoder"])
+            if saved != encoder:
+                raise ValueError(f"{filename} : poids appris avec l'encodeur {saved!r}, config : {encoder!r}")
+            return cls(saved, data["weights"])
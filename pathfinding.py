@@ -0,0 +1,281 @@
+# pathfinding.py — A* sur grille : tas binaire, cache de chemins, réservations
+#
+# - find_path : A* 4-connexe avec file de priorité (heapq), déduplication par
+#   meilleur coût g et tableaux plats (indice de case = y * n + x) au lieu
+#   d'objets Node. Chaque case est développée au plus une fois, donc un but
+#   inaccessible coûte au pire n² expansions.
+# - PathCache : mémorise les chemins par (version de grille, départ, but).
+# - ReservationTable : mode coopératif. Chaque unité réserve ses cases dans
+#   l'espace-temps (x, y, t) pour que plusieurs unités puissent appeler
+#   move_towards_goal dans le même tour sans entrer en collision.
+
+import heapq
+
+from config import size
+
+_NEIGHBORS = ((0, 1), (0, -1), (1, 0), (-1, 0))
+
+def heuristic(a, b):
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+def find_path(start, goal, grid, board_size=size):
+    """
+    Plus court chemin de start à goal (cases passables : grid[y][x] == 1).
+    Renvoie la liste des cases [start, ..., goal], ou [] si goal est inaccessible.
+    """
+    n = board_size
+    gx, gy = goal
+    start_i, goal_i = start[1] * n + start[0], gy * n + gx
+    inf = n * n + 1
+    g_cost = [inf] * (n * n)
+    parent = [-1] * (n * n)
+    closed = bytearray(n * n)
+
+    g_cost[start_i] = 0
+    h = heuristic(start, goal)
+    heap = [(h, h, start_i)]
+    while heap:
+        _, _, i = heapq.heappop(heap)
+        if closed[i]:
+            continue
+        closed[i] = 1
+        if i == goal_i:
+            path = []
+            while i != -1:
+                path.append((i % n, i // n))
+                i = parent[i]
+            return path[::-1]
+
+        x, y = i % n, i // n
+        ng = g_cost[i] + 1
+        for dx, dy in _NEIGHBORS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < n and 0 <= ny < n and grid[ny][nx] == 1:
+                j = ny * n + nx
+                if ng < g_cost[j] and not closed[j]:
+                    g_cost[j] = ng
+                    parent[j] = i
+                    h = abs(nx - gx) + abs(ny - gy)
+                    heapq.heappush(heap, (ng + h, h, j))
+    return []
+
+# -----------------------
+# Cache
+# -----------------------
+class PathCache:
+    """
+    Chemins mémorisés par (version de grille, départ, but).
+    Appeler invalidate() après toute modification de la grille.
+    """
+
+    def __init__(self, grid, board_size=size, max_entries=4096):
+        self.grid = grid
+        self.board_size = board_size
+        self.max_entries = max_entries
+        self.version = 0
+        self.paths = {}
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self):
+        self.version += 1
+        self.paths.clear()
+
+    def find_path(self, start, goal):
+        key = (self.version, start, goal)
+        path = self.paths.get(key)
+        if path is not None:
+            self.hits += 1
+            return list(path)
+        self.misses += 1
+        path = find_path(start, goal, self.grid, self.board_size)
+        if len(self.paths) >= self.max_entries:
+            self.paths.clear()
+        self.paths[key] = tuple(path)
+        return path
+
+# -----------------------
+# Mode coopératif (réservations espace-temps)
+# -----------------------
+class ReservationTable:
+    """
+    Réservations (x, y, t) partagées par les unités qui planifient dans le
+    même tour (t = 0 : position actuelle, t = 1 : après un pas, ...).
+    Une unité arrivée à son but y reste réservée pour la suite.
+    """
+
+    def __init__(self, horizon=64, board_size=size):
+        self.horizon = horizon
+        self.board_size = board_size
+        self.cells = set()   # (x, y, t)
+        self.edges = set()   # ((x1, y1), (x2, y2), t) : passage de t à t+1
+        self.parked = {}     # (x, y) -> t à partir duquel la case reste prise
+
+    def is_free(self, x, y, t):
+        if (x, y, t) in self.cells:
+            return False
+        since = self.parked.get((x, y))
+        return since is None or t < since
+
+    def reserve_path(self, path, t0=0):
+        for t, (x, y) in enumerate(path):
+            self.cells.add((x, y, t0 + t))
+            if t > 0:
+                self.edges.add((path[t - 1], (x, y), t0 + t - 1))
+        if path:
+            self.parked[path[-1]] = t0 + len(path) - 1
+
+    def find_path(self, start, goal, grid, t0=0):
+        """
+        A* dans l'espace-temps (déplacements 4-connexes + attente) en évitant
+        les cases réservées et les échanges de cases. Réserve le chemin trouvé.
+        L'unité reste ensuite sur le but : il n'est accepté qu'à un instant
+        après lequel aucune autre unité ne l'a réservé.
+        Si le but est déjà occupé durablement par une autre unité, vise la
+        case libre la plus proche du but. Si aucun chemin n'existe dans
+        l'horizon, réserve l'attente sur place et renvoie [start].
+        """
+        n = self.board_size
+        if goal in self.parked and goal != start:
+            goal = self._nearest_unparked(goal, grid)
+            if goal is None:
+                self.reserve_path([start, start], t0)
+                return [start]
+        gx, gy = goal
+        # dernier passage réservé sur le but : y arriver avant, c'est y être percuté
+        latest = max((t for x, y, t in self.cells if x == gx and y == gy), default=-1)
+        h = heuristic(start, goal)
+        heap = [(h, h, t0, start)]
+        parent = {(start, t0): None}
+        closed = set()
+        while heap:
+            _, _, t, cell = heapq.heappop(heap)
+            if (cell, t) in closed:
+                continue
+            closed.add((cell, t))
+            if cell == goal and t >= latest:
+                path = []
+                node = (cell, t)
+                while node is not None:
+                    path.append(node[0])
+                    node = parent[node]
+                path.reverse()
+                self.reserve_path(path, t0)
+                return path
+            if t - t0 >= self.horizon:
+                continue
+
+            x, y = cell
+            for dx, dy in _NEIGHBORS + ((0, 0),):
+                nx, ny = x + dx, y + dy
+                if not (0 <= nx < n and 0 <= ny < n) or grid[ny][nx] != 1:
+                    continue
+                nxt = (nx, ny)
+                if not self.is_free(nx, ny, t + 1) or (nxt, cell, t) in self.edges:
+                    continue
+                if (nxt, t + 1) in parent:
+                    continue
+                parent[(nxt, t + 1)] = (cell, t)
+                nh = abs(nx - gx) + abs(ny - gy)
+                heapq.heappush(heap, (t + 1 - t0 + nh, nh, t + 1, nxt))
+
+        self.reserve_path([start, start], t0)
+        return [start]
+
+    def _nearest_unparked(self, goal, grid):
+        """Case passable non réservée durablement la plus proche de goal (BFS)."""
+        n = self.board_size
+        seen = {goal}
+        frontier = [goal]
+        while frontier:
+            nxt = []
+            for x, y in frontier:
+                for dx, dy in _NEIGHBORS:
+                    cell = (x + dx, y + dy)
+                    if cell in seen or not (0 <= cell[0] < n and 0 <= cell[1] < n):
+                        continue
+                    seen.add(cell)
+                    if grid[cell[1]][cell[0]] != 1:
+                        continue
+                    if cell not in self.parked:
+                        return cell
+                    nxt.append(cell)
+            frontier = nxt
+        return None
+
+
+# -----------------------
+# Benchmark : implémentation d'origine (tri de la liste ouverte, objets Node)
+# -----------------------
+def _reference_find_path(start, goal, grid, board_size=size):
+    class Node:
+        def __init__(self, x, y, parent=None, g=0, h=0):
+            self.x, self.y, self.parent, self.g, self.f = x, y, parent, g, g + h
+
+    open_list = [Node(start[0], start[1], None, 0, heuristic(start, goal))]
+    closed_list = set()
+    while open_list:
+        open_list.sort(key=lambda node: node.f)
+        current = open_list.pop(0)
+        closed_list.add((current.x, current.y))
+        if (current.x, current.y) == goal:
+            path = []
+            while current:
+                path.append((current.x, current.y))
+                current = current.parent
+            return path[::-1]
+        for dx, dy in _NEIGHBORS:
+            nx, ny = current.x + dx, current.y + dy
+            if 0 <= nx < board_size and 0 <= ny < board_size and grid[ny][nx] == 1:
+                if (nx, ny) in closed_list:
+                    continue
+                open_list.append(Node(nx, ny, current, current.g + 1, heuristic((nx, ny), goal)))
+    return []
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    def bench(label, fn, cases, grid, n):
+        t0 = time.perf_counter()
+        for start, goal in cases:
+            fn(start, goal, grid, n)
+        print(f"{label:<34} {1e3 * (time.perf_counter() - t0) / len(cases):9.3f} ms / chemin")
+
+    # l'implémentation d'origine re-développe les cases déjà fermées : elle
+    # n'est mesurée que là où elle termine en temps raisonnable (n <= 10)
+    rng = random.Random(0)
+    for n in (10, 20, 40):
+        grid = [[1] * n for _ in range(n)]
+        cases = [((rng.randrange(n), rng.randrange(n)), (rng.randrange(n), rng.randrange(n))) for _ in range(50)]
+        print(f"--- grille {n}x{n}, but accessible ---")
+        if n <= 10:
+            for start, goal in cases:
+                assert len(find_path(start, goal, grid, n)) == len(_reference_find_path(start, goal, grid, n))
+            bench("origine (sort + Node)", _reference_find_path, cases, grid, n)
+        bench("tas binaire", find_path, cases, grid, n)
+        cache = PathCache(grid, n)
+        bench("tas binaire + cache (2e passe)", lambda s, g, *_: cache.find_path(s, g), cases + cases, grid, n)
+
+    # but entouré de murs : toute la grille accessible est explorée
+    for n in (8, 20):
+        grid = [[1] * n for _ in range(n)]
+        c = n // 2
+        for x, y in ((c, c - 1), (c - 1, c), (c + 1, c), (c, c + 1)):
+            grid[y][x] = 0
+        print(f"--- grille {n}x{n}, but inaccessible ---")
+        if n <= 8:
+            bench("origine (sort + Node)", _reference_find_path, [((0, 0), (c, c))], grid, n)
+        bench("tas binaire", find_path, [((0, 0), (c, c))], grid, n)
+
+    # mode coopératif : 10 unités vers le même objectif
+    n = 20
+    grid = [[1] * n for _ in range(n)]
+    starts = [(0, y) for y in range(0, 20, 2)]
+    t0 = time.perf_counter()
+    table = ReservationTable(board_size=n)
+    paths = [table.find_path(s, (10, 10), grid) for s in starts]
+    steps = [p[1] if len(p) > 1 else p[0] for p in paths]
+    print(f"--- coopératif : {len(starts)} unités, {1e3 * (time.perf_counter() - t0):.2f} ms, "
+          f"{len(set(steps))} cases distinctes au pas suivant ---")
@@ -0,0 +1,87 @@
+# profiling.py — chronomètres par phase pour la boucle de jeu et l'IA
+#
+# Activation : PROFILE = True dans config.py, ou variable d'environnement
+# JEU_PROFILE=1 (JEU_PROFILE=0 force la désactivation).
+# Désactivé, chaque point de mesure coûte un test de booléen :
+#
+#     timed = profiling.enabled
+#     if timed: t = perf_counter()
+#     state = get_state(...)
+#     if timed: t = profiling.lap("get_state", t)
+#
+# Les phases peuvent être imbriquées (ex. prior_build dans choose_action) :
+# les temps sont inclusifs.
+#
+# cProfile échantillonné : PROFILE_CPROFILE_EVERY = N (ou JEU_CPROFILE_EVERY)
+# profile une partie toutes les N et écrit data/profile_partie_<n>.prof.
+
+import cProfile
+import os
+from time import perf_counter
+
+import config
+
+def _env_flag(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value not in ("", "0")
+
+enabled = _env_flag("JEU_PROFILE", getattr(config, "PROFILE", False))
+cprofile_every = int(os.environ.get("JEU_CPROFILE_EVERY", getattr(config, "PROFILE_CPROFILE_EVERY", 0)))
+
+times = {}   # phase -> secondes cumulées
+calls = {}   # phase -> nombre d'appels
+_t_start = perf_counter()
+
+def lap(name, t0):
+    """Ajoute perf_counter() - t0 à la phase `name` et renvoie l'instant courant."""
+    now = perf_counter()
+    times[name] = times.get(name, 0.0) + now - t0
+    calls[name] = calls.get(name, 0) + 1
+    return now
+
+def count(name, n=1):
+    """Compteur sans chronomètre."""
+    calls[name] = calls.get(name, 0) + n
+
+def reset():
+    global _t_start
+    times.clear()
+    calls.clear()
+    _t_start = perf_counter()
+
+def summary():
+    """Tableau texte : appels, temps total, µs par appel, part du temps écoulé."""
+    wall = perf_counter() - _t_start
+    lines = [f"{'phase':<18} {'appels':>10} {'total (s)':>10} {'µs/appel':>10} {'% run':>7}"]
+    for name in sorted(calls, key=lambda k: -times.get(k, 0.0)):
+        n, t = calls[name], times.get(name)
+        if t is None:
+            lines.append(f"{name:<18} {n:>10}")
+            continue
+        lines.append(f"{name:<18} {n:>10} {t:>10.3f} {1e6 * t / n:>10.2f} {100 * t / wall:>6.1f}%")
+    lines.append(f"{'(temps écoulé)':<18} {'':>10} {wall:>10.3f}")
+    return "\n".join(lines)
+
+class sampled_cprofile:
+    """
+    with sampled_cprofile(partie, data_dir): play_game(...)
+    Profile le bloc avec cProfile une partie sur `cprofile_every`.
+    """
+
+    def __init__(self, game_index, out_dir="data"):
+        self.profiler = None
+        if cprofile_every and game_index % cprofile_every == 0:
+            self.profiler = cProfile.Profile()
+            self.filename = os.path.join(out_dir, f"profile_partie_{game_index}.prof")
+
+    def __enter__(self):
+        if self.profiler is not None:
+            self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.filename)
@@ -0,0 +1,635 @@
+# qtable.py — Q-table compacte : états entiers, actions indexées, valeurs NumPy
+#
+# Les caractéristiques de get_state (x, y, on_obj, close_enemies,
+# local_objectives, nearest_enemy_dist) sont empaquetées dans un entier.
+# Chaque état occupe une ligne d'un tableau (n_états, N_ACTIONS) qui grandit
+# par doublement ; un masque `known` marque les couples (état, action)
+# visités (équivalent des clés présentes dans l'ancien dict-de-dicts).
+#
+# Format binaire (.qtb, little-endian), ouvert par mmap :
+#   en-tête (64 octets) : magic "QTB1", version u32, n_états u64, n_actions u32
+#   clés                : int64[n], triées
+#   valeurs             : float64[n, n_actions]
+#   masques known       : uint16[n], un bit par action
+#   visites             : uint32[n] (version 2 ; version 1 : absentes, lues à 0)
+# Une table ouverte ainsi ne lit que les lignes des états consultés ; les
+# états touchés sont recopiés dans les tableaux en mémoire (copie à la lecture).
+#
+# Budget mémoire (set_budget, QTABLE_MEMORY_MB dans config.py) : chaque ligne
+# compte ses visites (touch) et son dernier accès (horloge logique : touch,
+# set). enforce_budget(), appelé entre deux parties, évince les états froids
+# quand les lignes en mémoire dépassent le budget : les moins récents ("lru")
+# ou les moins visités ("lfu"), à égalité ceux de plus faible max |Q|. Un état
+# évincé repart de sa ligne du .qtb mappé s'il y figure (visites comprises),
+# sinon de zéro. Les lignes pas encore journalisées (dirty, checkpoint.py) ne
+# sont pas évincées. Les tables liées par link() (compteurs par état de
+# exploration.Explorer) sont comptées dans le budget et perdent les mêmes états.
+
+import json
+import os
+import struct
+
+import numpy as np
+
+from actions import N_ACTIONS, action_from_str, action_to_str
+
+_MAGIC = b"QTB1"
+_VERSION = 2
+_HEADER = struct.Struct("<4sIQI")
+_HEADER_SIZE = 64
+_BITS = 1 << np.arange(N_ACTIONS, dtype=np.uint16)
+EVICT_TARGET = 0.9  # une éviction ramène la table à 90 % du budget
+# coût estimé d'une ligne : clé, valeurs, known, visites, dernier accès + ~ 100 o dans l'index (dict)
+ROW_BYTES = 8 + 8 * N_ACTIONS + N_ACTIONS + 4 + 8 + 100
+
+# -------------------------------------------------
+# Empaquetage des états
+# -------------------------------------------------
+# bits : x 8 | y 8 | on_obj 1 | close 4 | local 4 | dist 8  (33 bits)
+def pack_state(x, y, on_obj, close, local, dist):
+    """Caractéristiques de get_state -> clé entière."""
+    return (int(x) << 25) | (int(y) << 17) | (int(on_obj) << 16) | (int(close) << 12) | (int(local) << 8) | int(dist)
+
+def unpack_state(key):
+    """Clé entière -> (x, y, on_obj, close, local, dist)."""
+    return (key >> 25, (key >> 17) & 0xFF, (key >> 16) & 1, (key >> 12) & 0xF, (key >> 8) & 0xF, key & 0xFF)
+
+def state_from_str(state_str):
+    """Clé de l'ancien format "x,y,on,close,local,dist" -> clé entière."""
+    return pack_state(*map(int, state_str.split(",")))
+
+def state_to_str(key):
+    return ",".join(map(str, unpack_state(key)))
+
+# -------------------------------------------------
+# Table
+# -------------------------------------------------
+class QTable:
+    """
+    Stockage de Q :
+      index  : dict clé d'état -> ligne
+      keys   : (capacité,) clés d'état par ligne
+      values : (capacité, N_ACTIONS) float64
+      known  : (capacité, N_ACTIONS) bool, action déjà rencontrée
+      base   : fichier .qtb mappé en lecture (None si table purement en mémoire),
+               base_filename : son chemin
+      dirty  : lignes modifiées depuis le dernier vidage du journal
+               (None : pas de suivi, voir checkpoint.py)
+      visits : (capacité,) nombre de touch par ligne
+      last   : (capacité,) horloge du dernier accès
+      stats  : évictions, états évincés, présence des états consultés (memory_stats)
+      linked : tables par état évincées avec celle-ci (link)
+    """
+
+    tabular = True  # une ligne indépendante par état (voir linear_q.LinearQ)
+
+    def __init__(self, capacity=1024):
+        self.index = {}
+        self.keys = np.zeros(capacity, dtype=np.int64)
+        self.values = np.zeros((capacity, N_ACTIONS))
+        self.known = np.zeros((capacity, N_ACTIONS), dtype=bool)
+        self.visits = np.zeros(capacity, dtype=np.int32)
+        self.last = np.zeros(capacity, dtype=np.int64)
+        self.clock = 0
+        self.base = None
+        self.base_filename = None
+        self._n_new = 0  # états en mémoire absents de base
+        self.dirty = None
+        self.unsaved = None  # clés journalisées mais pas encore dans base (Checkpoint)
+        self.max_mb = None  # pas de budget
+        self.max_rows = None
+        self.policy = "lru"
+        self.linked = []
+        self.stats = {"evictions": 0, "evicted": 0, "hits": 0, "misses": 0}
+
+    def __len__(self):
+        if self.base is None:
+            return len(self.index)
+        return len(self.base[0]) + self._n_new
+
+    def __contains__(self, state):
+        return state in self.index or self._base_row(state) is not None
+
+    def _grow(self):
+        capacity = 2 * len(self.keys)
+        n = len(self.index)
+        keys = np.zeros(capacity, dtype=np.int64)
+        values = np.zeros((capacity, N_ACTIONS))
+        known = np.zeros((capacity, N_ACTIONS), dtype=bool)
+        visits = np.zeros(capacity, dtype=np.int32)
+        last = np.zeros(capacity, dtype=np.int64)
+        keys[:n], values[:n], known[:n] = self.keys[:n], self.values[:n], self.known[:n]
+        visits[:n], last[:n] = self.visits[:n], self.last[:n]
+        self.keys, self.values, self.known = keys, values, known
+        self.visits, self.last = visits, last
+
+    def _base_row(self, state):
+        """Indice de `state` dans le fichier mappé, ou None."""
+        if self.base is None:
+            return None
+        keys = self.base[0]
+        i = int(np.searchsorted(keys, state))
+        if i < len(keys) and keys[i] == state:
+            return i
+        return None
+
+    def row(self, state):
+        """Ligne de `state`, créée (valeurs à 0, rien de connu) si absente."""
+        r = self.index.get(state)
+        if r is None:
+            r = len(self.index)
+            if r == len(self.keys):
+                self._grow()
+            self.index[state] = r
+            self.keys[r] = state
+            self.visits[r] = 0
+            self.last[r] = self.clock
+            b = self._base_row(state)
+            if b is None:
+                self._n_new += 1
+                self.values[r] = 0.0  # ligne éventuellement libérée par evict
+                self.known[r] = False
+            else:
+                _, values, masks, visits = self.base
+                self.values[r] = values[b]
+                self.known[r] = (masks[b] & _BITS) != 0
+                if visits is not None:
+                    self.visits[r] = visits[b]
+        return r
+
+    def peek(self, state):
+        """Valeurs Q(state, ·) sans créer ni marquer de ligne (zéros si l'état est inconnu)."""
+        r = self.index.get(state)
+        if r is not None:
+            return self.values[r]
+        b = self._base_row(state)
+        if b is None:
+            return np.zeros(N_ACTIONS)
+        return np.array(self.base[1][b])
+
+    def get(self, state, action, default=0.0):
+        r = self.index.get(state)
+        if r is None:
+            if self._base_row(state) is None:
+                return default
+            r = self.row(state)
+        if not self.known[r, action]:
+            return default
+        return float(self.values[r, action])
+
+    def set(self, state, action, value):
+        r = self.row(state)
+        self.values[r, action] = value
+        self.known[r, action] = True
+        self.clock += 1
+        self.last[r] = self.clock
+        if self.dirty is not None:
+            self.dirty.add(r)
+
+    def touch(self, state, mask):
+        """Marque comme connues (valeur 0 si nouvelles) les actions du masque."""
+        r = self.index.get(state)
+        if r is None:
+            self.stats["misses"] += 1
+            r = self.row(state)
+        else:
+            self.stats["hits"] += 1
+        self.known[r] |= mask
+        self.clock += 1
+        self.visits[r] += 1
+        self.last[r] = self.clock
+        if self.dirty is not None:
+            self.dirty.add(r)
+        return r
+
+    def q_values(self, state, mask):
+        """Ligne Q(state, ·), après avoir marqué connues les actions du masque (voir touch)."""
+        r = self.touch(state, mask)  # peut réallouer self.values
+        return self.values[r]
+
+    def best_value(self, state):
+        """max Q(state, ·) sur les actions connues, 0 si aucune."""
+        r = self.index.get(state)
+        if r is None:
+            if self._base_row(state) is None:
+                return 0.0
+            r = self.row(state)
+        if not self.known[r].any():
+            return 0.0
+        return float(self.values[r][self.known[r]].max())
+
+    # -----------------------
+    # Mises à jour par lots (experience.py)
+    # -----------------------
+    def _rows(self, states):
+        index = self.index
+        rows = [index.get(s) for s in np.asarray(states).tolist()]
+        if None in rows:  # états encore absents de la mémoire : création (ou lecture du .qtb)
+            rows = [self.row(s) if r is None else r for s, r in zip(np.asarray(states).tolist(), rows)]
+        return np.array(rows, dtype=np.intp)
+
+    def _td_errors(self, states, actions, rewards, new_states, gamma):
+        rows = self._rows(states)
+        next_rows = self._rows(new_states)
+        known = self.known[next_rows]
+        future = np.where(known, self.values[next_rows], -np.inf).max(axis=1)
+        future[~known.any(axis=1)] = 0.0
+        old = np.where(self.known[rows, actions], self.values[rows, actions], 0.0)
+        return rows, np.asarray(rewards) + gamma * future - old
+
+    def td_errors(self, states, actions, rewards, new_states, gamma=0.95):
+        """Erreurs TD δ = r + γ max Q(s', ·) - Q(s, a) d'un lot de transitions (Q inchangée)."""
+        return self._td_errors(states, actions, rewards, new_states, gamma)[1]
+
+    def td_update_batch(self, states, actions, rewards, new_states, alpha=0.25, gamma=0.95):
+        """
+        update_q sur un lot de transitions, cibles calculées avec les valeurs
+        d'avant le lot. Une entrée (state, action) présente plusieurs fois
+        reçoit la moyenne de ses pas (la somme divergerait dès que
+        alpha x répétitions > 2). Renvoie les erreurs TD δ.
+        """
+        actions = np.asarray(actions, dtype=np.intp)
+        rows, delta = self._td_errors(states, actions, rewards, new_states, gamma)
+        self.values[rows, actions] = np.where(self.known[rows, actions], self.values[rows, actions], 0.0)
+        flat = rows * N_ACTIONS + actions
+        _, inverse, counts = np.unique(flat, return_inverse=True, return_counts=True)
+        np.add.at(self.values, (rows, actions), alpha * delta / counts[inverse])
+        self.known[rows, actions] = True
+        self.clock += 1
+        self.last[rows] = self.clock
+        if self.dirty is not None:
+            self.dirty.update(rows.tolist())
+        return delta
+
+    def items(self):
+        """(clé, valeurs, masque) pour chaque état."""
+        if self.base is not None:
+            keys, values, masks, _ = self.base
+            for b in range(len(keys)):
+                state = int(keys[b])
+                if state not in self.index:
+                    yield state, np.asarray(values[b]), (masks[b] & _BITS) != 0
+        for state, r in self.index.items():
+            yield state, self.values[r], self.known[r]
+
+    def export_rows(self, rows):
+        """(clés, valeurs, masques de bits) des lignes `rows`, comme dans un .qtb."""
+        rows = np.fromiter(rows, dtype=np.intp)
+        masks = (self.known[rows] * _BITS).sum(axis=1, dtype=np.uint16)
+        return self.keys[rows], self.values[rows], masks
+
+    def import_rows(self, keys, values, masks):
+        """Écrase les lignes des états `keys` (inverse de export_rows)."""
+        for state, v, m in zip(keys.tolist(), values, masks):
+            r = self.row(state)
+            self.values[r] = v
+            self.known[r] = (m & _BITS) != 0
+
+    @property
+    def nbytes(self):
+        n = len(self.index)
+        return sum(a[:n].nbytes for a in (self.keys, self.values, self.known, self.visits, self.last))
+
+    # -----------------------
+    # Budget mémoire
+    # -----------------------
+    def set_budget(self, max_mb, policy="lru"):
+        """
+        Au plus max_mb Mo de lignes en mémoire (None : pas de limite), lignes
+        des tables liées comprises ; policy "lru" ou "lfu".
+        """
+        if policy not in ("lru", "lfu"):
+            raise ValueError(f"politique d'éviction inconnue : {policy!r} (choix : lru, lfu)")
+        self.max_mb = max_mb
+        self.policy = policy
+        row_bytes = ROW_BYTES + sum(table.ROW_BYTES for table in self.linked)
+        self.max_rows = None if max_mb is None else max(1, int(max_mb * 1e6) // row_bytes)
+
+    def link(self, table):
+        """
+        Lie une table de compteurs par état (exploration.Explorer : ROW_BYTES,
+        nbytes, resident, forget(états)) : evict lui fait oublier les états
+        évincés et le budget compte une de ses lignes par ligne de Q (elle n'a
+        de lignes en mémoire que pour des états touchés dans Q).
+        """
+        self.linked.append(table)
+        self.set_budget(self.max_mb, self.policy)
+
+    def enforce_budget(self):
+        """Évince des états froids si le budget est dépassé. Renvoie le nombre d'états évincés."""
+        if self.max_rows is None or len(self.index) <= self.max_rows:
+            return 0
+        return self.evict(len(self.index) - int(self.max_rows * EVICT_TARGET))
+
+    def evict(self, n):
+        """
+        Retire de la mémoire les n lignes les plus froides et renumérote les
+        autres. Les numéros de ligne obtenus avant l'appel ne sont plus
+        valables. Un état retiré revient à sa valeur dans base (ou à zéro) :
+        les lignes dirty et celles des clés unsaved, absentes de base, sont
+        donc gardées. Sans Checkpoint, rien n'est gardé : evict oublie.
+        """
+        m = len(self.index)
+        known = self.known[:m]
+        value = np.where(known, np.abs(self.values[:m]), 0.0).max(axis=1)
+        cold = self.last[:m] if self.policy == "lru" else self.visits[:m]
+        order = np.lexsort((value, cold))
+        if self.dirty:
+            order = order[~np.isin(order, np.fromiter(self.dirty, dtype=np.intp))]
+        if self.unsaved:
+            unsaved = np.fromiter(self.unsaved, dtype=np.int64, count=len(self.unsaved))
+            order = order[~np.isin(self.keys[order], unsaved)]
+        evicted = order[:n]
+        if not len(evicted):
+            return 0
+        keep = np.ones(m, dtype=bool)
+        keep[evicted] = False
+        rows = np.flatnonzero(keep)
+        k = len(rows)
+
+        if self.base is None:
+            self._n_new -= len(evicted)
+        else:
+            base_keys = self.base[0]
+            evicted_keys = self.keys[evicted]
+            pos = np.minimum(np.searchsorted(base_keys, evicted_keys), len(base_keys) - 1)
+            self._n_new -= int((base_keys[pos] != evicted_keys).sum())
+        evicted_keys = self.keys[evicted].tolist()
+        for array in (self.keys, self.values, self.known, self.visits, self.last):
+            array[:k] = array[rows]
+            array[k:m] = 0
+        self.index = dict(zip(self.keys[:k].tolist(), range(k)))
+        for table in self.linked:
+            table.forget(evicted_keys)
+        if self.dirty:
+            new_row = np.cumsum(keep) - 1
+            self.dirty = set(new_row[np.fromiter(self.dirty, dtype=np.intp)].tolist())
+
+        self.stats["evictions"] += 1
+        self.stats["evicted"] += len(evicted)
+        return len(evicted)
+
+    def memory_stats(self):
+        """États en mémoire, octets, évictions, états évincés, présence des états consultés."""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "resident": len(self.index),
+            "bytes": self.nbytes,
+            "linked_resident": sum(table.resident for table in self.linked),
+            "linked_bytes": sum(table.nbytes for table in self.linked),
+            "budget_rows": self.max_rows,
+            **self.stats,
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+        }
+
+    # -----------------------
+    # Compatibilité JSON (ancien format dict-de-dicts à clés texte)
+    # -----------------------
+    @classmethod
+    def from_dict(cls, data):
+        table = cls(capacity=max(1024, len(data)))
+        for state_str, actions in data.items():
+            state = state_from_str(state_str)
+            x, y = unpack_state(state)[:2]
+            r = table.row(state)
+            for action_str, value in actions.items():
+                a = action_from_str(action_str, x, y)
+                table.values[r, a] = value
+                table.known[r, a] = True
+        return table
+
+    def to_dict(self):
+        data = {}
+        for state, values, known in self.items():
+            x, y = unpack_state(state)[:2]
+            data[state_to_str(state)] = {
+                action_to_str(a, x, y): float(values[a]) for a in np.flatnonzero(known)
+            }
+        return data
+
+    @classmethod
+    def load_json(cls, filename):
+        if not os.path.exists(filename):
+            return cls()
+        with open(filename, "r") as f:
+            return cls.from_dict(json.load(f))
+
+    def save_json(self, filename):
+        with open(filename, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    # -----------------------
+    # Format binaire mappé en mémoire
+    # -----------------------
+    def _arrays(self):
+        """(clés triées, valeurs, masques, visites) de toute la table, base comprise."""
+        n = len(self.index)
+        keys, values, known = self.keys[:n], self.values[:n], self.known[:n]
+        masks = (known * _BITS).sum(axis=1, dtype=np.uint16)
+        visits = self.visits[:n]
+        if self.base is not None:
+            base_keys, base_values, base_masks, base_visits = self.base
+            keep = ~np.isin(base_keys, keys)
+            if base_visits is None:
+                base_visits = np.zeros(len(base_keys), dtype=np.uint32)
+            keys = np.concatenate([base_keys[keep], keys])
+            values = np.concatenate([base_values[keep], values])
+            masks = np.concatenate([base_masks[keep], masks])
+            visits = np.concatenate([base_visits[keep], visits])
+        order = np.argsort(keys, kind="stable")
+        return keys[order], values[order], masks[order], visits[order]
+
+    def maps(self, filename):
+        """True si `filename` est le fichier mappé en base."""
+        return self.base_filename is not None and os.path.exists(filename) \
+            and os.path.samefile(self.base_filename, filename)
+
+    def save_binary(self, filename):
+        """
+        Écrit la table au format .qtb (fichier temporaire puis remplacement atomique).
+        Si `filename` est le fichier mappé (base), le mappage est lâché avant le
+        remplacement (impossible sous Windows sinon) puis rouvert sur le nouveau fichier.
+        """
+        keys, values, masks, visits = self._arrays()
+        tmp = filename + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, len(keys), N_ACTIONS).ljust(_HEADER_SIZE, b"\0"))
+            f.write(keys.astype("<i8").tobytes())
+            f.write(values.astype("<f8").tobytes())
+            f.write(masks.astype("<u2").tobytes())
+            f.write(visits.astype("<u4").tobytes())
+        mapped = self.maps(filename)
+        if mapped:
+            self.release_base()
+        os.replace(tmp, filename)
+        if mapped:
+            self.rebase(filename)
+
+    @staticmethod
+    def _map(filename):
+        """
+        (clés, valeurs, masques, visites) mappés depuis un .qtb, ou None s'il
+        est absent ou vide ; visites None pour un fichier de version 1.
+        """
+        if not os.path.exists(filename):
+            return None
+        with open(filename, "rb") as f:
+            magic, version, n, n_actions = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != _MAGIC or version not in (1, _VERSION) or n_actions != N_ACTIONS:
+            raise ValueError(f"{filename} : fichier Q-table binaire invalide")
+        if n == 0:
+            return None
+        offset = _HEADER_SIZE
+        keys = np.memmap(filename, dtype="<i8", mode="r", offset=offset, shape=(n,))
+        offset += keys.nbytes
+        values = np.memmap(filename, dtype="<f8", mode="r", offset=offset, shape=(n, N_ACTIONS))
+        offset += values.nbytes
+        masks = np.memmap(filename, dtype="<u2", mode="r", offset=offset, shape=(n,))
+        offset += masks.nbytes
+        visits = np.memmap(filename, dtype="<u4", mode="r", offset=offset, shape=(n,)) if version >= 2 else None
+        return keys, values, masks, visits
+
+    @classmethod
+    def open_binary(cls, filename):
+        """Ouvre un .qtb par mmap : temps constant, lignes lues à la demande."""
+        table = cls()
+        table.rebase(filename)
+        return table
+
+    def rebase(self, filename):
+        """
+        Mappe `filename` comme base (fichier écrit depuis cette table, ou table
+        vide) ; les lignes en mémoire restent prioritaires.
+        """
+        self.release_base()
+        self.base = self._map(filename)
+        if self.base is not None:
+            self.base_filename = filename
+        n = len(self.index)
+        self._n_new = n
+        if self.base is not None and n:
+            base_keys = self.base[0]
+            keys = self.keys[:n]
+            pos = np.minimum(np.searchsorted(base_keys, keys), len(base_keys) - 1)
+            self._n_new = int((base_keys[pos] != keys).sum())
+
+    def release_base(self):
+        """
+        Lâche le fichier mappé (avant de le remplacer ou de le supprimer) : la
+        table ne voit plus que ses lignes en mémoire. Le mappage est fermé dès
+        que plus rien n'y fait référence.
+        """
+        self.base = None
+        self.base_filename = None
+        self._n_new = len(self.index)
+
+    @classmethod
+    def load(cls, filename):
+        """Charge une table .qtb (mmap) ou .json selon l'extension."""
+        if filename.endswith(".json"):
+            return cls.load_json(filename)
+        return cls.open_binary(filename)
+
+    def save(self, filename):
+        if filename.endswith(".json"):
+            self.save_json(filename)
+        else:
+            self.save_binary(filename)
+
+def convert(src, dst):
+    """Convertit une Q-table entre les formats JSON et binaire (selon les extensions)."""
+    QTable.load(src).save(dst)
+
+
+# -----------------------
+# Benchmark : mémoire et temps de lookup vs dict-de-dicts
+# -----------------------
+if __name__ == "__main__":
+    import argparse
+    import random
+    import time
+    import tracemalloc
+
+    from actions import MOVE_DELTAS
+
+    def measure(build):
+        tracemalloc.start()
+        obj = build()
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return obj, used
+
+    def bench(label, legacy):
+        table, table_bytes = measure(lambda: QTable.from_dict(legacy))
+        assert table.to_dict() == legacy, "aller-retour JSON non conforme"
+        # dict reconstruit comme pendant l'entraînement (clés texte neuves)
+        _, dict_bytes = measure(table.to_dict)
+
+        rng = random.Random(0)
+        samples = []
+        for state_str, actions in rng.choices(list(legacy.items()), k=100_000):
+            fields = tuple(map(int, state_str.split(",")))
+            mask = np.zeros(N_ACTIONS, dtype=bool)
+            for a in actions:
+                mask[action_from_str(a, *fields[:2])] = True
+            samples.append((fields, list(actions), mask))
+
+        # ce que fait choose_action : clé d'état, actions légales marquées
+        # connues (0.0 si nouvelles), puis lecture de leurs valeurs
+        t0 = time.perf_counter()
+        for (x, y, on, close, local, dist), actions, _ in samples:
+            state = f"{x},{y},{on},{close},{local},{dist}"
+            if state not in legacy:
+                legacy[state] = {}
+            row = legacy[state]
+            for a in actions:
+                if a not in row:
+                    row[a] = 0.0
+            [row[a] for a in actions]
+        t_dict = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for fields, _, mask in samples:
+            table.q_values(pack_state(*fields), mask)
+        t_table = time.perf_counter() - t0
+
+        n = len(samples)
+        print(f"--- {label} : {len(table)} états ---")
+        print(f"Mémoire dict-de-dicts     : {dict_bytes / 1e6:8.2f} Mo")
+        print(f"Mémoire QTable            : {table_bytes / 1e6:8.2f} Mo (tableaux : {table.nbytes / 1e6:.2f} Mo)")
+        print(f"Lookup état dict          : {1e6 * t_dict / n:8.3f} µs")
+        print(f"Q.q_values(état, masque)  : {1e6 * t_table / n:8.3f} µs")
+
+    def bench_files(json_file):
+        binary_file = json_file[:-len(".json")] + ".qtb"
+        convert(json_file, binary_file)
+        for label, fn in (("json.load + QTable", lambda: QTable.load_json(json_file)),
+                          ("mmap .qtb", lambda: QTable.open_binary(binary_file))):
+            t0 = time.perf_counter()
+            table, used = measure(fn)
+            t_open = time.perf_counter() - t0
+            state = next(iter(table.items()))[0]
+            t0 = time.perf_counter()
+            table.best_value(state)
+            t_first = time.perf_counter() - t0
+            print(f"{label:<20} ouverture {1e3 * t_open:8.2f} ms, {used / 1e6:6.2f} Mo, "
+                  f"1er lookup {1e6 * t_first:7.1f} µs")
+        os.remove(binary_file)
+
+    parser = argparse.ArgumentParser(description="Q-table : benchmark ou conversion JSON <-> .qtb")
+    parser.add_argument("--convert", nargs=2, metavar=("SRC", "DST"))
+    args = parser.parse_args()
+    if args.convert:
+        convert(*args.convert)
+        raise SystemExit
+
+    with open("data/q_table.json") as f:
+        legacy = json.load(f)
+    bench("q_table.json (élaguée)", legacy)
+
+    # table en cours d'entraînement : les 5 déplacements connus pour chaque état
+    full = {s: {**{str(d): 0.0 for d in MOVE_DELTAS}, **a} for s, a in legacy.items()}
+    bench("non élaguée (5 déplacements / état)", full)
+
+    print("--- chargement au démarrage ---")
+    bench_files("data/q_table.json")
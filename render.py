@@ -0,0 +1,254 @@
+# render.py — rendu pygame mis en cache pour le client interactif (jeu.py)
+#
+# Le plateau (cases + objectifs) est pré-rendu une fois par partie sur une
+# surface de fond. Polices, textes et sprites d'unités sont mis en cache :
+# aucune police n'est créée ni aucun texte rendu deux fois.
+# Renderer.draw compare le contenu de chaque case occupée à l'image
+# précédente et ne redessine (fond + sprite) que les cases qui ont changé,
+# plus le panneau du bas si la sélection ou les scores ont changé. Seuls ces
+# rectangles sont envoyés à l'écran (pygame.display.update).
+# Le coût d'une image dépend du nombre d'unités, pas de la taille du plateau.
+# FrameScheduler cadence la boucle : attente bloquante des évènements quand
+# rien n'est à redessiner, au plus MAX_FPS images/s sinon.
+
+from time import perf_counter
+
+import pygame
+
+from config import *
+
+OBJECTIVE_BORDER_COLOR = (0, 255, 0)
+_MAX_CACHED_TEXTS = 2048  # les textes de score changent à chaque tour
+
+_fonts = {}    # taille -> pygame.font.Font
+_texts = {}    # (texte, taille, couleur) -> Surface
+_sprites = {}  # clé d'apparence d'une case -> Surface
+
+# -----------------------
+# Caches
+# -----------------------
+def font(font_size):
+    f = _fonts.get(font_size)
+    if f is None:
+        f = _fonts[font_size] = pygame.font.SysFont(None, font_size)
+    return f
+
+def text(s, font_size, color=TEXT_COLOR):
+    """Surface du texte `s`, rendue une seule fois."""
+    key = (s, font_size, color)
+    img = _texts.get(key)
+    if img is None:
+        if len(_texts) >= _MAX_CACHED_TEXTS:
+            _texts.clear()
+        img = _texts[key] = font(font_size).render(s, True, color)
+    return img
+
+def unit_key(unit, units, objectives):
+    """Apparence de la case dessinée par `unit` : (couleur, sélection, symboles, sur objectif)."""
+    if unit.moved:
+        color = unit.color
+    elif unit.color == PLAYER_COLOR:
+        color = PLAYER_COLOR_LIGHT
+    elif unit.color == ENEMY_COLOR:
+        color = ENEMY_COLOR_LIGHT
+    else:
+        color = unit.color
+    on_objective = objectives.on(unit.x, unit.y) if hasattr(objectives, "on") else \
+        any(unit.x == obj['x'] and unit.y == obj['y'] for obj in objectives)
+    return color, unit.selected, unit.get_symbols_on_same_tile(units), on_objective
+
+def unit_sprite(color, selected, symbols, on_objective):
+    """Sprite d'une case occupée (rendu une fois par apparence)."""
+    key = (color, selected, symbols, on_objective)
+    sprite = _sprites.get(key)
+    if sprite is None:
+        sprite = _sprites[key] = pygame.Surface((tile_size, tile_size))
+        rect = sprite.get_rect()
+        sprite.fill(color)
+        if selected:
+            pygame.draw.rect(sprite, SELECTED_COLOR, rect, 3)
+        img = text(symbols, 16)
+        sprite.blit(img, ((tile_size - img.get_width()) // 2, 5))
+        if on_objective:
+            pygame.draw.rect(sprite, OBJECTIVE_BORDER_COLOR, rect, 1)
+    return sprite
+
+# -----------------------
+# Plateau et interface
+# -----------------------
+def draw_map(screen, game_map=None):
+    screen.fill(PASSABLE_COLOR, pygame.Rect(0, 0, width, height))
+
+def draw_objectives(screen, objectives):
+    for obj in objectives:
+        color = OBJECTIVE_MAJOR_COLOR if obj['type'] == 'MAJOR' else OBJECTIVE_MINOR_COLOR
+        rect = pygame.Rect(obj['x'] * tile_size, obj['y'] * tile_size, tile_size, tile_size)
+        pygame.draw.rect(screen, color, rect)
+
+def draw_turn_indicator(screen, player_turn):
+    screen.blit(text("Joueur" if player_turn else "Ennemi", 36), (10, 10))
+
+def draw_end_turn_button(screen, hover=False):
+    button_rect = pygame.Rect(width // 2 - 50, height, 100, interface_height - 10)
+    pygame.draw.rect(screen, BUTTON_HOVER_COLOR if hover else BUTTON_COLOR, button_rect)
+    screen.blit(text("Terminé", 36), (width // 2 - 50 + 10, height + 10))
+
+def draw_unit_attributes(screen, unit):
+    if unit:
+        screen.blit(text("Unité", 24), (10, height + 10))
+        screen.blit(text(f"PV: {unit.pv} / 2", 24), (10, height + 40))
+
+def draw_scores(screen, player_score, enemy_score):
+    screen.blit(text(f"Score Joueur: {player_score}", 24), (10, height + 70))
+    screen.blit(text(f"Score Ennemi: {enemy_score}", 24), (width - 150, height + 70))
+
+def draw_victory_message(screen, message):
+    screen.blit(text(message, 48), (width // 2 - 100, height // 2 - 24))
+
+# -----------------------
+# Rendu incrémental
+# -----------------------
+class Renderer:
+    """
+    r = Renderer(screen, objectives)
+    r.draw(units, selected_unit, player_turn, player_score, enemy_score)  # à chaque image
+    Renvoie la liste des rectangles mis à jour (vide si rien n'a changé).
+    `hover` : souris sur le bouton de fin de tour ; `stats` : texte affiché
+    en haut à droite du plateau (compteur d'images, voir jeu.py).
+    """
+
+    def __init__(self, screen, objectives):
+        self.screen = screen
+        self.panel_rect = pygame.Rect(0, height, width, interface_height)
+        self.reset(objectives)
+
+    def reset(self, objectives):
+        """Nouvelle partie : fond pré-rendu et écran entier à redessiner."""
+        self.objectives = objectives
+        self.background = pygame.Surface((width, height)).convert()
+        draw_map(self.background)
+        draw_objectives(self.background, objectives)
+        self.invalidate()
+
+    def invalidate(self):
+        """Force le rendu complet à la prochaine image (ex. fenêtre réexposée)."""
+        self.tiles = {}         # (x, y) -> clé du sprite affiché
+        self.overlay_key = None
+        self.overlay_rects = []
+        self.panel_key = None
+        self.full = True
+
+    def _tiles_under(self, rect):
+        x0, x1 = max(0, rect.left // tile_size), min(size - 1, (rect.right - 1) // tile_size)
+        y0, y1 = max(0, rect.top // tile_size), min(size - 1, (rect.bottom - 1) // tile_size)
+        return [(x, y) for y in range(y0, y1 + 1) for x in range(x0, x1 + 1)]
+
+    def _draw_tile(self, pos, key):
+        rect = pygame.Rect(pos[0] * tile_size, pos[1] * tile_size, tile_size, tile_size)
+        if key is None:
+            self.screen.blit(self.background, rect, rect)
+        else:
+            self.screen.blit(unit_sprite(*key), rect)
+        return rect
+
+    def draw(self, units, selected_unit, player_turn, player_score, enemy_score, message=None,
+             hover=False, stats=None):
+        screen = self.screen
+        # la dernière unité de la liste recouvre les autres sur sa case
+        tiles = {}
+        for u in units:
+            tiles[(u.x, u.y)] = unit_key(u, units, self.objectives)
+
+        # textes affichés par-dessus le plateau
+        overlay_key = (player_turn, message, stats)
+        overlays = [(text("Joueur" if player_turn else "Ennemi", 36), (10, 10))]
+        if message:
+            overlays.append((text(message, 48), (width // 2 - 100, height // 2 - 24)))
+        if stats:
+            img = font(20).render(stats, True, TEXT_COLOR)  # change à chaque image : hors cache
+            overlays.append((img, (width - img.get_width() - 10, 10)))
+        overlay_rects = [img.get_rect(topleft=pos) for img, pos in overlays]
+
+        dirty = []
+        if self.full:
+            screen.fill((0, 0, 0))
+            screen.blit(self.background, (0, 0))
+            for pos, key in tiles.items():
+                self._draw_tile(pos, key)
+            dirty.append(screen.get_rect())
+            redraw_overlays = True
+        else:
+            changed = {pos for pos in tiles.keys() | self.tiles.keys() if tiles.get(pos) != self.tiles.get(pos)}
+            if overlay_key != self.overlay_key:
+                for rect in self.overlay_rects + overlay_rects:
+                    changed.update(self._tiles_under(rect))
+            for pos in changed:
+                dirty.append(self._draw_tile(pos, tiles.get(pos)))
+            redraw_overlays = bool(dirty)
+        if redraw_overlays:
+            # texte antialiasé : le reblitter sur des pixels non effacés le rendrait plus épais,
+            # on le limite donc aux rectangles redessinés
+            for (img, pos), rect in zip(overlays, overlay_rects):
+                for i in rect.collidelistall(dirty):
+                    screen.set_clip(dirty[i])
+                    screen.blit(img, pos)
+            screen.set_clip(None)
+
+        panel_key = (selected_unit.pv if selected_unit else None, player_score, enemy_score, hover)
+        if panel_key != self.panel_key:
+            screen.fill((0, 0, 0), self.panel_rect)
+            draw_end_turn_button(screen, hover)
+            draw_unit_attributes(screen, selected_unit)
+            draw_scores(screen, player_score, enemy_score)
+            if not self.full:
+                dirty.append(self.panel_rect)
+
+        self.tiles, self.overlay_key, self.overlay_rects = tiles, overlay_key, overlay_rects
+        self.panel_key = panel_key
+        self.full = False
+        if dirty:
+            pygame.display.update(dirty)
+        return dirty
+
+# -----------------------
+# Cadence de la boucle
+# -----------------------
+class FrameScheduler:
+    """
+    Boucle évènementielle du client :
+        for event in scheduler.events(): ...   # bloque tant que rien n'est à redessiner
+        scheduler.request_redraw()             # l'état affiché a changé
+        if scheduler.pending:
+            scheduler.draw(lambda stats: renderer.draw(..., stats=stats))
+    Les images sont limitées à max_fps par seconde ; avec show_fps, `stats`
+    contient images/s et durée de la dernière image (None sinon).
+    """
+
+    def __init__(self, max_fps=MAX_FPS, show_fps=SHOW_FPS):
+        self.clock = pygame.time.Clock()
+        self.max_fps = max_fps
+        self.show_fps = show_fps
+        self.pending = True
+        self.frame_ms = 0.0
+
+    def request_redraw(self):
+        self.pending = True
+
+    def events(self):
+        """Évènements en attente ; si aucune image n'est due, attend le prochain sans consommer de CPU."""
+        if self.pending:
+            return pygame.event.get()
+        return [pygame.event.wait()] + pygame.event.get()
+
+    def stats(self):
+        if not self.show_fps:
+            return None
+        return f"{self.clock.get_fps():.0f} img/s  {self.frame_ms:.2f} ms"
+
+    def draw(self, draw_fn):
+        """Appelle draw_fn(stats), puis attend si besoin pour ne pas dépasser max_fps."""
+        t0 = perf_counter()
+        draw_fn(self.stats())
+        self.frame_ms = 1e3 * (perf_counter() - t0)
+        self.pending = False
+        self.clock.tick(self.max_fps)
@@ -0,0 +1,155 @@
+# replay.py — enregistrement compact des parties et rejeu sans IA
+#
+# Une partie est entièrement déterminée par sa graine (placement des unités
+# et des objectifs, tirés avec random.Random(seed)) et par la suite des
+# actions jouées, un octet par action d'unité (codes actions.Action), dans
+# l'ordre où ai_turn_reward_based les joue.
+#
+# Fichier .rec : suite d'enregistrements
+#   en-tête : seed u64, size u16, unités par camp u16, demi-tours u32,
+#             score joueur u32, score ennemi u32, nombre d'actions u32
+#   actions : uint8[nombre d'actions]
+#
+# Le rejeu ré-applique les actions avec engine.apply_action (aucun appel à
+# l'IA ni à la Q-table), vérifie les scores finaux et peut s'arrêter à
+# n'importe quel demi-tour.
+
+import random
+import struct
+
+from config import *
+from engine import Unit, add_objectives, apply_action, generate_units, play_game
+
+_HEADER = struct.Struct("<QHHIIII")
+
+class GameRecord:
+    def __init__(self, seed, units_per_side=5, actions=None, turns=0, player_score=0, enemy_score=0,
+                 board_size=size):
+        self.seed = seed
+        self.units_per_side = units_per_side
+        self.actions = actions if actions is not None else bytearray()
+        self.turns = turns
+        self.player_score = player_score
+        self.enemy_score = enemy_score
+        self.board_size = board_size
+
+    def finish(self, result):
+        """Enregistre le résultat de engine.play_game."""
+        self.turns = result["turns"]
+        self.player_score = result["player_score"]
+        self.enemy_score = result["enemy_score"]
+
+    def to_bytes(self):
+        return _HEADER.pack(self.seed, self.board_size, self.units_per_side, self.turns,
+                            self.player_score, self.enemy_score, len(self.actions)) + bytes(self.actions)
+
+def new_game(seed, units_per_side=5, unit_cls=Unit):
+    """(rng, unités, objectifs) d'une partie, tirés de random.Random(seed)."""
+    rng = random.Random(seed)
+    units = generate_units(unit_cls, units_per_side, rng=rng)
+    objectives = add_objectives(rng=rng)
+    return rng, units, objectives
+
+# -----------------------
+# Fichiers
+# -----------------------
+class RecordWriter:
+    """Flux .rec ouvert pour toute la session (écriture bufferisée)."""
+
+    def __init__(self, filename):
+        self.file = open(filename, "wb")
+
+    def write(self, record):
+        self.file.write(record.to_bytes())
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def read_records(filename):
+    """Liste des GameRecord d'un fichier .rec (un enregistrement tronqué en fin est ignoré)."""
+    with open(filename, "rb") as f:
+        data = f.read()
+    records = []
+    pos = 0
+    while pos + _HEADER.size <= len(data):
+        seed, board_size, units_per_side, turns, ps, es, n = _HEADER.unpack_from(data, pos)
+        pos += _HEADER.size
+        if pos + n > len(data):
+            break
+        records.append(GameRecord(seed, units_per_side, bytearray(data[pos:pos + n]), turns, ps, es, board_size))
+        pos += n
+    return records
+
+# -----------------------
+# Rejeu
+# -----------------------
+def replay(record, max_turns=None, unit_cls=Unit):
+    """
+    Rejoue `record` (jusqu'au demi-tour max_turns si donné).
+    Renvoie (résultat de play_game, unités, objectifs) dans l'état atteint.
+    """
+    if record.board_size != size:
+        raise ValueError(f"partie enregistrée sur un plateau {record.board_size}, config : {size}")
+    _, units, objectives = new_game(record.seed, record.units_per_side, unit_cls)
+    codes = record.actions
+    pos = 0
+
+    def turn_fn(units, objectives, game_map, team, turn_count):
+        nonlocal pos
+        for unit in [u for u in units if u.color == team and not u.moved]:
+            apply_action(unit, codes[pos], units, objectives)
+            pos += 1
+        return 0.0, []
+
+    result = play_game(turn_fn, units=units, objectives=objectives, max_turns=max_turns)
+    return result, units, objectives
+
+def verify(record):
+    """True si le rejeu retrouve exactement les demi-tours et scores enregistrés."""
+    try:
+        result = replay(record)[0]
+    except IndexError:  # actions épuisées avant la fin
+        return False
+    return (result["turns"], result["player_score"], result["enemy_score"]) == \
+        (record.turns, record.player_score, record.enemy_score)
+
+def board_to_text(units, objectives):
+    """Plateau en texte : B/R unités, M/m objectifs majeur/mineur, . vide."""
+    rows = [["."] * size for _ in range(size)]
+    for obj in objectives:
+        rows[obj['y']][obj['x']] = "M" if obj['type'] == 'MAJOR' else "m"
+    for u in units:
+        rows[u.y][u.x] = "B" if u.color == PLAYER_COLOR else "R"
+    return "\n".join(" ".join(row) for row in rows)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Vérification / rejeu de parties enregistrées (.rec)")
+    parser.add_argument("filename")
+    parser.add_argument("--game", type=int, help="numéro de partie (à partir de 1)")
+    parser.add_argument("--turn", type=int, help="demi-tour auquel s'arrêter (avec --game)")
+    args = parser.parse_args()
+
+    records = read_records(args.filename)
+    if args.game is None:
+        t0 = time.perf_counter()
+        bad = [i + 1 for i, record in enumerate(records) if not verify(record)]
+        elapsed = time.perf_counter() - t0
+        half_turns = sum(r.turns for r in records)
+        print(f"{len(records)} parties rejouées en {elapsed:.2f} s ({half_turns / elapsed:.0f} demi-tours/s)")
+        print(f"Scores non conformes : {bad if bad else 'aucun'}")
+    else:
+        record = records[args.game - 1]
+        result, units, objectives = replay(record, max_turns=args.turn)
+        print(f"Partie {args.game} (graine {record.seed}) : demi-tour {result['turns']}/{record.turns}, "
+              f"scores {result['player_score']} - {result['enemy_score']}")
+        print(board_to_text(units, objectives))
@@ -0,0 +1,128 @@
+# spectator.py — suivi visuel de l'entraînement dans un processus séparé
+#
+# L'entraînement (auto_game.py, trainer.py) envoie des instantanés compacts
+# du plateau dans une file bornée ; un processus spectateur les affiche avec
+# les fonctions de dessin du client (draw_map, draw_objectives, Unit.draw,
+# draw_scores). L'entraînement ne se bloque jamais : file pleine => le plus
+# ancien instantané est jeté ; si le spectateur est fermé, les instantanés
+# sont simplement perdus.
+#
+# Échantillonnage : une partie sur `every_games` est suivie, et dans cette
+# partie un demi-tour sur `every_turns`, au plus SPECTATOR_FPS instantanés
+# par seconde (ceux que le spectateur n'aurait pas le temps d'afficher ne
+# sont même pas construits). Hors partie suivie, le coût est nul (aucun
+# rappel passé à engine.play_game).
+#
+# Instantané : (partie, demi-tour, score joueur, score ennemi,
+#               octets x, y, bleu?, pv par unité, objectifs (x, y, majeur?))
+
+import multiprocessing as mp
+import queue
+from time import monotonic
+
+from config import *
+
+SPECTATOR_FPS = 20     # images/s maximum du spectateur
+QUEUE_SIZE = 16        # instantanés en attente au plus
+
+def snapshot(partie, turn_count, units, objectives, player_score, enemy_score):
+    cells = bytes(v for u in units for v in (u.x, u.y, u.color == PLAYER_COLOR, u.pv))
+    objs = tuple((obj['x'], obj['y'], obj['type'] == 'MAJOR') for obj in objectives)
+    return partie, turn_count, player_score, enemy_score, cells, objs
+
+class Spectator:
+    """
+    spectator = Spectator(every_games=10, every_turns=1)
+    play_game(..., on_half_turn=spectator.hook(partie))   # None hors partie suivie
+    spectator.close()
+    """
+
+    def __init__(self, every_games=10, every_turns=1, maxsize=QUEUE_SIZE, max_rate=SPECTATOR_FPS):
+        self.every_games = max(1, every_games)
+        self.every_turns = max(1, every_turns)
+        self.min_interval = 1.0 / max_rate
+        self._last_push = 0.0
+        self.queue = mp.Queue(maxsize)
+        self.queue.cancel_join_thread()  # ne pas attendre un spectateur fermé à la sortie
+        self.dropped = 0
+        self.process = mp.Process(target=view, args=(self.queue,), name="spectator", daemon=True)
+        self.process.start()
+
+    def __getstate__(self):
+        # transmissible à un worker (trainer.py) : seule la file l'intéresse
+        state = dict(self.__dict__)
+        state["process"] = None
+        return state
+
+    def hook(self, partie):
+        """Rappel on_half_turn pour la partie `partie`, ou None si elle n'est pas suivie."""
+        if partie % self.every_games:
+            return None
+
+        def on_half_turn(units, objectives, turn_count, player_score, enemy_score):
+            if turn_count % self.every_turns:
+                return
+            now = monotonic()
+            if now - self._last_push >= self.min_interval:
+                self._last_push = now
+                self.push(snapshot(partie, turn_count, units, objectives, player_score, enemy_score))
+        return on_half_turn
+
+    def push(self, snap):
+        """Ajoute sans jamais bloquer ; file pleine : jette le plus ancien (ou, à défaut, celui-ci)."""
+        try:
+            self.queue.put_nowait(snap)
+            return
+        except queue.Full:
+            pass
+        try:
+            self.queue.get_nowait()
+            self.queue.put_nowait(snap)
+        except (queue.Empty, queue.Full):
+            pass
+        self.dropped += 1
+
+    def close(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join(1)
+
+# -----------------------
+# Processus spectateur
+# -----------------------
+def view(snapshots):
+    """Boucle d'affichage : dernier instantané reçu, au plus SPECTATOR_FPS images/s."""
+    import pygame
+    from engine import Board
+    from jeu import Unit
+    from render import draw_map, draw_objectives, draw_scores, text
+
+    pygame.init()
+    pygame.display.set_caption("Entraînement — spectateur")
+    screen = pygame.display.set_mode((width, height + interface_height))
+    clock = pygame.time.Clock()
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                return
+        try:
+            snap = snapshots.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        partie, turn_count, player_score, enemy_score, cells, objs = snap
+        units = Board(Unit(cells[i], cells[i + 1], PLAYER_COLOR if cells[i + 2] else ENEMY_COLOR)
+                      for i in range(0, len(cells), 4))
+        for u, i in zip(units, range(3, len(cells), 4)):
+            u.pv = cells[i]
+        objectives = [{'x': x, 'y': y, 'type': 'MAJOR' if major else 'MINOR'} for x, y, major in objs]
+
+        screen.fill((0, 0, 0))
+        draw_map(screen)
+        draw_objectives(screen, objectives)
+        for u in units:
+            u.draw(screen, units, objectives)
+        draw_scores(screen, player_score, enemy_score)
+        screen.blit(text(f"Partie {partie} - demi-tour {turn_count}", 24), (10, height + 10))
+        pygame.display.flip()
+        clock.tick(SPECTATOR_FPS)
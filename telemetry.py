@@ -0,0 +1,89 @@
+# telemetry.py — journal d'entraînement structuré (une ligne par partie)
+#
+# Un seul flux ouvert pour toute la session, écrit par lots. Au lieu de la
+# liste des rewards sous forme de chaînes, chaque partie enregistre pour
+# chaque type de reward (ai.REWARD_TYPES) le nombre d'occurrences et la somme.
+# Format choisi par l'extension : .csv, ou .sqlite / .db (table `games`,
+# résumé dans la table `summary`).
+
+import csv
+import os
+import sqlite3
+
+from ai import REWARD_TYPES
+
+GAME_COLUMNS = ["Partie", "Tours", "Score_Joueur", "Score_Ennemi", "Gagnant", "Recompenses"]
+
+def reward_columns():
+    columns = []
+    for kind in REWARD_TYPES:
+        columns += [f"n_{kind}", f"sum_{kind}"]
+    return columns
+
+class TelemetryWriter:
+    """
+    w = TelemetryWriter("data/logs.csv")
+    w.write_game(partie, result, reward_stats)   # à chaque partie
+    w.write_summary("% Parties Gagnees au score", "12.00%")
+    w.close()
+    `flush_every` : nombre de parties entre deux écritures sur disque.
+    """
+
+    def __init__(self, filename, flush_every=50):
+        self.filename = filename
+        self.flush_every = flush_every
+        self.columns = GAME_COLUMNS + reward_columns()
+        self.rows = []
+        self.summary = []
+        self.sqlite = os.path.splitext(filename)[1] in (".sqlite", ".db")
+        if self.sqlite:
+            self.db = sqlite3.connect(filename)
+            cols = ", ".join(f'"{c}"' for c in self.columns)
+            self.db.execute(f"CREATE TABLE IF NOT EXISTS games ({cols})")
+            self.db.execute("CREATE TABLE IF NOT EXISTS summary (label, value)")
+        else:
+            self.file = open(filename, "w", newline="")
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(self.columns)
+
+    def write_game(self, partie, result, reward_stats):
+        """result : dict renvoyé par engine.play_game ; reward_stats : {type: [n, somme]}."""
+        row = [partie, result["turns"], result["player_score"], result["enemy_score"],
+               result["winner"], round(result["total_reward"], 4)]
+        for kind in REWARD_TYPES:
+            n, total = reward_stats.get(kind, (0, 0.0))
+            row += [n, round(total, 4)]
+        self.rows.append(row)
+        if len(self.rows) >= self.flush_every:
+            self.flush()
+
+    def write_summary(self, label, value):
+        self.summary.append((label, value))
+
+    def flush(self):
+        if self.sqlite:
+            marks = ", ".join("?" * len(self.columns))
+            self.db.executemany(f"INSERT INTO games VALUES ({marks})", self.rows)
+            self.db.commit()
+        else:
+            self.writer.writerows(self.rows)
+            self.file.flush()
+        self.rows.clear()
+
+    def close(self):
+        self.flush()
+        if self.sqlite:
+            self.db.executemany("INSERT INTO summary VALUES (?, ?)", self.summary)
+            self.db.commit()
+            self.db.close()
+        else:
+            if self.summary:
+                self.writer.writerow([])
+                self.writer.writerows(self.summary)
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
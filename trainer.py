@@ -0,0 +1,220 @@
+# trainer.py — self-play multi-processus avec fusion périodique de la Q-table
+#
+# Chaque worker garde une copie locale de Q, joue `sync_every` parties puis
+# renvoie un delta creux {(state, action): (valeur, nb_visites)} limité aux
+# entrées qu'il a mises à jour. Le coordinateur fusionne les deltas puis
+# diffuse la fusion à tous les workers avant le round suivant.
+#
+# Règle de fusion : pour chaque (state, action), moyenne des valeurs des
+# workers pondérée par leur nombre de visites dans le round.
+#
+# Après chaque fusion, les états modifiés sont ajoutés au journal du
+# checkpoint (checkpoint.py) : un entraînement interrompu reprend au
+# dernier round fusionné.
+#
+# Budget mémoire (QTABLE_MEMORY_MB) : appliqué entre deux rounds, par chaque
+# worker après l'envoi de son delta et par le coordinateur après le journal.
+# Il couvre les compteurs de l'Explorer du worker (liés à Q, voir
+# QTable.link) ; le dict `visits` du worker, vidé à chaque round, ne
+# dépasse pas les entrées mises à jour pendant un round.
+#
+# --spectate : le worker 0 envoie des instantanés de ses parties à une
+# fenêtre spectateur (spectator.py), sans jamais l'attendre.
+#
+# Q-table seulement (VALUE_BACKEND = "table") : les deltas sont des entrées
+# (state, action), sans équivalent pour les poids partagés de linear_q.py.
+
+import argparse
+import multiprocessing as mp
+import os
+import random
+import time
+
+from ai import (ai_turn_reward_based, load_qtable, make_explorer, make_fast_forward, make_traces,
+                save_qtable)
+from auto_game import (COMPACT_EVERY, NB_PARTIES, SPECTATE_EVERY_GAMES, SPECTATE_EVERY_TURNS,
+                       checkpoint_filename, qtable_filename, synthesize_qtable)
+from checkpoint import open_checkpoint
+from engine import play_game
+from spectator import Spectator
+
+# -----------------------
+# Deltas
+# -----------------------
+def apply_delta(Q, delta):
+    """Écrit les valeurs d'un delta {(state, action): (valeur, visites)} dans Q."""
+    for (state, action), (value, _) in delta.items():
+        Q.set(state, action, value)
+
+def merge_deltas(Q, deltas):
+    """Fusionne les deltas des workers dans Q et renvoie le delta fusionné."""
+    acc = {}
+    for delta in deltas:
+        for key, (value, n) in delta.items():
+            total, weight = acc.get(key, (0.0, 0))
+            acc[key] = (total + value * n, weight + n)
+    merged = {key: (total / weight, weight) for key, (total, weight) in acc.items()}
+    apply_delta(Q, merged)
+    return merged
+
+# -----------------------
+# Worker
+# -----------------------
+def _worker(worker_id, Q, inbox, outbox, seed, spectator=None):
+    rng = random.Random(seed)  # flux indépendant par worker
+    Q.dirty = None  # le journal n'est tenu que par le coordinateur
+    visits = {}
+    games = 0
+    traces = make_traces()
+    explorer = make_explorer(Q)  # visites propres au worker, évincées avec Q
+
+    def turn_fn(units, objectives, game_map, team, turn_count):
+        return ai_turn_reward_based(units, objectives, game_map, team, Q,
+                                    turn_count=turn_count, visits=visits, rng=rng, traces=traces,
+                                    explorer=explorer)
+
+    ff_fn = make_fast_forward(Q, traces, explorer, visits=visits)
+
+    while True:
+        msg = inbox.get()
+        if msg is None:
+            break
+        merged, n_games = msg
+        apply_delta(Q, merged)
+        visits.clear()
+
+        t0 = time.perf_counter()
+        half_turns = 0
+        for _ in range(n_games):
+            games += 1
+            half_turns += play_game(turn_fn, rng=rng, fast_forward=ff_fn,
+                                    on_half_turn=spectator.hook(games) if spectator else None)["turns"]
+            if traces is not None:
+                traces.finish(Q, visits)
+        delta = {(s, a): (Q.get(s, a), n) for (s, a), n in visits.items()}
+        outbox.put((worker_id, delta, n_games, half_turns, time.perf_counter() - t0))
+        Q.enforce_budget()
+
+# -----------------------
+# Coordinateur
+# -----------------------
+def train(n_games=NB_PARTIES, n_workers=None, sync_every=10, Q=None, seed=0,
+          checkpoint=None, compact_every=COMPACT_EVERY, spectator=None):
+    """
+    Répartit n_games parties sur n_workers processus (tous les cœurs par défaut).
+    Avec un Checkpoint, Q est celle du checkpoint, les parties déjà jouées
+    sont décomptées et chaque round fusionné est journalisé.
+    Avec un Spectator, les parties du worker 0 lui sont envoyées.
+    Renvoie (Q fusionnée, stats).
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    if checkpoint is not None:
+        Q = checkpoint.Q
+        games_done = checkpoint.games_done
+    else:
+        Q = Q if Q is not None else load_qtable(qtable_filename)
+        games_done = 0
+    if not Q.tabular:
+        raise ValueError("trainer.py fusionne des Q-tables : utiliser auto_game.py avec VALUE_BACKEND = 'linear'")
+
+    outbox = mp.Queue()
+    inboxes = [mp.Queue() for _ in range(n_workers)]
+    workers = [
+        mp.Process(target=_worker, args=(i, Q, inboxes[i], outbox, seed + games_done + i,
+                                         spectator if i == 0 else None), daemon=True)
+        for i in range(n_workers)
+    ]
+    for w in workers:
+        w.start()
+
+    games_per_worker = [0] * n_workers
+    merge_times = []
+    half_turns = 0
+    merged = {}
+    remaining = n_games - games_done
+    t_start = time.perf_counter()
+
+    while remaining > 0:
+        # round : jusqu'à sync_every parties par worker
+        quotas = []
+        for i in range(n_workers):
+            q = min(sync_every, remaining)
+            remaining -= q
+            quotas.append(q)
+        active = [i for i, q in enumerate(quotas) if q > 0]
+        for i in active:
+            inboxes[i].put((merged, quotas[i]))
+
+        deltas = []
+        for _ in active:
+            worker_id, delta, played, ht, _ = outbox.get()
+            deltas.append(delta)
+            games_per_worker[worker_id] += played
+            half_turns += ht
+
+        t0 = time.perf_counter()
+        merged = merge_deltas(Q, deltas)
+        merge_times.append(time.perf_counter() - t0)
+
+        if checkpoint is not None:
+            before, games_done = games_done, games_done + sum(quotas)
+            if games_done // compact_every > before // compact_every:
+                checkpoint.compact(games_done)
+            else:
+                checkpoint.flush(games_done)
+        Q.enforce_budget()
+
+    for inbox in inboxes:
+        inbox.put(None)
+    for w in workers:
+        w.join()
+
+    elapsed = time.perf_counter() - t_start
+    stats = {
+        "workers": n_workers,
+        "games_per_worker": games_per_worker,
+        "games_per_sec": sum(games_per_worker) / elapsed,
+        "half_turns_per_sec": half_turns / elapsed,
+        "rounds": len(merge_times),
+        "merge_latency_ms": 1000 * sum(merge_times) / max(1, len(merge_times)),
+        "elapsed_s": elapsed,
+        "journal_bytes": checkpoint.bytes_written if checkpoint is not None else 0,
+    }
+    return Q, stats
+
+def print_stats(stats):
+    print(f"Workers            : {stats['workers']}")
+    print(f"Parties par worker : {stats['games_per_worker']}")
+    print(f"Parties / s        : {stats['games_per_sec']:.2f}")
+    print(f"Demi-tours / s     : {stats['half_turns_per_sec']:.0f}")
+    print(f"Fusion moyenne     : {stats['merge_latency_ms']:.2f} ms sur {stats['rounds']} rounds")
+    if stats["journal_bytes"]:
+        print(f"Journal écrit      : {stats['journal_bytes'] / 1e3:.1f} ko")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Entraînement IA vs IA multi-processus")
+    parser.add_argument("--games", type=int, default=NB_PARTIES)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--sync-every", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compact-every", type=int, default=COMPACT_EVERY)
+    parser.add_argument("--no-checkpoint", action="store_true",
+                        help="pas de journal : rien n'est sauvegardé avant la fin")
+    parser.add_argument("--spectate", action="store_true", help="fenêtre spectateur (worker 0)")
+    args = parser.parse_args()
+
+    ckpt = None if args.no_checkpoint else open_checkpoint(checkpoint_filename, initial=qtable_filename)
+    if ckpt is not None and ckpt.games_done:
+        print(f"Reprise du checkpoint : {ckpt.games_done} parties déjà jouées")
+    spectator = Spectator(SPECTATE_EVERY_GAMES, SPECTATE_EVERY_TURNS) if args.spectate else None
+    Q, stats = train(args.games, args.workers, args.sync_every, seed=args.seed,
+                     checkpoint=ckpt, compact_every=args.compact_every, spectator=spectator)
+    if spectator is not None:
+        spectator.close()
+    print_stats(stats)
+    Q_clean = synthesize_qtable(Q, min_action_value=0.1, keep_only_best=True, min_state_quality=2)
+    Q.release_base()  # Q peut mapper qtable_filename (--no-checkpoint ; remplacement impossible sous Windows)
+    save_qtable(Q_clean, qtable_filename)
+    if ckpt is not None:
+        ckpt.remove()